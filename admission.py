@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+import threading
+
+
+class Overloaded(Exception):
+    """Raised when a request is turned away because the server is at capacity or shutting down."""
+
+
+class AdmissionGate:
+    """
+    Bounds the number of requests doing expensive work at once, with a bounded queue.
+
+    Up to `max_in_flight` requests run at the same time and up to `max_queue` more wait
+    for a slot, each for at most `queue_timeout` seconds. Anything beyond that is turned
+    away at once with Overloaded, so a burst sheds load instead of piling up threads
+    behind the browsers. Once closed, for a shutdown, the gate turns every new request
+    away while the admitted ones finish.
+
+    Args:
+        max_in_flight (int): Requests allowed to run at once.
+        max_queue (int): Requests allowed to wait for a slot.
+        queue_timeout (float): Seconds a request waits for a slot before it is turned away.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Takes a slot, waiting in the queue if needed.
+
+        Raises:
+            Overloaded: If the queue is full, no slot freed up in time, or the gate is closed.
+        """
+        with self._cond:
+            if not self.closed and self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                self.admitted += 1
+                return
+            if self.closed or self.waiting >= self.max_queue:
+                self.shed += 1
+                raise Overloaded('Server is busy' if not self.closed else 'Server is shutting down')
+
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.closed or self.in_flight < self.max_in_flight,
+                                               self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if self.closed or not admitted:
+                self.shed += 1
+                raise Overloaded('Server is busy' if not self.closed else 'Server is shutting down')
+            self.in_flight += 1
+            self.admitted += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Holds a slot for the duration of the with block. Raises Overloaded like acquire()."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Closes the gate and waits up to timeout seconds for the admitted requests to finish.
+
+        Returns:
+            bool: True if none were left running.
+        """
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self.in_flight == 0, timeout)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'max_in_flight': self.max_in_flight,
+                'max_queue': self.max_queue,
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'closed': self.closed,
+            }
@@ -1,25 +1,203 @@
 import os
+import atexit
+import functools
+import json
+import logging
+import math
+import re
 import tempfile
-from flask import Flask, render_template, request, jsonify, send_from_directory
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import date, timedelta
+try:
+    import fcntl
+except ImportError:  # not on Windows; the scheduler then runs in every process
+    fcntl = None
+from flask import Flask, Response, render_template, request, jsonify, send_file, send_from_directory, stream_with_context
+from werkzeug.security import safe_join
 from extractor import (
-    submit_case_search,
-    extract_details,
-    submit_order_search,
     pdf_generator_v2 as generate_pdf, # Using the new function
-    extract_order_details_list,  
 )
+from async_extractor import engine_stats, search_case, start_engine, start_filing_date, shutdown_engine
+from browser_pool import pool_stats, shutdown_pool
+from http_client import close_session
+from cache import MemoryBackend, ResultCache, SQLiteBackend, case_key
+from report_store import ReportBuffer, ReportStore
+from ratelimit import HostRateLimiter, SiteUnavailable, configure_site_limiter
+from batch import Checkpoint, make_lookup, parse_cases, run_batch
+from jobs import JobQueue, MemoryJobStore, SQLiteJobStore
+from singleflight import SingleFlight
+from order_index import OrderIndex
+from case_db import CaseDatabase, PARTY_ROLES
+from scheduler import Scheduler
+from downloader import Downloader, OrderStore
+from bundle import UnreadableDocuments, build_bundle, stream_file
+from export import CONTENT_TYPES, COLUMNAR_FORMATS, FORMATS, TEXT_WRITERS, build_case_data, iter_case_data, resolve_format, write_columnar
+from metrics import REGISTRY, span
+from admission import AdmissionGate, Overloaded
+from catalogue import configure_catalogue
+from sites import CASE_STATUS_SITE, FILING_DATE_SITE, configure_sites
+from config import env
+
+logger = logging.getLogger(__name__)
 
 
 # Initialize the Flask application
 # The __name__ argument helps Flask locate resources like templates and static files.
 app = Flask(__name__)
 
+# Every setting below can be overridden by an environment variable named after it,
+# e.g. CASE_SEARCH_BROWSER_POOL_SIZE=4 (see config.py).
+
+# Directory holding the reports, caches and databases.
+data_dir = env('data_dir', tempfile.gettempdir())
+os.makedirs(data_dir, exist_ok=True)
+
 # A dictionary to store generated PDF files in a temporary location.
 # This is a simple in-memory storage for demonstration.
 # In a production environment, you would use a proper file storage system.
-pdf_temp_dir = os.path.join(tempfile.gettempdir(), 'case_search_pdfs')
+pdf_temp_dir = os.path.join(data_dir, 'case_search_pdfs')
 os.makedirs(pdf_temp_dir, exist_ok=True)
 
+# Generated reports are content-addressed and the directory is kept bounded.
+pdf_max_bytes = env('pdf_max_bytes', 500 * 1024 * 1024)
+pdf_max_age = env('pdf_max_age', 7 * 24 * 60 * 60)
+report_store = ReportStore(pdf_temp_dir, max_bytes=pdf_max_bytes, max_age=pdf_max_age)
+report_store.evict()
+
+# Where /search puts the report: 'disk' keeps it in the report store above, 'memory'
+# renders it into a buffer and serves it under a one-off token from /reports/<token>,
+# without touching the disk.
+pdf_delivery = env('pdf_delivery', 'disk')
+pdf_buffer_max_bytes = env('pdf_buffer_max_bytes', 64 * 1024 * 1024)
+pdf_token_ttl = env('pdf_token_ttl', 60 * 60)
+report_buffer = ReportBuffer(max_bytes=pdf_buffer_max_bytes, token_ttl=pdf_token_ttl)
+
+# Browser settings. The async engine keeps warm browsers around so a search
+# does not pay for a browser launch, and each browser serves several pages at once.
+browser_pool_size = env('browser_pool_size', 2)
+browser_contexts_per_browser = env('browser_contexts_per_browser', 4)
+# Further contexts per browser kept for the filing date lookup, so it never takes a
+# context from a case search
+browser_optional_contexts_per_browser = env('browser_optional_contexts_per_browser', 1)
+browser_max_pages = env('browser_max_pages', 50)
+
+# Requests that may scrape (/search, /search/refresh, /orders/download, /bundle,
+# /search/batch, /export) run at most one per browser context, with a bounded queue
+# behind them. Requests beyond that are answered with a 503 and Retry-After instead of
+# piling up. A streamed batch or export holds its slot until its response is sent.
+scrape_max_in_flight = env('scrape_max_in_flight', browser_pool_size * browser_contexts_per_browser)
+scrape_max_queue = env('scrape_max_queue', 2 * scrape_max_in_flight)
+scrape_queue_timeout = env('scrape_queue_timeout', 30.0)
+shed_retry_after = env('shed_retry_after', 10)
+scrape_gate = AdmissionGate(scrape_max_in_flight, scrape_max_queue, scrape_queue_timeout)
+
+# Every request to a court site goes through one adaptive limiter per host. Its rate
+# rises while the site answers quickly and halves when the site slows down or fails.
+# After site_failure_threshold failures in a row the host's circuit opens for
+# site_reset_timeout seconds: searches then fail at once with a 503, or are answered
+# from the result cache however old the cached result is.
+site_requests_per_minute = env('site_requests_per_minute', 60.0)
+site_min_requests_per_minute = env('site_min_requests_per_minute', 6.0)
+site_max_requests_per_minute = env('site_max_requests_per_minute', 240.0)
+site_slow_seconds = env('site_slow_seconds', 10.0)
+site_failure_threshold = env('site_failure_threshold', 5)
+site_reset_timeout = env('site_reset_timeout', 30.0)
+site_limiter = configure_site_limiter(
+    requests_per_minute=site_requests_per_minute,
+    min_requests_per_minute=site_min_requests_per_minute,
+    max_requests_per_minute=site_max_requests_per_minute,
+    slow_seconds=site_slow_seconds,
+    failure_threshold=site_failure_threshold,
+    reset_timeout=site_reset_timeout,
+)
+
+# Base URLs the court sites are scraped from. Links on their pages keep pointing at the
+# real sites and are mapped onto these, so tests and benchmarks can point the scrapers
+# at the local stand-in in benchmarks/court_site.py.
+case_status_site = env('case_status_site', CASE_STATUS_SITE)
+filing_date_site = env('filing_date_site', FILING_DATE_SITE)
+configure_sites(case_status=case_status_site, filing_date=filing_date_site)
+
+# Case types and years the court's search forms accept. Searches are checked against
+# them before anything is scraped, and the forms are scraped again once the catalogue
+# is catalogue_max_age seconds old.
+catalogue_path = os.path.join(data_dir, 'case_search_catalogue.json')
+catalogue_max_age = env('catalogue_max_age', 24 * 60 * 60)
+catalogue_refresh = env('catalogue_refresh', True)
+catalogue = configure_catalogue(path=catalogue_path, max_age=catalogue_max_age)
+
+# Cache of scraped case results, kept on disk so it survives restarts.
+case_cache_path = os.path.join(data_dir, 'case_search_cache.sqlite3')
+case_cache_ttl = env('case_cache_ttl', 6 * 60 * 60)
+case_cache_stale_ttl = env('case_cache_stale_ttl', 24 * 60 * 60)
+case_cache_max_entries = env('case_cache_max_entries', 1000)
+case_cache = ResultCache(
+    SQLiteBackend(case_cache_path, max_entries=case_cache_max_entries),
+    ttl=case_cache_ttl,
+    stale_ttl=case_cache_stale_ttl,
+    fallback_errors=(SiteUnavailable,),
+)
+
+# Filing dates never change, so once found they are cached for good. /search looks the
+# filing date up next to the rest of the search and, once the orders are in, waits at
+# most filing_date_wait seconds for it; a search answered from the result cache does not
+# wait at all. A slower or failed lookup leaves the filing date out of the report; a
+# lookup that finishes later still fills the cache. A case whose filing date was not
+# found is not looked up again for filing_date_miss_ttl seconds.
+filing_date_enabled = env('filing_date_enabled', True)
+filing_date_wait = env('filing_date_wait', 5.0)
+filing_date_miss_ttl = env('filing_date_miss_ttl', 15 * 60.0)
+filing_date_cache_path = os.path.join(data_dir, 'case_search_filing_dates.sqlite3')
+filing_date_cache_max_entries = env('filing_date_cache_max_entries', 100000)
+filing_date_cache = ResultCache(
+    SQLiteBackend(filing_date_cache_path, max_entries=filing_date_cache_max_entries),
+    ttl=float('inf'),
+)
+filing_date_misses = ResultCache(MemoryBackend(max_entries=filing_date_cache_max_entries), ttl=filing_date_miss_ttl)
+
+# Orders seen per case, so a refresh can report only the new ones.
+order_index_path = os.path.join(data_dir, 'case_order_index.sqlite3')
+order_index = OrderIndex(order_index_path)
+
+# Order documents are downloaded into a content-addressed store shared by all cases.
+order_store_dir = os.path.join(data_dir, 'case_order_documents')
+order_download_workers = env('order_download_workers', 8)
+order_downloads_per_host = env('order_downloads_per_host', 2)
+order_store = OrderStore(order_store_dir)
+order_downloader = Downloader(order_store, workers=order_download_workers, per_host=order_downloads_per_host)
+
+# Full case bundles are built next to the summary reports, merging order documents in batches.
+BUNDLE_SUFFIX = '_bundle.pdf'
+bundle_batch_size = env('bundle_batch_size', 50)
+
+# Identical searches running at the same time share one pipeline run.
+search_flight = SingleFlight()
+
+# Batch searches run on their own worker pool and are rate limited per court host.
+batch_workers = env('batch_workers', 4)
+batch_requests_per_minute = env('batch_requests_per_minute', 30)
+batch_checkpoint_dir = os.path.join(data_dir, 'case_search_batches')
+os.makedirs(batch_checkpoint_dir, exist_ok=True)
+batch_lookup = make_lookup(case_cache, HostRateLimiter(batch_requests_per_minute))
+
+# Every case the scrapers return is kept in a local SQLite database that /cases queries.
+case_db_path = os.path.join(data_dir, 'case_search_cases.sqlite3')
+case_db = CaseDatabase(case_db_path)
+
+# Parquet and Arrow exports are written here before they are sent
+export_temp_dir = os.path.join(data_dir, 'case_search_exports')
+os.makedirs(export_temp_dir, exist_ok=True)
+
+# Log level of the server. DEBUG also logs the duration of every search stage.
+log_level = env('log_level', 'INFO')
+
+# Close the pooled browsers when the server process exits.
+atexit.register(shutdown_engine)
+atexit.register(shutdown_pool)
+atexit.register(close_session)
+
 
 # Define the route for the home page ("/")
 @app.route("/")
@@ -31,86 +209,948 @@ def base():
     return render_template('app.html')
 
 
+def run_search_pipeline(case_type: str, case_number: str, year: str, progress=None) -> dict:
+    """
+    Runs the whole search: scrape and parse the case and its orders, then build the PDF report.
+    If given, progress(step_name) is called as each step starts.
+
+    Concurrent searches for the same case are coalesced: only the first one runs the
+    pipeline and the others wait for its result.
+
+    Returns:
+        dict: The JSON response for the frontend.
+
+    Raises:
+        SearchError: If a scraping step fails.
+    """
+    return search_flight.do(
+        case_key(case_type, case_number, year),
+        lambda: _search_pipeline(case_type, case_number, year, progress),
+    )
+
+
+def _start_filing_date(case_type: str, case_number: str, year: str) -> Future | None:
+    """
+    Starts the filing date lookup of a case, unless its filing date is cached, the
+    lookup is turned off, or a recent lookup did not find it. A filing date the lookup finds is added to the
+    cache; a lookup that finds none or fails is remembered for filing_date_miss_ttl.
+
+    Returns:
+        Future | None: Resolves to the filing date or None; None if there is nothing to wait for.
+    """
+    if not filing_date_enabled:
+        return None
+    key = case_key(case_type, case_number, year)
+    cached = filing_date_cache.get(key)
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        return future
+    if filing_date_misses.get(key):
+        return None
+    try:
+        future = start_filing_date(case_type, case_number, year)
+    except Exception as e:
+        logger.warning("Could not start the filing date lookup: %s", e)
+        return None
+
+    def store(done: Future):
+        if done.cancelled():
+            return
+        if done.exception() is None and done.result() is not None:
+            filing_date_cache.put(key, done.result())
+        else:
+            filing_date_misses.put(key, True)
+
+    future.add_done_callback(store)
+    return future
+
+
+def _wait_for_filing_date(future: Future | None, progress, timeout: float) -> str | None:
+    """Waits up to timeout seconds for a filing date lookup, returning None if it failed or is late."""
+    if future is None:
+        return None
+    if not future.done():
+        if not timeout:
+            return None
+        progress('filing_date')
+    try:
+        with span('filing_date.wait'):
+            return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        logger.info("No filing date after %ss; leaving it out of the report", timeout)
+    except Exception as e:
+        logger.warning("Filing date lookup failed: %s", e)
+    return None
+
+
+def _search_pipeline(case_type: str, case_number: str, year: str, progress=None) -> dict:
+    progress = progress or (lambda step: None)
+
+    # The filing date is looked up on its own browser page while the steps below run.
+    filing_date = _start_filing_date(case_type, case_number, year)
+
+    # Steps 1-4: Search the case, extract its details, then fetch and parse the
+    # orders page. This runs on the async engine's event loop; failures raise
+    # SearchError with a message for the client.
+    # Repeat lookups of the same case are answered from the result cache.
+    caller = threading.get_ident()
+    scraped = []
+
+    def fetch():
+        # A stale entry is refreshed on another thread while the cached result is answered.
+        # That refresh outlives this search, so it must not report progress to it.
+        if threading.get_ident() != caller:
+            return search_case(case_type, case_number, year, with_filing_date=False)
+        scraped.append(True)
+        return search_case(case_type, case_number, year, with_filing_date=False, progress=progress)
+
+    try:
+        result = case_cache.get_or_fetch(case_key(case_type, case_number, year), fetch)
+    except BaseException:
+        # Nothing will report the filing date, so do not keep a browser busy for it
+        if filing_date is not None:
+            filing_date.cancel()
+        raise
+    orders_details_list = result['orders']
+    # A search answered from the cache does not wait; the lookup still fills the
+    # filing date cache for the next one.
+    wait = filing_date_wait if scraped else 0
+    result = {**result, 'filing_date': _wait_for_filing_date(filing_date, progress, wait)}
+
+    # Step 5: Prepare the data for PDF generation.
+    with span('case_data'):
+        case_data = build_case_data(case_type, case_number, year, result)
+        _store_case(case_data)
+
+    # Step 6: Generate a PDF report with all the data. Identical case data reuses
+    # the report already on disk instead of rendering it again.
+    progress('report')
+    with span('report'):
+        download_url = _deliver_report(case_data)
+
+    # Step 7: Return the extracted data and the PDF download URL to the frontend.
+    return {
+        'case_details': {
+            'petitioner': result['petitioner'],
+            'respondent': result['respondent'],
+            'next_date': result.get('next_date'),
+            'last_date': result['last_date'],
+            'court_no': result['court_no'],
+            'filing_date': result['filing_date'],
+            'orders_count': len(orders_details_list)
+        },
+        'orders_details': orders_details_list,
+        'download_url': download_url
+    }
+
+
+def _with_filing_date(key: str, result: dict) -> dict:
+    """Returns result with the filing date found by an earlier /search, so every report of a case agrees."""
+    if result.get('filing_date') or not filing_date_enabled:
+        return result
+    return {**result, 'filing_date': filing_date_cache.get(key)}
+
+
+def _deliver_report(case_data: dict) -> str:
+    """Renders the report for case_data, or reuses an identical one, and returns its download URL."""
+    if pdf_delivery == 'memory':
+        return f'/reports/{report_buffer.render(case_data, generate_pdf)}'
+    pdf_file_path = report_store.get_or_render(case_data, generate_pdf)
+    return f'/download/{os.path.basename(pdf_file_path)}'
+
+
+def _store_case(case_data: dict):
+    """Keeps a scraped case in the case database. A database error never fails the search."""
+    try:
+        case_db.upsert(case_data)
+    except Exception as e:
+        logger.warning("Could not store %s %s of %s: %s",
+                       case_data['case_type'], case_data['case_number'], case_data['case_year'], e)
+
+
+def _batch_lookup(case_type: str, case_number: str, year: str) -> dict:
+    """
+    The batch lookup, storing every case it returns in the case database. Cases the
+    catalogue rejects fail without being scraped.
+    """
+    error = catalogue.validate(case_type, case_number, year)
+    if error:
+        raise ValueError(error)
+    case_type = catalogue.case_type_label(case_type)
+    result = _with_filing_date(case_key(case_type, case_number, year), batch_lookup(case_type, case_number, year))
+    _store_case(build_case_data(case_type, case_number, year, result))
+    return result
+
+
+def _recrawl(case_type: str, case_number: str, year: str) -> dict:
+    """
+    A scheduled re-crawl: scrapes the case again and updates the result cache, the
+    order index and the case database. No report is rendered.
+    """
+    result = search_case(case_type, case_number, year, with_filing_date=False)
+    key = case_key(case_type, case_number, year)
+    case_cache.put(key, result)
+    new_orders = order_index.update(key, result['orders'])
+    if new_orders:
+        logger.info("Re-crawl found %d new orders for %s %s of %s", len(new_orders), case_type, case_number, year)
+    _store_case(build_case_data(case_type, case_number, year, _with_filing_date(key, result)))
+    return result
+
+
+# Tracked cases are re-crawled in the background, soonest hearing first, within one
+# request budget for all of them. The schedule survives restarts.
+scheduler_path = os.path.join(data_dir, 'case_search_schedule.sqlite3')
+scheduler_requests_per_minute = env('scheduler_requests_per_minute', 20)
+scheduler_workers = env('scheduler_workers', 2)
+scheduler = Scheduler(scheduler_path, _recrawl,
+                      requests_per_minute=scheduler_requests_per_minute, workers=scheduler_workers)
+atexit.register(scheduler.shutdown)
+
+
+def _unavailable(message: str, retry_after: float):
+    """Returns a 503 response telling the client when to try again."""
+    response = jsonify({'error': f'{message}, please try again later.'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _shed_load(view):
+    """Runs the view only once the scrape gate admits it, and answers 503 otherwise."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            scrape_gate.acquire()
+        except Overloaded as e:
+            return _unavailable(str(e), shed_retry_after)
+        streamed = False
+        try:
+            response = view(*args, **kwargs)
+            # A streamed body scrapes while it is sent, so it keeps the slot until then
+            if isinstance(response, Response) and response.is_streamed:
+                response.call_on_close(scrape_gate.release)
+                streamed = True
+            return response
+        finally:
+            if not streamed:
+                scrape_gate.release()
+    return wrapper
+
+
+def _not_modified(etag: str):
+    """Returns a 304 response if the client already holds the version tagged etag."""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _search_job(progress, case_type: str, case_number: str, year: str) -> dict:
+    return run_search_pipeline(case_type, case_number, year, progress)
+
+
+# Searches submitted through /jobs run in the background on a local worker pool, with
+# at most job_max_queued more waiting; beyond that /jobs answers 503 with Retry-After.
+# Jobs are kept in memory; set job_store_path to keep them in an SQLite file instead.
+job_workers = env('job_workers', 4)
+job_max_queued = env('job_max_queued', 32)
+job_store_path = env('job_store_path', None)
+job_event_interval = 0.5
+job_store = SQLiteJobStore(job_store_path) if job_store_path else MemoryJobStore()
+job_queue = JobQueue(job_store, _search_job, workers=job_workers, max_queued=job_max_queued)
+# Registered after the browser shutdown hooks so it runs before them.
+atexit.register(job_queue.shutdown)
+
+# Counters of the caches, pools and queues, exported as gauges by /metrics
+REGISTRY.register_stats('cache', case_cache.stats)
+REGISTRY.register_stats('filing_date_cache', filing_date_cache.stats)
+REGISTRY.register_stats('reports', report_store.stats)
+REGISTRY.register_stats('report_buffer', report_buffer.stats)
+REGISTRY.register_stats('coalescing', search_flight.stats)
+REGISTRY.register_stats('order_documents', lambda: {**order_store.stats(), **order_downloader.stats()})
+REGISTRY.register_stats('case_database', case_db.stats)
+REGISTRY.register_stats('jobs', job_queue.stats)
+REGISTRY.register_stats('scheduler', scheduler.stats)
+REGISTRY.register_stats('engine', engine_stats)
+REGISTRY.register_stats('browser_pool', pool_stats)
+REGISTRY.register_stats('admission', scrape_gate.stats)
+REGISTRY.register_stats('site', site_limiter.stats)
+REGISTRY.register_stats('catalogue', catalogue.stats)
+
+
+def _read_search_form():
+    data = request.json or {}
+    case_type, case_number, year = data.get('caseType'), data.get('caseNumber'), data.get('year')
+    # Spell the case type as the court does, so 'w.p. (c)' and 'W.P.(C)' are one case
+    if case_type:
+        case_type = catalogue.case_type_label(case_type) or case_type
+    return case_type, case_number, year
+
+
+def _invalid_search(case_type, case_number, year):
+    """Returns a 400 response if the search is incomplete or the catalogue rejects it, otherwise None."""
+    if not all([case_type, case_number, year]):
+        return jsonify({'error': 'Missing form data'}), 400
+    error = catalogue.validate(case_type, case_number, year)
+    if error:
+        return jsonify({'error': error}), 400
+    return None
+
+
 @app.route("/search", methods=['POST'])
+@_shed_load
 def search():
     """
     This route handles the POST request from the frontend form.
     It takes the form data, calls the scraping functions, and returns a JSON response.
     """
-    data = request.json
-    case_type = data.get('caseType')
-    case_number = data.get('caseNumber')
-    year = data.get('year')
+    case_type, case_number, year = _read_search_form()
 
-    if not all([case_type, case_number, year]):
-        return jsonify({'error': 'Missing form data'}), 400
+    invalid = _invalid_search(case_type, case_number, year)
+    if invalid:
+        return invalid
 
-    print(f"Received search request for {case_type} {case_number} of {year}")
+    logger.info("Received search request for %s %s of %s", case_type, case_number, year)
 
     try:
-        # Step 1: Submit the main case search and get the HTML of the results page.
-        search_results_html = submit_case_search(case_type, case_number, year)
-        if not search_results_html:
-            return jsonify({'error': 'Failed to retrieve search results.'}), 500
-
-        # Step 2: Extract the case details and the URL for the order details page.
-        order_url, petitioner, respondent, last_date, court_no = extract_details(search_results_html)
-
-        if not order_url:
-            return jsonify({'error': 'Failed to extract order URL from search results.'}), 500
-
-        # Step 3: Submit the order search and get the HTML of the order details page.
-        orders_html = submit_order_search(order_url)
-        if not orders_html:
-            return jsonify({'error': 'Failed to retrieve order details.'}), 500
-
-        # Step 4: Extract the individual order links and dates from the orders HTML.
-        orders_details_list = extract_order_details_list(orders_html)
-
-        # Step 5: Prepare the data for PDF generation.
-        case_data = {
-            'case_type': case_type,
-            'case_number': case_number,
-            'case_year': year,
-            'petitioner': petitioner,
-            'respondent': respondent,
-            'last_date': last_date,
-            'court_no': court_no,
-            'orders': {
-                'link': [order['link'] for order in orders_details_list],
-                'order_dates': [order['date'] for order in orders_details_list]
-            }
-        }
-        
-        # Step 6: Generate a PDF report with all the data, passing the correct temp directory.
-        pdf_file_path = generate_pdf(case_data, save_to_disk=True, temp_dir=pdf_temp_dir)
-        filename = os.path.basename(pdf_file_path)
-
-        # Step 7: Return the extracted data and the PDF download URL to the frontend.
-        response_data = {
-            'case_details': {
-                'petitioner': petitioner,
-                'respondent': respondent,
-                'last_date': last_date,
-                'court_no': court_no,
-                'orders_count': len(orders_details_list)
-            },
-            'orders_details': orders_details_list,
-            'download_url': f'/download/{filename}'
-        }
-        return jsonify(response_data), 200
+        with span('search'):
+            return jsonify(run_search_pipeline(case_type, case_number, year)), 200
 
+    except SiteUnavailable as e:
+        logger.warning("Search for %s %s of %s turned away: %s", case_type, case_number, year, e)
+        return _unavailable('The court website is not responding', e.retry_after)
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
+@app.route("/jobs", methods=['POST'])
+def submit_job():
+    """
+    This route queues a search in the background and returns its job id right away.
+    Identical searches that are still running share one job.
+    """
+    case_type, case_number, year = _read_search_form()
+
+    invalid = _invalid_search(case_type, case_number, year)
+    if invalid:
+        return invalid
+
+    try:
+        job_id = job_queue.submit(
+            case_key(case_type, case_number, year),
+            {'case_type': case_type, 'case_number': case_number, 'year': year},
+        )
+    except Overloaded as e:
+        return _unavailable(str(e), shed_retry_after)
+    logger.info("Queued job %s for %s %s of %s", job_id, case_type, case_number, year)
+    return jsonify({
+        'job_id': job_id,
+        'status_url': f'/jobs/{job_id}',
+        'events_url': f'/jobs/{job_id}/events',
+    }), 202
+
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """
+    This route returns the status, step progress and, once done, the result of a job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job), 200
+
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """
+    This route streams a job's progress as server-sent events until it finishes.
+    """
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def generate():
+        last_update = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                return
+            if job['updated'] != last_update:
+                last_update = job['updated']
+                yield f"data: {json.dumps(job)}\n\n"
+            if job['status'] not in ('queued', 'running'):
+                return
+            time.sleep(job_event_interval)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+
+@app.route("/search/refresh", methods=['POST'])
+@_shed_load
+def refresh():
+    """
+    This route re-scrapes a case, bypassing the result cache, and returns only the orders
+    that are new since the case was last checked. The PDF report is re-rendered only when
+    the case data changed.
+    """
+    case_type, case_number, year = _read_search_form()
+
+    invalid = _invalid_search(case_type, case_number, year)
+    if invalid:
+        return invalid
+
+    logger.info("Received refresh request for %s %s of %s", case_type, case_number, year)
+
+    try:
+        key = case_key(case_type, case_number, year)
+        first_check = order_index.last_checked(key) is None
+        result = search_case(case_type, case_number, year, with_filing_date=False)
+        case_cache.put(key, result)
+
+        new_orders = order_index.update(key, result['orders'])
+
+        # The report is only rendered when the case data differs from a stored report.
+        case_data = build_case_data(case_type, case_number, year, _with_filing_date(key, result))
+        _store_case(case_data)
+        download_url = _deliver_report(case_data)
+
+        return jsonify({
+            'first_check': first_check,
+            'changed': bool(new_orders),
+            'new_orders': new_orders,
+            'orders_count': len(result['orders']),
+            'download_url': download_url
+        }), 200
+
+    except SiteUnavailable as e:
+        logger.warning("Request turned away: %s", e)
+        return _unavailable('The court website is not responding', e.retry_after)
+    except Exception as e:
+        logger.error("An error occurred: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route("/orders/download", methods=['POST'])
+@_shed_load
+def download_orders():
+    """
+    This route downloads every order document of a case into the local order store and
+    returns a local link for each one. Documents already stored are not fetched again.
+    """
+    case_type, case_number, year = _read_search_form()
+
+    invalid = _invalid_search(case_type, case_number, year)
+    if invalid:
+        return invalid
+
+    logger.info("Received order download request for %s %s of %s", case_type, case_number, year)
+
+    try:
+        result = case_cache.get_or_fetch(
+            case_key(case_type, case_number, year),
+            lambda: search_case(case_type, case_number, year, with_filing_date=False),
+        )
+        hashes = order_downloader.download_all([order['link'] for order in result['orders']])
+
+        orders = []
+        for order in result['orders']:
+            sha256 = hashes.get(order['link'])
+            orders.append({
+                'date': order['date'],
+                'link': order['link'],
+                'document_url': f'/orders/{sha256}' if sha256 else None,
+            })
+        return jsonify({
+            'orders': orders,
+            'failed': sum(1 for order in orders if order['document_url'] is None),
+        }), 200
+
+    except SiteUnavailable as e:
+        logger.warning("Request turned away: %s", e)
+        return _unavailable('The court website is not responding', e.retry_after)
+    except Exception as e:
+        logger.error("An error occurred: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route("/bundle", methods=['POST'])
+@_shed_load
+def case_bundle():
+    """
+    This route builds the full case bundle: the summary report followed by every order
+    document, with a bookmark per order date. The bundle is downloaded through /download.
+    """
+    case_type, case_number, year = _read_search_form()
+
+    invalid = _invalid_search(case_type, case_number, year)
+    if invalid:
+        return invalid
+
+    logger.info("Received bundle request for %s %s of %s", case_type, case_number, year)
+
+    try:
+        key = case_key(case_type, case_number, year)
+        result = _with_filing_date(key, case_cache.get_or_fetch(
+            key, lambda: search_case(case_type, case_number, year, with_filing_date=False),
+        ))
+        summary_path = report_store.get_or_render(
+            build_case_data(case_type, case_number, year, result), generate_pdf
+        )
+        bundle_path = summary_path[:-len('.pdf')] + BUNDLE_SUFFIX
+
+        if os.path.exists(bundle_path):
+            os.utime(bundle_path)
+        else:
+            hashes = order_downloader.download_all([order['link'] for order in result['orders']])
+            documents = [
+                (f"Order {index} - {order['date']}", order_store.object_path(hashes[order['link']]))
+                for index, order in enumerate(result['orders'], 1)
+                if hashes.get(order['link'])
+            ]
+            if len(documents) < len(result['orders']):
+                # Leave it unbuilt so a later request can retry the missing documents
+                return jsonify({'error': 'Some order documents could not be downloaded.'}), 502
+            try:
+                build_bundle(summary_path, documents, bundle_path, batch_size=bundle_batch_size)
+            except UnreadableDocuments as e:
+                # Nothing is cached, and the documents are downloaded again by the next request
+                unreadable = {path for _, path in e.orders}
+                skipped = [
+                    {'title': title, 'link': order['link']}
+                    for (title, path), order in zip(documents, result['orders']) if path in unreadable
+                ]
+                for order in skipped:
+                    order_store.forget(order['link'])
+                return jsonify({'error': 'Some order documents could not be read.', 'unreadable_orders': skipped}), 502
+            report_store.evict()
+
+        return jsonify({
+            'orders_count': len(result['orders']),
+            'download_url': f'/download/{os.path.basename(bundle_path)}'
+        }), 200
+
+    except SiteUnavailable as e:
+        logger.warning("Request turned away: %s", e)
+        return _unavailable('The court website is not responding', e.retry_after)
+    except Exception as e:
+        logger.error("An error occurred: %s", e)
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/orders/<sha256>')
+def order_document(sha256):
+    """
+    This route serves a downloaded order document by its content hash.
+    """
+    if not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        return jsonify({'error': 'Invalid document id'}), 404
+    path = order_store.object_path(sha256)
+    if not os.path.exists(path):
+        return jsonify({'error': 'Unknown document'}), 404
+    return send_file(path, mimetype='application/pdf', download_name=f'{sha256}.pdf')
+
+
+def _read_case_list():
+    """
+    Reads a CSV or JSONL list of cases from the request body.
+
+    Returns:
+        tuple: (cases, None), or (None, error response) if the list is invalid or empty.
+    """
+    content_type = request.content_type or ''
+    fmt = 'jsonl' if 'json' in content_type else 'csv' if 'csv' in content_type else None
+    try:
+        cases = parse_cases(request.get_data(as_text=True), fmt)
+    except (ValueError, IndexError) as e:
+        return None, (jsonify({'error': f'Invalid case list: {e}'}), 400)
+    if not cases:
+        return None, (jsonify({'error': 'No cases given'}), 400)
+    return cases, None
+
+
+@app.route("/search/batch", methods=['POST'])
+@_shed_load
+def search_batch():
+    """
+    This route takes a CSV or JSONL list of cases in the request body and streams back
+    one NDJSON line per case as each lookup finishes.
+    Pass ?checkpoint=<name> to resume an interrupted batch; cases completed in an
+    earlier run with the same name are skipped.
+    """
+    cases, error = _read_case_list()
+    if error:
+        return error
+
+    checkpoint = None
+    checkpoint_name = request.args.get('checkpoint')
+    if checkpoint_name:
+        if not re.fullmatch(r'[A-Za-z0-9_-]{1,64}', checkpoint_name):
+            return jsonify({'error': 'Invalid checkpoint name'}), 400
+        checkpoint = Checkpoint(os.path.join(batch_checkpoint_dir, f'{checkpoint_name}.ckpt'))
+
+    logger.info("Received batch search request for %d cases", len(cases))
+
+    def generate():
+        try:
+            for record in run_batch(cases, _batch_lookup, batch_workers, checkpoint):
+                yield json.dumps(record) + '\n'
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route("/export", methods=['POST'])
+@_shed_load
+def export_cases():
+    """
+    This route takes a CSV or JSONL list of cases in the request body, like /search/batch,
+    and returns their case and order data as ?format=json|ndjson|csv|parquet|arrow|ics.
+    No PDF is rendered. Text formats are streamed as the lookups finish; Parquet and
+    Arrow are written to a temporary file first and fall back to CSV without pyarrow.
+    Cases whose lookup fails are left out.
+    """
+    try:
+        fmt = resolve_format(request.args.get('format', 'json'))
+    except ValueError:
+        return jsonify({'error': f"Unknown format, expected one of {', '.join(FORMATS)}"}), 400
+
+    cases, error = _read_case_list()
+    if error:
+        return error
+
+    logger.info("Received export request for %d cases as %s", len(cases), fmt)
+
+    def records():
+        for record in run_batch(cases, _batch_lookup, batch_workers):
+            if record['status'] != 'ok':
+                logger.warning("Leaving %s %s of %s out of the export: %s",
+                               record['case_type'], record['case_number'], record['year'], record['error'])
+            yield record
+
+    download_name = f'cases.{fmt}'
+    if fmt in COLUMNAR_FORMATS:
+        fd, path = tempfile.mkstemp(suffix=f'.{fmt}', dir=export_temp_dir)
+        os.close(fd)
+        try:
+            write_columnar(iter_case_data(records()), path, fmt)
+        except Exception:
+            os.remove(path)
+            raise
+
+        def generate():
+            try:
+                yield from stream_file(path)
+            finally:
+                os.remove(path)
+    else:
+        def generate():
+            yield from TEXT_WRITERS[fmt](iter_case_data(records()))
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=CONTENT_TYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{download_name}"'},
+    )
+
+
+def _parse_day(value: str | None) -> str | None:
+    """Validates a YYYY-MM-DD query parameter. Raises ValueError for anything else."""
+    if not value:
+        return None
+    return date.fromisoformat(value).isoformat()
+
+
+@app.route('/cases')
+def query_cases():
+    """
+    This route answers queries over the stored cases without any scraping.
+
+    Query parameters (all optional, combined with AND):
+        court: Court number, e.g. 12.
+        from, to: Hearing date range, as YYYY-MM-DD.
+        days: Hearings from today up to this many days ahead, instead of from/to.
+        party: Words of a party name, matched as prefixes; role=petitioner|respondent
+               restricts it to one side.
+        limit, offset: Paging.
+    """
+    args = request.args
+    try:
+        date_from = _parse_day(args.get('from'))
+        date_to = _parse_day(args.get('to'))
+        if args.get('days'):
+            today = date.today()
+            date_from = today.isoformat()
+            date_to = (today + timedelta(days=int(args['days']))).isoformat()
+        limit = int(args.get('limit', 100))
+        offset = int(args.get('offset', 0))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {e}'}), 400
+
+    role = args.get('role') or None
+    if role is not None and role not in PARTY_ROLES:
+        return jsonify({'error': f"role must be one of {', '.join(PARTY_ROLES)}"}), 400
+
+    start = time.perf_counter()
+    cases = case_db.find(court=args.get('court') or None, date_from=date_from, date_to=date_to,
+                         party=args.get('party'), role=role, limit=limit, offset=offset)
+    return jsonify({
+        'cases': cases,
+        'count': len(cases),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+    }), 200
+
+
+@app.route('/cases/detail')
+def case_detail():
+    """
+    This route returns one stored case with its orders, given caseType, caseNumber and year.
+    """
+    case = case_db.get(request.args.get('caseType', ''), request.args.get('caseNumber', ''),
+                       request.args.get('year', ''))
+    if case is None:
+        return jsonify({'error': 'Case not in the database'}), 404
+    return jsonify(case), 200
+
+
+@app.route('/schedule', methods=['GET', 'POST', 'DELETE'])
+def schedule():
+    """
+    This route manages the cases the scheduler re-crawls.
+    POST a CSV or JSONL list of cases to track them, DELETE one to stop tracking them,
+    or GET the tracked cases in the order they are due (?limit=&offset=). A POST with
+    any case the catalogue rejects tracks none of them.
+    """
+    if request.method == 'GET':
+        try:
+            limit = int(request.args.get('limit', 100))
+            offset = int(request.args.get('offset', 0))
+        except ValueError as e:
+            return jsonify({'error': f'Invalid query: {e}'}), 400
+        return jsonify({'cases': scheduler.tracked(limit, offset)}), 200
+
+    cases, error = _read_case_list()
+    if error:
+        return error
+
+    if request.method == 'POST':
+        # A tracked case is re-crawled again and again, so check it once here
+        rejected = []
+        for case in cases:
+            error = catalogue.validate(case['case_type'], case['case_number'], case['year'])
+            if error:
+                rejected.append({**case, 'error': error})
+        if rejected:
+            return jsonify({'error': 'Some cases are invalid, so none were tracked', 'rejected': rejected}), 400
+
+    changed = 0
+    for case in cases:
+        # Spelled as the case-status form spells it, so 'w.p. (c)' and 'W.P.(C)' are one case
+        case_type = catalogue.case_type_label(case['case_type']) or case['case_type']
+        if request.method == 'POST':
+            known = case_db.get(case_type, case['case_number'], case['year'])
+            changed += scheduler.track(case_type, case['case_number'], case['year'],
+                                       hearing_date=known['hearing_date'] if known else None)
+        else:
+            changed += scheduler.untrack(case_type, case['case_number'], case['year'])
+
+    if request.method == 'POST':
+        return jsonify({'tracked': changed, 'already_tracked': len(cases) - changed}), 200
+    return jsonify({'untracked': changed, 'not_tracked': len(cases) - changed}), 200
+
+
+@app.route('/schedule/status')
+def schedule_status():
+    """
+    This route returns the scheduler's queue depth (tracked cases that are due),
+    crawls in flight and throughput.
+    """
+    return jsonify(scheduler.stats()), 200
+
+
+@app.route('/cache/stats')
+def cache_stats():
+    """
+    This route returns the counters of the case result and filing date caches, the
+    report store and the coalescing of identical concurrent searches.
+    """
+    return jsonify({
+        'cases': case_cache.stats(),
+        'filing_dates': filing_date_cache.stats(),
+        'reports': report_store.stats(),
+        'report_buffer': report_buffer.stats(),
+        'coalescing': search_flight.stats(),
+        'order_documents': {**order_store.stats(), **order_downloader.stats()},
+        'case_database': case_db.stats(),
+    })
+
+
+@app.route('/catalogue')
+def catalogue_options():
+    """
+    This route returns the case types and years the search form accepts.
+    """
+    return jsonify({
+        'case_types': catalogue.case_types,
+        'years': catalogue.year_options(),
+        'fetched_at': catalogue.fetched_at,
+    }), 200
+
+
+@app.route('/catalogue/case-types')
+def case_type_suggestions():
+    """
+    This route autocompletes a case type: ?q= is matched against the case types,
+    ignoring case, spaces and punctuation, with prefix matches first.
+    """
+    limit = request.args.get('limit', 20, type=int)
+    return jsonify({'case_types': catalogue.suggest(request.args.get('q', ''), max(1, min(limit, 100)))}), 200
+
+
+@app.route('/site/status')
+def site_status():
+    """
+    This route returns, per court host, the circuit breaker state, the current request
+    rate of the adaptive limiter, the average latency and the request counters.
+    """
+    return jsonify(site_limiter.stats()), 200
+
+
+@app.route('/metrics')
+def metrics():
+    """
+    This route returns the per-stage latency histograms, in-flight gauges and error
+    counters, plus the cache, pool and queue counters, in the Prometheus text format.
+    """
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/download/<filename>')
 def download_file(filename):
     """
     This route serves the generated PDF file for download.
+    Bundles can run to hundreds of megabytes, so they are streamed in chunks.
+
+    File names carry the content hash of the report, so the name is the ETag and
+    repeat downloads are answered with 304 before the file is looked at.
+    """
+    etag = os.path.splitext(filename)[0]
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+
+    if filename.endswith(BUNDLE_SUFFIX):
+        path = safe_join(pdf_temp_dir, filename)
+        if path is None or not os.path.isfile(path):
+            return jsonify({'error': 'File not found'}), 404
+        response = Response(
+            stream_file(path),
+            mimetype='application/pdf',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+        )
+    else:
+        response = send_from_directory(pdf_temp_dir, filename, as_attachment=True, etag=False)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+
+@app.route('/reports/<token>')
+def download_report(token):
+    """
+    This route serves a report rendered in memory, by the token /search returned for it.
+    """
+    etag = report_buffer.etag(token)
+    if etag is None:
+        return jsonify({'error': 'Report not found or expired'}), 404
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+
+    report = report_buffer.get(token)
+    if report is None:
+        return jsonify({'error': 'Report not found or expired'}), 404
+    etag, filename, content = report
+    response = Response(
+        content,
+        mimetype='application/pdf',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+# Whether this process runs the scheduler. With several worker processes only one
+# of them does, the one holding a lock next to the schedule file.
+scheduler_enabled = env('scheduler_enabled', True)
+
+# On shutdown, new scrapes and jobs are turned away, jobs still waiting for a worker are
+# failed, and admitted scrapes and running jobs get this many seconds to finish.
+drain_timeout = env('drain_timeout', 60.0)
+
+_started = False
+_start_lock = threading.Lock()
+_scheduler_lock_file = None
+
+
+def _hold_scheduler_lock() -> bool:
+    global _scheduler_lock_file
+    if fcntl is None:
+        return True
+    lock_file = open(scheduler_path + '.lock', 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    _scheduler_lock_file = lock_file
+    return True
+
+
+def _drain():
+    deadline = time.monotonic() + drain_timeout
+    in_flight = scrape_gate.stats()['in_flight']
+    if in_flight:
+        logger.info("Waiting up to %ss for %d scrape(s) to finish", drain_timeout, in_flight)
+    if not scrape_gate.drain(drain_timeout):
+        logger.warning("Shutting down with %d scrape(s) still running", scrape_gate.stats()['in_flight'])
+    if not job_queue.drain(max(0.0, deadline - time.monotonic())):
+        logger.warning("Shutting down with %d job(s) still running", job_queue.stats()['pending'])
+
+
+def create_app() -> Flask:
     """
-    return send_from_directory(pdf_temp_dir, filename, as_attachment=True)
+    Prepares this process to serve requests and returns the Flask app: configures logging,
+    starts the warm browsers and, in one process only, the scheduler, and drains admitted
+    scrapes at exit before the browsers are closed. Calling it again returns the same app.
+
+    Production servers load the app through it, e.g. gunicorn 'app:create_app()'.
+    """
+    global _started
+    with _start_lock:
+        if _started:
+            return app
+        logging.basicConfig(level=log_level, format='%(asctime)s %(process)d %(levelname)s %(name)s: %(message)s')
+        start_engine(browsers=browser_pool_size,
+                     contexts_per_browser=browser_contexts_per_browser,
+                     optional_contexts_per_browser=browser_optional_contexts_per_browser,
+                     max_pages=browser_max_pages)
+        if scheduler_enabled and _hold_scheduler_lock():
+            scheduler.start()
+        if catalogue_refresh:
+            catalogue.start()
+            atexit.register(catalogue.shutdown)
+        # Registered last so it runs first, while the browsers are still up.
+        atexit.register(_drain)
+        _started = True
+    return app
 
 
 # This block ensures the server runs only when the script is executed directly,
@@ -121,7 +1161,13 @@ if __name__ == "__main__":
     debug = True  # Enable debug mode for automatic reloading on code changes
     host = '0.0.0.0' # Listen on all public IPs
 
-    print(f"Starting server on {host}:{port} (debug={debug})")
-    
-    # Run the Flask development server
+    logging.basicConfig(level=log_level, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    logger.info("Starting server on %s:%s (debug=%s)", host, port, debug)
+
+    # With the reloader on, only the child process serves requests, so only
+    # that one needs warm browsers.
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        create_app()
+
+    # Run the Flask development server. For production, use serve.py.
     app.run(debug=debug, port=port, host=host)
@@ -0,0 +1,508 @@
+from playwright.async_api import async_playwright, Page
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+import threading
+from catalogue import get_catalogue
+from extractor import extract_details, extract_order_details_list, parse_filing_date
+from http_client import fetch_html, needs_javascript
+from metrics import record_error, span
+from ratelimit import CASE_STATUS_HOST, FILING_DATE_HOST, SiteUnavailable, get_site_limiter
+from readiness import (NoRecordsFound, SessionRejected, block_requests_async, clear_results_async,
+                       wait_for_case_results_async, wait_for_filing_date_async, wait_for_orders_async)
+from sessions import CASE_STATUS_FORM, FILING_DATE_FORM, Form, FormSession, SessionStats, run_form_search_async
+from sites import site_url
+
+logger = logging.getLogger(__name__)
+
+# Default engine settings
+DEFAULT_BROWSERS = 2
+DEFAULT_CONTEXTS_PER_BROWSER = 4
+DEFAULT_OPTIONAL_CONTEXTS_PER_BROWSER = 1
+DEFAULT_MAX_PAGES = 50
+
+
+class SearchError(Exception):
+    """Raised when a step of the search pipeline does not return usable data."""
+
+
+class _BrowserState:
+    """One running browser, its warm contexts, their form sessions and page counters."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.browser = None
+        self.contexts = []
+        self.form_sessions = []
+        self.pages_served = 0
+        self.in_flight = 0
+        self.lock = asyncio.Lock()
+
+
+class AsyncEngine:
+    """
+    Runs the async Playwright extractors on one event loop in a background thread.
+
+    The engine keeps `browsers` warm browsers with `contexts_per_browser` contexts each.
+    Every context is a slot: at most browsers * contexts_per_browser pages are open at
+    once, and any number of searches can be waiting on the loop without holding a thread.
+    Each context also keeps a FormSession per search form, so consecutive form searches
+    in a context skip loading the form.
+
+    Optional lookups, such as the filing date, take their slots from another
+    `optional_contexts_per_browser` contexts per browser, so they never hold up the
+    main search.
+
+    Args:
+        browsers (int): Number of browsers to keep running.
+        contexts_per_browser (int): Number of concurrent pages each browser serves.
+        optional_contexts_per_browser (int): Further contexts per browser kept for optional lookups.
+        max_pages (int): A browser is recycled after serving this many pages.
+        headless (bool): Run the browsers headless.
+    """
+
+    def __init__(self, browsers: int = DEFAULT_BROWSERS, contexts_per_browser: int = DEFAULT_CONTEXTS_PER_BROWSER,
+                 max_pages: int = DEFAULT_MAX_PAGES, headless: bool = True,
+                 optional_contexts_per_browser: int = DEFAULT_OPTIONAL_CONTEXTS_PER_BROWSER):
+        self.browsers = browsers
+        self.contexts_per_browser = contexts_per_browser
+        self.optional_contexts_per_browser = optional_contexts_per_browser
+        self.max_pages = max_pages
+        self.headless = headless
+        self.loop = None
+        self._thread = None
+        self._playwright = None
+        self._states = []
+        self._slots = None
+        self._optional_slots = None
+        self._lock = threading.Lock()
+        self.session_stats = SessionStats()
+        self.started = False
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, name="async-engine", daemon=True)
+            self._thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+            except Exception:
+                self.loop.call_soon_threadsafe(self.loop.stop)
+                self._thread.join(timeout=30)
+                raise
+            self.started = True
+            logger.info("Async engine started with %d browser(s) x %d context(s).", self.browsers, self.contexts_per_browser)
+
+    def shutdown(self):
+        with self._lock:
+            if not self.started:
+                return
+            try:
+                asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(timeout=60)
+            except Exception as e:
+                logger.error("Error shutting down async engine: %s", e)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=30)
+            self.started = False
+            logger.info("Async engine shut down.")
+
+    def run(self, coro, timeout: float | None = None):
+        """Runs a coroutine on the engine's loop from synchronous code and returns its result."""
+        if not self.started:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def _launch(self, state: _BrowserState):
+        with span('browser.launch'):
+            try:
+                # Try to launch a Chromium browser first
+                state.browser = await self._playwright.chromium.launch(headless=self.headless)
+            except Exception as e:
+                logger.warning("[%s] Error launching Chromium: %s", state.name, e)
+                # Fallback to Firefox if Chromium fails
+                state.browser = await self._playwright.firefox.launch(headless=self.headless)
+            contexts = self.contexts_per_browser + self.optional_contexts_per_browser
+            state.contexts = [await state.browser.new_context() for _ in range(contexts)]
+            for context in state.contexts:
+                await block_requests_async(context)
+        state.form_sessions = [{} for _ in state.contexts]
+        state.pages_served = 0
+
+    async def _relaunch(self, state: _BrowserState, reason: str):
+        logger.info("[%s] Recycling browser (%s).", state.name, reason)
+        try:
+            await state.browser.close()
+        except Exception as e:
+            logger.warning("[%s] Error closing browser: %s", state.name, e)
+        await self._launch(state)
+
+    async def _open(self):
+        self._playwright = await async_playwright().start()
+        self._slots = asyncio.Queue()
+        self._optional_slots = asyncio.Queue()
+        try:
+            for i in range(self.browsers):
+                state = _BrowserState(f"async-browser-{i}")
+                await self._launch(state)
+                self._states.append(state)
+                for context_index in range(len(state.contexts)):
+                    slots = self._slots if context_index < self.contexts_per_browser else self._optional_slots
+                    slots.put_nowait((state, context_index))
+        except Exception:
+            await self._close()
+            raise
+
+    async def _close(self):
+        for state in self._states:
+            if state.browser:
+                try:
+                    await state.browser.close()
+                except Exception as e:
+                    logger.warning("[%s] Error closing browser: %s", state.name, e)
+        self._states = []
+        await self._playwright.stop()
+
+    async def _check_browser(self, state: _BrowserState):
+        # Health check before handing out a page; the caller holds state.lock
+        if not state.browser.is_connected():
+            await self._relaunch(state, "browser disconnected")
+        elif state.pages_served >= self.max_pages and state.in_flight == 0:
+            await self._relaunch(state, f"served {state.pages_served} pages")
+
+    @asynccontextmanager
+    async def slot(self, optional: bool = False):
+        """
+        Leases a context slot, relaunching its browser first if needed, and yields it as
+        (browser state, context index). The slot is returned afterwards. Optional
+        lookups pass optional=True to take one of the slots kept for them.
+        """
+        slots = self._optional_slots if optional else self._slots
+        with span('browser.lease'):
+            state, context_index = await slots.get()
+        try:
+            async with state.lock:
+                await self._check_browser(state)
+                state.in_flight += 1
+            try:
+                yield state, context_index
+            finally:
+                async with state.lock:
+                    state.in_flight -= 1
+                    state.pages_served += 1
+        finally:
+            slots.put_nowait((state, context_index))
+
+    @asynccontextmanager
+    async def page(self, slot: tuple | None = None):
+        """Yields a fresh page in the given slot, or in one leased for the duration."""
+        if slot is None:
+            async with self.slot() as slot, self.page(slot) as page:
+                yield page
+            return
+        state, context_index = slot
+        page = await state.contexts[context_index].new_page()
+        try:
+            yield page
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def run_form(self, form: Form, search, *args, slot: tuple | None = None):
+        """
+        Runs search(page, *args) on the page the slot's context keeps on form, loading
+        the form first if needed. Leases a slot for the duration if none is given. See
+        sessions.run_form_search.
+        """
+        if slot is None:
+            async with self.slot() as slot:
+                return await self.run_form(form, search, *args, slot=slot)
+        state, context_index = slot
+        sessions = state.form_sessions[context_index]
+        if form.name not in sessions:
+            sessions[form.name] = FormSession(form, self.session_stats)
+        return await run_form_search_async(sessions[form.name], state.contexts[context_index], search, *args)
+
+    def stats(self) -> dict:
+        return {
+            'browsers': self.browsers,
+            'free_slots': self._slots.qsize() if self._slots else 0,
+            'free_optional_slots': self._optional_slots.qsize() if self._optional_slots else 0,
+            'pages_served': {state.name: state.pages_served for state in self._states},
+            'form_sessions': self.session_stats.stats(),
+        }
+
+
+async def _case_search_page(page: Page, case_type: str, case_number: str, year: str) -> str:
+    # The page already shows the case-status form, loaded by the context's form session
+    await clear_results_async(page)
+
+    captcha_text = await page.locator('#captcha-code').text_content()
+    if not captcha_text:
+        raise SessionRejected("Could not retrieve captcha text.")
+
+    # Fill the input fields and submit
+    with span('case_search.form'):
+        await page.locator('#case_type').select_option(label=case_type)
+        await page.locator('#case_number').fill(case_number)
+        await page.locator('#case_year').select_option(year)
+        await page.locator('#captchaInput').fill(captcha_text)
+        await page.locator('#search').click()
+
+    with span('case_search.wait'):
+        await wait_for_case_results_async(page)
+    with span('case_search.content'):
+        return await page.content()
+
+
+async def _order_search_page(page: Page, court_url: str) -> str | None:
+    with span('orders_page.goto'):
+        await page.goto(court_url, wait_until='domcontentloaded')
+    with span('orders_page.wait'):
+        await wait_for_orders_async(page)
+    with span('orders_page.content'):
+        return await page.content()
+
+
+async def _filing_date_page(page: Page, case_type: str, case_number: str, year: str) -> str:
+    # The page already shows the case-wise form, loaded by the context's form session
+    await clear_results_async(page)
+
+    with span('filing_date.form'):
+        # Fill form fields
+        await page.select_option('#ctype', case_type)
+        await page.fill('#regno', case_number)
+        await page.select_option('#regyr', year)
+
+        # Get captcha text directly from the element
+        captcha_text = (await page.inner_text('#cap')).strip()
+        await page.fill('input[name="captcha_code"]', captcha_text)
+        await page.click('input[name="Submit"]')
+
+    # The results are rendered in place, so wait for the results table instead of a navigation
+    with span('filing_date.wait'):
+        await wait_for_filing_date_async(page)
+    with span('filing_date.content'):
+        return await page.content()
+
+
+async def _run_page(engine: AsyncEngine, host: str, fn, *args, form: Form | None = None,
+                    optional: bool = False) -> str | None:
+    """
+    Async version of extractor._run_page. Unlike it, lets NoRecordsFound and
+    SiteUnavailable through to the caller. Optional lookups run in the engine's
+    optional slots.
+    """
+    page_html = None
+    no_records = None
+    try:
+        async with engine.slot(optional) as slot:
+            # Timed only once the slot is ours, so queueing for it is not taken for site latency
+            async with get_site_limiter().request_async(host) as outcome:
+                try:
+                    if form is not None:
+                        page_html = await engine.run_form(form, fn, *args, slot=slot)
+                    else:
+                        async with engine.page(slot) as page:
+                            page_html = await fn(page, *args)
+                except NoRecordsFound as e:
+                    # The site answered; there is just no such case
+                    no_records = e
+                except Exception as e:
+                    logger.error("An error occurred during automation: %s", e)
+                    outcome.failed()
+                else:
+                    if page_html is None:
+                        outcome.failed()
+    except SiteUnavailable:
+        raise
+    except Exception as e:
+        logger.error("Could not get a browser ready: %s", e)
+        return None
+    if no_records is not None:
+        raise no_records
+    return page_html
+
+
+async def submit_case_search_async(engine: AsyncEngine, case_type: str, case_number: str, year: str) -> str | None:
+    """
+    Async version of extractor.submit_case_search. Unlike it, raises NoRecordsFound
+    when the site reports that no case matched, so the caller can say so, and
+    SiteUnavailable when the site's circuit is open.
+    """
+    return await _run_page(engine, CASE_STATUS_HOST, _case_search_page, case_type, case_number, year,
+                           form=CASE_STATUS_FORM)
+
+
+async def submit_order_search_async(engine: AsyncEngine, court_url: str) -> str | None:
+    """Async version of extractor.submit_order_search. Raises SiteUnavailable like submit_case_search_async."""
+    # Links on the case-status page point at the real site
+    court_url = site_url(court_url)
+    # Plain HTTP first; the browser is only a fallback for JavaScript-rendered pages
+    with span('orders_page.http'):
+        async with get_site_limiter().request_async(CASE_STATUS_HOST) as outcome:
+            page_html = await asyncio.to_thread(fetch_html, court_url)
+            if page_html is None:
+                outcome.failed()
+    if page_html and not needs_javascript(page_html):
+        return page_html
+    return await _run_page(engine, CASE_STATUS_HOST, _order_search_page, court_url)
+
+
+async def get_filing_date_async(engine: AsyncEngine, case_type: str, case_number: str, year: str) -> str | None:
+    """Async version of extractor.get_filing_date."""
+    # The case-wise form lists case types by its own codes, known once the catalogue is
+    # refreshed. Until then the case-status label is sent, which the form also accepts.
+    filing_case_type = get_catalogue().filing_code(case_type) or case_type
+    if not engine.optional_contexts_per_browser:
+        logger.info("Skipping the filing date: the engine keeps no contexts for optional lookups")
+        return None
+    with span('filing_date'):
+        try:
+            # Optional, so it runs in its own slots and never holds up the case search
+            page_html = await _run_page(engine, FILING_DATE_HOST, _filing_date_page, filing_case_type, case_number,
+                                        year, form=FILING_DATE_FORM, optional=True)
+        except NoRecordsFound as e:
+            logger.info("%s", e)
+            page_html = None
+        except SiteUnavailable as e:
+            logger.warning("Skipping the filing date: %s", e)
+            page_html = None
+        if not page_html:
+            record_error('filing_date')
+            return None
+        # Parsing runs off the event loop so it does not stall the other searches on it
+        return await asyncio.to_thread(parse_filing_date, page_html)
+
+
+async def _case_and_orders(engine: AsyncEngine, case_type: str, case_number: str, year: str,
+                           progress=None) -> dict:
+    progress = progress or (lambda step: None)
+
+    # Step 1: Submit the main case search and get the HTML of the results page.
+    progress('case_search')
+    with span('case_search'):
+        try:
+            search_results_html = await submit_case_search_async(engine, case_type, case_number, year)
+        except NoRecordsFound:
+            raise SearchError('No case found with this type, number and year.')
+        if not search_results_html:
+            raise SearchError('Failed to retrieve search results.')
+
+    # Step 2: Extract the case details and the URL for the order details page.
+    # Parsing runs off the event loop so it does not stall the other searches on it
+    progress('case_details')
+    details = await asyncio.to_thread(extract_details, search_results_html)
+    if not details or not details[0]:
+        raise SearchError('Failed to extract order URL from search results.')
+    order_url, petitioner, respondent, next_date, last_date, court_no = details
+
+    # Step 3: Submit the order search and get the HTML of the order details page.
+    progress('orders_page')
+    with span('orders_page'):
+        orders_html = await submit_order_search_async(engine, order_url)
+        if not orders_html:
+            raise SearchError('Failed to retrieve order details.')
+
+    # Step 4: Extract the individual order links and dates from the orders HTML.
+    progress('orders_list')
+    orders = await asyncio.to_thread(extract_order_details_list, orders_html)
+    return {
+        'petitioner': petitioner,
+        'respondent': respondent,
+        'next_date': next_date,
+        'last_date': last_date,
+        'court_no': court_no,
+        'orders': orders,
+    }
+
+
+async def search_case_async(engine: AsyncEngine, case_type: str, case_number: str, year: str,
+                            with_filing_date: bool = True, progress=None) -> dict:
+    """
+    Runs the case-status/orders chain and, optionally, the filing-date lookup at the same time.
+    If given, progress(step_name) is called as each step of the chain starts.
+
+    Returns:
+        dict: petitioner, respondent, next_date, last_date, court_no, orders (list of dicts with 'date'
+              and 'link') and filing_date (None when not requested or not found).
+
+    Raises:
+        SearchError: If the case-status or orders step fails.
+        SiteUnavailable: If delhihighcourt.nic.in is failing and its circuit is open.
+    """
+    if not with_filing_date:
+        result = await _case_and_orders(engine, case_type, case_number, year, progress)
+        result['filing_date'] = None
+        return result
+
+    result, filing_date = await asyncio.gather(
+        _case_and_orders(engine, case_type, case_number, year, progress),
+        get_filing_date_async(engine, case_type, case_number, year),
+    )
+    result['filing_date'] = filing_date
+    return result
+
+
+# Shared engine used by the Flask app
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> AsyncEngine:
+    """Returns the shared async engine, starting it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncEngine()
+    _engine.start()
+    return _engine
+
+
+def start_engine(**kwargs) -> AsyncEngine:
+    """Creates and starts the shared async engine with the given settings."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncEngine(**kwargs)
+    _engine.start()
+    return _engine
+
+
+def engine_stats() -> dict:
+    """Returns the stats of the shared engine without starting it."""
+    engine = _engine
+    if engine is None or not engine.started:
+        return {'running': False}
+    return {'running': True, **engine.stats()}
+
+
+def shutdown_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.shutdown()
+            _engine = None
+
+
+def start_filing_date(case_type: str, case_number: str, year: str) -> Future:
+    """
+    Starts get_filing_date_async on the shared engine without waiting for it, so the
+    filing date can be looked up next to other work.
+
+    Returns:
+        Future: Resolves to the filing date, or None if it could not be found.
+    """
+    engine = get_engine()
+    return asyncio.run_coroutine_threadsafe(get_filing_date_async(engine, case_type, case_number, year), engine.loop)
+
+
+def search_case(case_type: str, case_number: str, year: str, with_filing_date: bool = True,
+                progress=None) -> dict:
+    """Blocking wrapper around search_case_async for use from Flask request handlers."""
+    engine = get_engine()
+    return engine.run(search_case_async(engine, case_type, case_number, year, with_filing_date, progress))
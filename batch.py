@@ -0,0 +1,248 @@
+"""
+Batch case search.
+
+Runs many case lookups through a bounded worker pool with per-host rate limiting and
+yields one result record per case as soon as it finishes. Completed cases are written
+to a checkpoint file so an interrupted batch resumes where it stopped.
+
+Usage:
+    python batch.py cases.csv --output results.ndjson --checkpoint cases.ckpt
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+
+from async_extractor import search_case, shutdown_engine
+from cache import ResultCache, SQLiteBackend, case_key
+from catalogue import DEFAULT_PATH as CATALOGUE_PATH, Catalogue
+from ratelimit import CASE_STATUS_HOST, FILING_DATE_HOST, HostRateLimiter
+
+# Default batch settings
+DEFAULT_WORKERS = 4
+DEFAULT_REQUESTS_PER_MINUTE = 30
+
+CASE_FIELDS = ('case_type', 'case_number', 'year')
+
+
+def parse_cases(text: str, fmt: str | None = None) -> list:
+    """
+    Parses a list of cases from CSV or JSONL text.
+
+    CSV input may have a header naming case_type, case_number and year; without one the
+    columns are taken in that order. JSONL input has one object per line with those keys
+    (caseType/caseNumber/year, as sent by the web form, are accepted too).
+
+    Args:
+        text (str): The file content.
+        fmt (str | None): 'csv' or 'jsonl'. If None, it is guessed from the first line.
+
+    Returns:
+        list: A list of dicts with case_type, case_number and year.
+
+    Raises:
+        ValueError: If an entry is malformed or incomplete.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return []
+    if fmt is None:
+        fmt = 'jsonl' if lines[0].lstrip().startswith('{') else 'csv'
+
+    cases = []
+    if fmt == 'jsonl':
+        for line in lines:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError(f"Case entry is not an object: {line.strip()}")
+            cases.append({
+                'case_type': str(item.get('case_type', item.get('caseType', ''))).strip(),
+                'case_number': str(item.get('case_number', item.get('caseNumber', ''))).strip(),
+                'year': str(item.get('year', item.get('case_year', ''))).strip(),
+            })
+    elif fmt == 'csv':
+        rows = list(csv.reader(io.StringIO('\n'.join(lines))))
+        header = [column.strip().lower() for column in rows[0]]
+        if all(field in header for field in CASE_FIELDS):
+            indexes = [header.index(field) for field in CASE_FIELDS]
+            rows = rows[1:]
+        else:
+            indexes = [0, 1, 2]
+        for row in rows:
+            cases.append({field: row[index].strip() for field, index in zip(CASE_FIELDS, indexes)})
+    else:
+        raise ValueError(f"Unknown case list format '{fmt}'")
+
+    for case in cases:
+        if not all(case.values()):
+            raise ValueError(f"Incomplete case entry: {case}")
+    return cases
+
+
+class Checkpoint:
+    """Append-only file of the cache keys of cases that completed successfully."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self._done = {line.strip() for line in f if line.strip()}
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def done(self, key: str) -> bool:
+        return key in self._done
+
+    def mark(self, key: str):
+        with self._lock:
+            if key in self._done:
+                return
+            self._done.add(key)
+            self._file.write(key + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __len__(self):
+        return len(self._done)
+
+
+def make_lookup(cache: ResultCache | None, limiter: HostRateLimiter, with_filing_date: bool = False,
+                catalogue: Catalogue | None = None):
+    """
+    Builds the per-case lookup used by run_batch. Rate limit tokens are only taken when
+    the court sites are actually hit, so cached cases do not wait. With a catalogue,
+    cases it rejects fail without being scraped, and case types are spelled as the
+    court does.
+    """
+    def lookup(case_type: str, case_number: str, year: str) -> dict:
+        if catalogue is not None:
+            error = catalogue.validate(case_type, case_number, year)
+            if error:
+                raise ValueError(error)
+            case_type = catalogue.case_type_label(case_type) or case_type
+
+        def fetch():
+            # The case-status page and the orders page
+            limiter.acquire(CASE_STATUS_HOST)
+            limiter.acquire(CASE_STATUS_HOST)
+            if with_filing_date:
+                limiter.acquire(FILING_DATE_HOST)
+            return search_case(case_type, case_number, year, with_filing_date=with_filing_date)
+
+        if cache is None:
+            return fetch()
+        return cache.get_or_fetch(case_key(case_type, case_number, year), fetch)
+
+    return lookup
+
+
+def _run_one(lookup, case: dict) -> dict:
+    record = dict(case)
+    try:
+        record['result'] = lookup(case['case_type'], case['case_number'], case['year'])
+        record['status'] = 'ok'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+    return record
+
+
+def run_batch(cases: list, lookup, workers: int = DEFAULT_WORKERS, checkpoint: Checkpoint | None = None):
+    """
+    Looks up every case on a pool of `workers` threads and yields the result records in
+    the order they finish. At most 2 * workers cases are queued at a time. Cases already
+    in the checkpoint are skipped; successful ones are added to it.
+
+    Yields:
+        dict: case_type, case_number, year, status ('ok' or 'error') and either
+              result or error.
+    """
+    todo = iter([case for case in cases
+                 if checkpoint is None or not checkpoint.done(case_key(case['case_type'], case['case_number'], case['year']))])
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as executor:
+        pending = set()
+
+        def fill():
+            while len(pending) < workers * 2:
+                case = next(todo, None)
+                if case is None:
+                    return
+                pending.add(executor.submit(_run_one, lookup, case))
+
+        fill()
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending.discard(future)
+                record = future.result()
+                if checkpoint is not None and record['status'] == 'ok':
+                    checkpoint.mark(case_key(record['case_type'], record['case_number'], record['year']))
+                yield record
+            fill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Look up many Delhi High Court cases and write NDJSON results.')
+    parser.add_argument('input', help="CSV or JSONL file of case_type, case_number, year ('-' for stdin)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format (guessed if omitted)')
+    parser.add_argument('--output', '-o', help='NDJSON output file, appended to (default: stdout)')
+    parser.add_argument('--checkpoint', help='Checkpoint file used to resume an interrupted batch')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--rate', type=float, default=DEFAULT_REQUESTS_PER_MINUTE,
+                        help='Requests per minute allowed per court host')
+    parser.add_argument('--with-filing-date', action='store_true', help='Also look up the filing date')
+    parser.add_argument('--cache', default=os.path.join(tempfile.gettempdir(), 'case_search_cache.sqlite3'),
+                        help='SQLite result cache shared with the web app')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--catalogue', default=CATALOGUE_PATH,
+                        help='Case type catalogue the cases are checked against, shared with the web app')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+
+    if args.input == '-':
+        text = sys.stdin.read()
+    else:
+        with open(args.input, encoding='utf-8') as f:
+            text = f.read()
+    cases = parse_cases(text, args.format)
+
+    cache = None if args.no_cache else ResultCache(SQLiteBackend(args.cache))
+    lookup = make_lookup(cache, HostRateLimiter(args.rate), args.with_filing_date,
+                         Catalogue(args.catalogue))
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    out = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+
+    ok = errors = 0
+    try:
+        for record in run_batch(cases, lookup, args.workers, checkpoint):
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            if record['status'] == 'ok':
+                ok += 1
+            else:
+                errors += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if checkpoint is not None:
+            checkpoint.close()
+        shutdown_engine()
+
+    print(f"Batch finished: {ok} ok, {errors} failed, {len(cases) - ok - errors} skipped from checkpoint.",
+          file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
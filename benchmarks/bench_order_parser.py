@@ -0,0 +1,108 @@
+"""
+Compares the row-by-row order parser with the old two-pass implementation.
+
+Usage:
+    python benchmarks/bench_order_parser.py [--orders 10 100 1000 5000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from order_parser import available_backends, parse_orders  # noqa: E402
+
+
+def legacy_extract_order_details_list(result: str):
+    """The implementation extract_order_details_list had before the row parser."""
+    soup = BeautifulSoup(result, 'html.parser')
+    orders_list = []
+
+    all_text_content = soup.stripped_strings
+    dates = []
+    for text_string in all_text_content:
+        words = text_string.split()
+        for word in words:
+            if (len(word) == 10 and
+                word[2] == '/' and
+                word[5] == '/' and
+                word[:2].isdigit() and
+                word[3:5].isdigit() and
+                word[6:].isdigit()):
+                dates.append(word)
+
+    result_urls = soup.find_all('a', href=lambda href: href and href.startswith("https://delhihighcourt.nic.in/app/showlogo/"))
+
+    if len(dates) == len(result_urls):
+        for i in range(len(dates)):
+            orders_list.append({
+                'date': dates[i],
+                'link': result_urls[i].get('href')
+            })
+
+    return orders_list
+
+
+def build_orders_page(count: int) -> str:
+    """Builds an orders page shaped like case-type-status-details with `count` orders."""
+    rows = []
+    for i in range(count, 0, -1):
+        day = (i % 28) + 1
+        month = (i % 12) + 1
+        year = 2000 + (i % 25)
+        rows.append(
+            f'<tr><td class="sorting_1">{i}</td>'
+            f'<td><a href="https://delhihighcourt.nic.in/app/showlogo/{i:08d}/{year}" target="_blank">'
+            f'W.P.(C) 4352/2025</a></td>'
+            f'<td>{day:02d}/{month:02d}/{year}</td>'
+            f'<td><span class="text-muted">Corrigendum</span></td></tr>'
+        )
+    return (
+        '<html><head><title>Case Status</title>'
+        '<script src="/js/jquery.min.js"></script><link rel="stylesheet" href="/css/app.css"></head>'
+        '<body><nav><ul>' + ''.join(f'<li><a href="/app/page/{i}">Menu {i}</a></li>' for i in range(60)) +
+        '</ul></nav><div class="container"><h4>Orders</h4>'
+        '<table id="caseTable" class="table"><thead><tr><th>S.No.</th><th>Case No/Order Link</th>'
+        '<th>Date of Order</th><th>Corrigendum</th></tr></thead><tbody>' + ''.join(rows) +
+        '</tbody></table></div><footer>Content owned by Delhi High Court</footer></body></html>'
+    )
+
+
+def time_call(fn, html: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orders', type=int, nargs='+', default=[10, 100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    candidates = [('legacy', legacy_extract_order_details_list)]
+    for backend in reversed(available_backends()):
+        candidates.append((backend, lambda html, backend=backend: parse_orders(html, backend)))
+
+    print(f"{'orders':>8} {'size':>9} " + ' '.join(f"{name:>12}" for name, _ in candidates) + '   speedup')
+    for count in args.orders:
+        html = build_orders_page(count)
+        expected = legacy_extract_order_details_list(html)
+        timings = []
+        for name, fn in candidates:
+            if fn(html) != expected:
+                raise SystemExit(f"{name} returned different orders for {count} orders")
+            timings.append(time_call(fn, html, args.repeat))
+        size = f"{len(html) / 1024:.0f} KiB"
+        cells = ' '.join(f"{t * 1000:>10.1f}ms" for t in timings)
+        print(f"{count:>8} {size:>9} {cells}   {timings[0] / min(timings[1:]):>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
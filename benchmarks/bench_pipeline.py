@@ -0,0 +1,234 @@
+"""
+Offline benchmarks of the search pipeline, with a regression check against saved baselines.
+
+The court sites are replaced by the local stand-in in court_site.py, which serves
+the recorded pages in benchmarks/fixtures. Orders pages of 10 to 2,000 orders are
+made from the recorded rows. For each benchmark the suite reports throughput and
+p50/p95/p99 latency for:
+
+    extract_details             parsing the case-status results page
+    parse_filing_date           parsing the dhcmisc.nic.in filing-date page
+    extract_order_details_list  parsing the orders page
+    pdf_generator_v2            rendering the report into memory
+    /search                     the whole Flask route on the async engine, driving headless
+                                browsers against the stand-in; needs Playwright's browsers
+
+A benchmark regresses when its p50 or p95 is more than --tolerance above the saved
+baseline, and the exit status is then 1. Baselines depend on the machine: record
+them with --save-baseline on the machine that runs the check.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--only search] [--save-baseline] [--tolerance 0.5]
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from court_site import CASE_STATUS_PATH, FILING_DATE_PATH, CourtSite  # noqa: E402
+from export import build_case_data  # noqa: E402
+from extractor import extract_details, extract_order_details_list, parse_filing_date, pdf_generator_v2  # noqa: E402
+from http_client import fetch_html  # noqa: E402
+
+ORDER_COUNTS = (10, 100, 500, 1000, 2000)
+SEARCH_ORDER_COUNTS = (10, 1000)
+
+# The case every /search asks for, and the filing date the stand-in reports for it
+SEARCH_CASE_TYPE = 'W.P.(C)'
+SEARCH_YEAR = '2025'
+FIXTURE_FILING_DATE = '04/03/2025'
+
+# Requests per minute the site limiter allows the stand-in
+SITE_REQUESTS_PER_MINUTE = 60000.0
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_TOLERANCE = 0.5
+
+# Every benchmark runs at least MIN_ITERATIONS times and then until its time budget
+# (seconds) is spent, up to MAX_ITERATIONS, after WARMUP untimed runs.
+MIN_ITERATIONS = 20
+MAX_ITERATIONS = 1000
+DEFAULT_BUDGET = 2.0
+WARMUP = 2
+
+
+def percentile(samples: list, q: float) -> float:
+    """Nearest-rank percentile of the samples, q between 0 and 100."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def measure(fn, budget: float) -> dict:
+    for _ in range(WARMUP):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < MAX_ITERATIONS:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        if len(samples) >= MIN_ITERATIONS and time.perf_counter() - started >= budget:
+            break
+    total = sum(samples)
+    return {
+        'iterations': len(samples),
+        'ops_per_sec': round(len(samples) / total, 2) if total else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def page_benchmarks(site: CourtSite):
+    """Yields (name, fn) for the parsers and the report renderer."""
+    case_status_html = fetch_html(site.base_url + CASE_STATUS_PATH)
+    order_url, petitioner, respondent, next_date, last_date, court_no = extract_details(case_status_html)
+    yield 'extract_details', lambda: extract_details(case_status_html)
+
+    filing_date_html = fetch_html(site.base_url + FILING_DATE_PATH)
+    if parse_filing_date(filing_date_html) is None:
+        raise SystemExit('parse_filing_date found no filing date in the fixture')
+    yield 'parse_filing_date', lambda: parse_filing_date(filing_date_html)
+
+    for count in ORDER_COUNTS:
+        orders_html = fetch_html(f'{site.site_url(order_url)}?orders={count}')
+        orders = extract_order_details_list(orders_html)
+        if len(orders) != count:
+            raise SystemExit(f'extract_order_details_list found {len(orders)} of {count} orders')
+        yield f'extract_order_details_list[{count}]', lambda html=orders_html: extract_order_details_list(html)
+
+        case_data = build_case_data('W.P.(C)', '4352', '2025', {
+            'petitioner': petitioner, 'respondent': respondent, 'next_date': next_date, 'last_date': last_date,
+            'court_no': court_no, 'orders': orders,
+        })
+        yield f'pdf_generator_v2[{count}]', lambda data=case_data: pdf_generator_v2(data, save_to_disk=False)
+
+
+def search_benchmarks(site: CourtSite, work_dir: str):
+    """
+    Yields (name, fn) for POST /search, served as in production: the async engine drives
+    headless browsers through the search forms, behind the scrape gate and the site
+    limiter, with the court sites pointed at the stand-in. The app keeps its stores and
+    catalogue under work_dir, and every request asks for a new case number, so no request
+    is answered from a cache. The filing date is looked up next to the search, and every
+    response must report it.
+
+    Needs Playwright's browsers (playwright install chromium).
+    """
+    @functools.cache
+    def client():
+        # Started on first use, so the other benchmarks run without browsers.
+        # The app reads its settings and opens its stores when it is imported
+        os.environ.update({
+            'CASE_SEARCH_DATA_DIR': work_dir,
+            'CASE_SEARCH_CASE_STATUS_SITE': site.base_url,
+            'CASE_SEARCH_FILING_DATE_SITE': site.base_url,
+            'CASE_SEARCH_CATALOGUE_REFRESH': 'false',
+            'CASE_SEARCH_SCHEDULER_ENABLED': 'false',
+            'CASE_SEARCH_PDF_DELIVERY': 'disk',
+            'CASE_SEARCH_LOG_LEVEL': 'WARNING',
+            # The limiter still runs, but with a budget the benchmark never reaches
+            'CASE_SEARCH_SITE_REQUESTS_PER_MINUTE': str(SITE_REQUESTS_PER_MINUTE),
+            'CASE_SEARCH_SITE_MAX_REQUESTS_PER_MINUTE': str(SITE_REQUESTS_PER_MINUTE),
+        })
+
+        # The case-wise form's code for the searched case type, as a catalogue refresh would record it
+        from catalogue import SEED_PATH
+        with open(SEED_PATH, encoding='utf-8') as f:
+            catalogue_data = json.load(f)
+        catalogue_data['filing_codes'] = {SEARCH_CASE_TYPE: SEARCH_CASE_TYPE}
+        with open(os.path.join(work_dir, 'case_search_catalogue.json'), 'w', encoding='utf-8') as f:
+            json.dump(catalogue_data, f)
+
+        import app
+        try:
+            app.create_app()
+        except Exception as e:
+            raise SystemExit(f'Could not start the browsers for /search (run "playwright install chromium"): {e}')
+        return app.app.test_client()
+
+    for count in SEARCH_ORDER_COUNTS:
+        numbers = iter(range(1, MAX_ITERATIONS + WARMUP + 1))
+
+        def post(count=count, numbers=numbers):
+            site.set_orders(count)
+            response = client().post('/search', json={
+                'caseType': SEARCH_CASE_TYPE, 'caseNumber': f'{count}{next(numbers):05d}', 'year': SEARCH_YEAR})
+            if response.status_code != 200:
+                raise SystemExit(f'/search returned {response.status_code}: {response.get_data(as_text=True)}')
+            details = response.get_json()['case_details']
+            if details['orders_count'] != count:
+                raise SystemExit(f'/search found {details["orders_count"]} of {count} orders')
+            if details['filing_date'] != FIXTURE_FILING_DATE:
+                raise SystemExit(f'/search reported the filing date {details["filing_date"]!r}, not the stand-in\'s')
+
+        yield f'/search[{count}]', post
+
+
+def compare(result: dict, baseline: dict | None, tolerance: float) -> str:
+    if baseline is None:
+        return 'new'
+    for key in ('p50_ms', 'p95_ms'):
+        if result[key] > baseline[key] * (1 + tolerance):
+            return f'REGRESSED ({key} {baseline[key]:.2f} -> {result[key]:.2f})'
+    return 'ok'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', help='run only the benchmarks whose name contains this')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='seconds spent per benchmark')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline file to check against')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown of p50 and p95 over the baseline, as a fraction')
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    site = CourtSite().start()
+    work_dir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    results = {}
+    regressions = []
+    print(f"{'benchmark':<34} {'runs':>5} {'ops/s':>9} {'p50':>10} {'p95':>10} {'p99':>10}  status")
+    try:
+        benchmarks = [*page_benchmarks(site), *search_benchmarks(site, work_dir)]
+        for name, fn in benchmarks:
+            if args.only and args.only not in name:
+                continue
+            result = results[name] = measure(fn, args.budget)
+            status = compare(result, baselines.get(name), args.tolerance)
+            if status.startswith('REGRESSED'):
+                regressions.append(name)
+            print(f"{name:<34} {result['iterations']:>5} {result['ops_per_sec']:>9.1f} "
+                  f"{result['p50_ms']:>8.2f}ms {result['p95_ms']:>8.2f}ms {result['p99_ms']:>8.2f}ms  {status}")
+    finally:
+        site.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({**baselines, **results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
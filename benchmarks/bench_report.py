@@ -0,0 +1,87 @@
+"""
+Times the case report renderer on cases with many orders.
+
+Rendering should grow linearly with the number of orders: the time per order stays
+flat from a handful of orders to several thousand. The "plain subset" column renders
+with FPDF's own glyph subset list, whose membership checks make large reports
+quadratic.
+
+Usage:
+    python benchmarks/bench_report.py [--orders 10 100 1000 2000 5000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import report  # noqa: E402
+
+
+def build_case(count: int) -> dict:
+    """Builds case data shaped like the app's, with `count` orders and non-Latin party names."""
+    links = [f'https://delhihighcourt.nic.in/app/showlogo/{i:08d}/{2000 + i % 25}' for i in range(count, 0, -1)]
+    dates = [f'{i % 28 + 1:02d}/{i % 12 + 1:02d}/{2000 + i % 25}' for i in range(count, 0, -1)]
+    return {
+        'case_type': 'W.P.(C)',
+        'case_number': '4352',
+        'case_year': '2025',
+        'petitioner': 'राजेश कुमार शर्मा AND ORS.',
+        'respondent': 'UNION OF INDIA THROUGH THE SECRETARY, MINISTRY OF HOME AFFAIRS',
+        'last_date': '12/03/2025',
+        'court_no': '12',
+        'orders': {'link': links, 'order_dates': dates},
+    }
+
+
+class PlainSubsetPDF(report.ReportPDF):
+    """ReportPDF with FPDF's own glyph subset lists, for comparison."""
+
+    def __init__(self):
+        super().__init__()
+        for font in self.fonts.values():
+            if isinstance(font.get('subset'), report._GlyphSubset):
+                font['subset'] = list(font['subset'])
+
+
+def time_render(case: dict, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        report.write_report(case, save_to_disk=False)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--orders', type=int, nargs='+', default=[10, 100, 1000, 2000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--plain-limit', type=int, default=1000,
+                        help='largest case rendered with the plain subset list (it gets slow)')
+    args = parser.parse_args()
+
+    if report.unicode_font() is None:
+        print('Unicode font not found; rendering with the core font, so the plain subset column is skipped.')
+
+    print(f"{'orders':>8} {'pages':>6} {'render':>10} {'per order':>10} {'plain subset':>13}")
+    for count in args.orders:
+        case = build_case(count)
+        pages = report.render_report(case).page_no()
+        elapsed = time_render(case, args.repeat)
+
+        plain = '-'
+        if report.unicode_font() is not None and count <= args.plain_limit:
+            original = report.ReportPDF
+            report.ReportPDF = PlainSubsetPDF
+            try:
+                plain = f"{time_render(case, 1) * 1000:.0f}ms"
+            finally:
+                report.ReportPDF = original
+
+        print(f"{count:>8} {pages:>6} {elapsed * 1000:>8.0f}ms {elapsed / count * 1e6:>8.0f}us {plain:>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+"""
+Local stand-in for the court sites, serving the recorded pages in benchmarks/fixtures.
+
+    /app/get-case-type-status                 case-status results page
+    /app/case-type-status-details/<id>        orders page; ?orders=N repeats the recorded
+                                              rows to N orders (default: set_orders(), or
+                                              as recorded)
+    /pcase/guiCaseWise.php                    dhcmisc.nic.in filing-date results page
+    /app/showlogo/<id>/<year>                 order document, a PDF header and filler,
+                                              honouring Range requests
+
+Links in the pages keep pointing at delhihighcourt.nic.in, as on the real site;
+site_url() maps them onto the stand-in. The app scrapes the stand-in when its
+case_status_site and filing_date_site settings point at base_url.
+
+To try the rate limiter, the circuit breaker and the downloader against a struggling
+site, the stand-in can delay every response, fail a share of them, and cut order
+documents off halfway (set_faults(), or --delay and --error-rate).
+
+Usage:
+    python benchmarks/court_site.py [--port 8765] [--delay 2] [--error-rate 0.3]
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import argparse
+import os
+import random
+import re
+import threading
+import time
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SITE_PREFIX = 'https://delhihighcourt.nic.in'
+
+CASE_STATUS_PATH = '/app/get-case-type-status'
+ORDERS_PATH = '/app/case-type-status-details/'
+FILING_DATE_PATH = '/pcase/guiCaseWise.php'
+DOCUMENT_PATH = '/app/showlogo/'
+
+DOCUMENT_SIZE = 256 * 1024
+RANGE_PATTERN = re.compile(r'bytes=(\d+)-$')
+
+TBODY_PATTERN = re.compile(r'(<tbody>)(.*?)(</tbody>)', re.S)
+ROW_PATTERN = re.compile(r'<tr\b.*?</tr>', re.S)
+SERIAL_PATTERN = re.compile(r'(<td class="sorting_1">)\d+(</td>)')
+ORDER_ID_PATTERN = re.compile(r'(/app/showlogo/)\d+(/)')
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def order_document(order: str) -> bytes:
+    """Returns the document of an order, DOCUMENT_SIZE bytes, the same every time for the same order."""
+    head = f'%PDF-1.4\n% order {order}\n'.encode('utf-8')
+    return head + b'0' * (DOCUMENT_SIZE - len(head))
+
+
+def orders_page(count: int | None = None, template: str | None = None) -> str:
+    """
+    Returns the recorded orders page with `count` orders. The recorded rows are
+    repeated in turn, newest first, each with its own serial number and order id.
+    """
+    template = template or read_fixture('orders.html')
+    if count is None:
+        return template
+    match = TBODY_PATTERN.search(template)
+    rows = ROW_PATTERN.findall(match.group(2))
+    generated = []
+    for serial in range(count, 0, -1):
+        row = rows[(count - serial) % len(rows)]
+        row = SERIAL_PATTERN.sub(rf'\g<1>{serial}\g<2>', row)
+        row = ORDER_ID_PATTERN.sub(rf'\g<1>{serial:014d}\g<2>', row)
+        generated.append(row)
+    body = '\n      ' + '\n      '.join(generated) + '\n    '
+    return template[:match.start(2)] + body + template[match.end(2):]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # The forms are posted, but the stand-in answers every search the same way
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        url = urlparse(self.path)
+        self.server.count(url.path)
+        faults = self.server.faults
+        if faults['delay']:
+            time.sleep(faults['delay'])
+        if faults['error_rate'] and random.random() < faults['error_rate']:
+            self.send_error(faults['error_status'])
+            return
+        query = parse_qs(url.query)
+        if url.path == CASE_STATUS_PATH:
+            body = self.server.pages['case_status']
+        elif url.path.startswith(ORDERS_PATH):
+            count = int(query['orders'][0]) if 'orders' in query else self.server.default_orders
+            body = self.server.orders_page(count)
+        elif url.path == FILING_DATE_PATH:
+            body = self.server.pages['filing_date']
+        elif url.path.startswith(DOCUMENT_PATH):
+            self._send_document(order_document(url.path[len(DOCUMENT_PATH):]))
+            return
+        else:
+            self.send_error(404)
+            return
+        content = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_POST = do_GET
+
+    def _send_document(self, content: bytes):
+        match = RANGE_PATTERN.match(self.headers.get('Range') or '')
+        start = int(match.group(1)) if match else 0
+        if start >= len(content):
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{len(content)}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = content[start:]
+        self.send_response(206 if match else 200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Accept-Ranges', 'bytes')
+        if match:
+            self.send_header('Content-Range', f'bytes {start}-{len(content) - 1}/{len(content)}')
+        self.end_headers()
+        if self.server.cut_document():
+            # Half the promised body, then the connection drops
+            self.wfile.write(body[:len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CourtSite:
+    """
+    The stand-in server, running on a background thread.
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one.
+    """
+
+    def __init__(self, port: int = 0):
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _Handler)
+        self._server.daemon_threads = True
+        self._server.pages = {
+            'case_status': read_fixture('case_status.html'),
+            'filing_date': read_fixture('filing_date.html'),
+        }
+        template = read_fixture('orders.html')
+        cache = {}
+
+        def cached_orders_page(count):
+            if count not in cache:
+                cache[count] = orders_page(count, template)
+            return cache[count]
+
+        self._server.orders_page = cached_orders_page
+        self._server.faults = {'delay': 0.0, 'error_rate': 0.0, 'error_status': 503, 'cut_documents': 0}
+        self._server.default_orders = None
+        self._requests = {}
+        self._requests_lock = threading.Lock()
+        self._server.count = self._count
+        self._server.cut_document = self._cut_document
+        self._thread = None
+
+    def _cut_document(self) -> bool:
+        with self._requests_lock:
+            if self._server.faults['cut_documents'] > 0:
+                self._server.faults['cut_documents'] -= 1
+                return True
+            return False
+
+    def _count(self, path: str):
+        with self._requests_lock:
+            self._requests[path] = self._requests.get(path, 0) + 1
+
+    def requests(self, path: str) -> int:
+        """Returns how many requests for path the stand-in has answered or failed."""
+        with self._requests_lock:
+            return self._requests.get(path, 0)
+
+    def set_orders(self, count: int | None):
+        """Makes orders pages requested without ?orders= list `count` orders; None serves them as recorded."""
+        self._server.default_orders = count
+
+    def set_faults(self, delay: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                   cut_documents: int = 0):
+        """
+        Makes the stand-in misbehave like an overloaded court site.
+
+        Args:
+            delay (float): Seconds every response is held back.
+            error_rate (float): Share of requests, from 0 to 1, answered with error_status.
+            error_status (int): HTTP status of the failed responses.
+            cut_documents (int): Number of the next order documents whose connection drops halfway.
+        """
+        self._server.faults = {'delay': delay, 'error_rate': error_rate, 'error_status': error_status,
+                               'cut_documents': cut_documents}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def site_url(self, url: str) -> str:
+        """Maps a delhihighcourt.nic.in or dhcmisc.nic.in URL onto the stand-in."""
+        if url.startswith(SITE_PREFIX):
+            return self.base_url + url[len(SITE_PREFIX):]
+        parsed = urlparse(url)
+        return self.base_url + parsed.path + (f'?{parsed.query}' if parsed.query else '')
+
+    def start(self) -> 'CourtSite':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='court-site', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serves on the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the recorded court-site pages locally.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds every response is held back')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with 503')
+    args = parser.parse_args()
+    site = CourtSite(args.port)
+    site.set_faults(args.delay, args.error_rate)
+    print(f"Serving the recorded court pages on {site.base_url}")
+    try:
+        site.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+from playwright.sync_api import sync_playwright
+from concurrent.futures import Future
+import logging
+import queue
+import threading
+
+from metrics import span
+from readiness import block_requests
+from sessions import Form, FormSession, SessionStats, run_form_search
+
+logger = logging.getLogger(__name__)
+
+# Default pool settings
+DEFAULT_POOL_SIZE = 2
+DEFAULT_CONTEXTS_PER_BROWSER = 1
+DEFAULT_MAX_PAGES = 50
+DEFAULT_LEASE_TIMEOUT = 120
+
+
+class BrowserWorker:
+    """
+    Owns one long-lived browser running on its own thread.
+
+    Playwright's sync API objects can only be used from the thread that created
+    them, so every task for this browser is handed over to the worker thread and
+    the caller waits on a Future for the result.
+
+    Each warm context also keeps a FormSession per search form, so consecutive form
+    searches on this browser skip loading the form.
+    """
+
+    def __init__(self, name: str, contexts: int, max_pages: int, headless: bool = True,
+                 session_stats: SessionStats | None = None):
+        self.name = name
+        self.contexts = contexts
+        self.max_pages = max_pages
+        self.headless = headless
+        self.session_stats = session_stats or SessionStats()
+        self.pages_served = 0
+        self._tasks = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._ready = Future()
+        self._playwright = None
+        self._browser = None
+        self._warm_contexts = []
+        self._form_sessions = {}
+        self._next_context = 0
+
+    def start(self):
+        self._thread.start()
+        # Surface launch errors to whoever is starting the pool
+        self._ready.result()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        self._tasks.put((fn, args, kwargs, future, None))
+        return future
+
+    def submit_form(self, form: Form, fn, *args) -> Future:
+        """Like submit(), but fn runs on the warm page kept on form instead of a fresh page."""
+        future = Future()
+        self._tasks.put((fn, args, {}, future, form))
+        return future
+
+    def check(self) -> Future:
+        """
+        Queues the health check every task gets, without running anything, so callers can
+        get a relaunch out of the way before timing the work they submit next.
+        """
+        future = Future()
+        self._tasks.put((None, (), {}, future, None))
+        return future
+
+    def _form_session(self, context_index: int, form: Form) -> FormSession:
+        key = (context_index, form.name)
+        if key not in self._form_sessions:
+            self._form_sessions[key] = FormSession(form, self.session_stats)
+        return self._form_sessions[key]
+
+    def stop(self):
+        self._tasks.put(None)
+        self._thread.join(timeout=30)
+
+    def _launch_browser(self):
+        try:
+            # Try to launch a Chromium browser first
+            return self._playwright.chromium.launch(headless=self.headless)
+        except Exception as e:
+            logger.warning("[%s] Error launching Chromium: %s", self.name, e)
+            # Fallback to Firefox if Chromium fails
+            return self._playwright.firefox.launch(headless=self.headless)
+
+    def _open_browser(self):
+        with span('browser.launch'):
+            self._browser = self._launch_browser()
+            self._warm_contexts = [self._browser.new_context() for _ in range(self.contexts)]
+            for context in self._warm_contexts:
+                block_requests(context)
+        self._next_context = 0
+        self.pages_served = 0
+        logger.info("[%s] Browser ready with %d warm context(s).", self.name, self.contexts)
+
+    def _close_browser(self):
+        if self._browser:
+            try:
+                self._browser.close()
+            except Exception as e:
+                logger.warning("[%s] Error closing browser: %s", self.name, e)
+        self._browser = None
+        self._warm_contexts = []
+        self._form_sessions = {}
+
+    def _is_healthy(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    def _recycle(self, reason: str):
+        logger.info("[%s] Recycling browser (%s).", self.name, reason)
+        self._close_browser()
+        self._open_browser()
+
+    def _run(self):
+        try:
+            self._playwright = sync_playwright().start()
+            self._open_browser()
+        except Exception as e:
+            if self._playwright:
+                self._playwright.stop()
+            self._ready.set_exception(e)
+            return
+        self._ready.set_result(True)
+
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            fn, args, kwargs, future, form = task
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                # Health check before handing out a page
+                if not self._is_healthy():
+                    self._recycle("browser disconnected")
+                elif self.pages_served >= self.max_pages:
+                    self._recycle(f"served {self.pages_served} pages")
+                if fn is None:
+                    future.set_result(None)
+                    continue
+
+                context_index = self._next_context
+                context = self._warm_contexts[context_index]
+                self._next_context = (self._next_context + 1) % len(self._warm_contexts)
+                page = context.new_page() if form is None else None
+            except Exception as e:
+                future.set_exception(e)
+                continue
+
+            try:
+                if form is None:
+                    future.set_result(fn(page, *args, **kwargs))
+                else:
+                    session = self._form_session(context_index, form)
+                    future.set_result(run_form_search(session, context, fn, *args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self.pages_served += 1
+                if page is not None:
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+
+        self._close_browser()
+        self._playwright.stop()
+
+
+class BrowserPool:
+    """
+    A pool of warm browsers with lease/return semantics.
+
+    Args:
+        size (int): Number of browsers to keep running.
+        contexts_per_browser (int): Number of warm browser contexts per browser.
+            Pages are opened round-robin across these contexts.
+        max_pages (int): A browser is recycled after serving this many pages.
+        lease_timeout (float): Seconds to wait for a free browser before giving up.
+        headless (bool): Run the browsers headless.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, contexts_per_browser: int = DEFAULT_CONTEXTS_PER_BROWSER,
+                 max_pages: int = DEFAULT_MAX_PAGES, lease_timeout: float = DEFAULT_LEASE_TIMEOUT,
+                 headless: bool = True):
+        self.size = size
+        self.contexts_per_browser = contexts_per_browser
+        self.max_pages = max_pages
+        self.lease_timeout = lease_timeout
+        self.headless = headless
+        self.session_stats = SessionStats()
+        self._workers = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self.started = False
+
+    def start(self):
+        with self._lock:
+            if self.started:
+                return
+            try:
+                for i in range(self.size):
+                    worker = BrowserWorker(f"browser-{i}", self.contexts_per_browser, self.max_pages, self.headless,
+                                           self.session_stats)
+                    worker.start()
+                    self._workers.append(worker)
+                    self._idle.put(worker)
+            except Exception:
+                # Do not leave half a pool running
+                for worker in self._workers:
+                    worker.stop()
+                self._workers = []
+                self._idle = queue.Queue()
+                raise
+            self.started = True
+            logger.info("Browser pool started with %d browser(s).", self.size)
+
+    def shutdown(self):
+        with self._lock:
+            if not self.started:
+                return
+            for worker in self._workers:
+                worker.stop()
+            self._workers = []
+            self._idle = queue.Queue()
+            self.started = False
+            logger.info("Browser pool shut down.")
+
+    def lease(self) -> BrowserWorker:
+        """Takes an idle browser out of the pool. It must be given back with release()."""
+        if not self.started:
+            self.start()
+        with span('browser.lease'):
+            try:
+                return self._idle.get(timeout=self.lease_timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No browser available after {self.lease_timeout}s")
+
+    def release(self, worker: BrowserWorker):
+        self._idle.put(worker)
+
+    def run(self, fn, *args, **kwargs):
+        """
+        Leases a browser, runs fn(page, *args, **kwargs) on a fresh page and returns the result.
+        The browser goes back to the pool afterwards, even if fn raised.
+        """
+        worker = self.lease()
+        try:
+            return worker.submit(fn, *args, **kwargs).result()
+        finally:
+            self.release(worker)
+
+    def run_form(self, form: Form, fn, *args):
+        """
+        Leases a browser and runs fn(page, *args) on the page it keeps on form,
+        loading the form first if needed. See sessions.run_form_search.
+        """
+        worker = self.lease()
+        try:
+            return worker.submit_form(form, fn, *args).result()
+        finally:
+            self.release(worker)
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'idle': self._idle.qsize(),
+            'pages_served': {worker.name: worker.pages_served for worker in self._workers},
+            'form_sessions': self.session_stats.stats(),
+        }
+
+
+# Shared pool used by the extractor functions
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BrowserPool:
+    """Returns the shared browser pool, starting it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+    _pool.start()
+    return _pool
+
+
+def start_pool(**kwargs) -> BrowserPool:
+    """Creates and starts the shared browser pool with the given settings."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(**kwargs)
+    _pool.start()
+    return _pool
+
+
+def pool_stats() -> dict:
+    """Returns the stats of the shared pool without starting it."""
+    pool = _pool
+    if pool is None or not pool.started:
+        return {'running': False}
+    return {'running': True, **pool.stats()}
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,148 @@
+import logging
+import os
+import shutil
+import tempfile
+
+try:
+    import pikepdf
+except ImportError:  # optional dependency, only needed for bundles
+    pikepdf = None
+
+logger = logging.getLogger(__name__)
+
+# Number of order documents merged into each intermediate file
+DEFAULT_BATCH_SIZE = 50
+
+# Size of the chunks a bundle is streamed to the client in
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class BundleError(Exception):
+    """Raised when a bundle cannot be built."""
+
+
+class UnreadableDocuments(BundleError):
+    """
+    Raised instead of building a bundle that would leave out order documents that
+    could not be read.
+
+    Attributes:
+        orders (list): The (bookmark title, document path) pairs of those documents.
+    """
+
+    def __init__(self, orders: list):
+        super().__init__(f"{len(orders)} order document(s) could not be read")
+        self.orders = orders
+
+
+def _merge_batch(paths: list, output_path: str) -> list:
+    """
+    Appends the pages of every document in paths to a new PDF at output_path.
+
+    Returns:
+        list: The page count of each document, or 0 for documents that could not be read.
+    """
+    page_counts = []
+    sources = []
+    try:
+        with pikepdf.new() as merged:
+            for path in paths:
+                try:
+                    source = pikepdf.open(path)
+                except Exception as e:
+                    logger.warning("Skipping unreadable order document %s: %s", path, e)
+                    page_counts.append(0)
+                    continue
+                # Sources stay open until the save; qpdf copies their page content
+                # straight from disk while writing instead of holding it in memory.
+                sources.append(source)
+                merged.pages.extend(source.pages)
+                page_counts.append(len(source.pages))
+            merged.save(output_path)
+    finally:
+        for source in sources:
+            source.close()
+    return page_counts
+
+
+def build_bundle(summary_path: str, orders: list, output_path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> str:
+    """
+    Builds one PDF with the summary report followed by every order document, with a
+    bookmark for the summary and for each order.
+
+    Orders are merged in batches of batch_size into intermediate files on disk, which
+    are then joined, so only one batch of documents is open at any time.
+
+    Args:
+        summary_path (str): The summary report generated for the case.
+        orders (list): (bookmark title, document path) pairs, in the order they should appear.
+        output_path (str): Where to write the bundle.
+        batch_size (int): Number of order documents merged per intermediate file.
+
+    Returns:
+        str: output_path.
+
+    Raises:
+        UnreadableDocuments: If any order document could not be read. Nothing is
+            written to output_path then.
+    """
+    if pikepdf is None:
+        raise BundleError("Building bundles needs pikepdf (pip install pikepdf)")
+
+    work_dir = tempfile.mkdtemp(prefix='bundle-', dir=os.path.dirname(output_path))
+    try:
+        # Stage 1: merge the order documents batch by batch
+        parts = []
+        bookmarks = []
+        unreadable = []
+        page = 0
+        with pikepdf.open(summary_path) as summary:
+            summary_pages = len(summary.pages)
+        page += summary_pages
+
+        for start in range(0, len(orders), batch_size):
+            batch = orders[start:start + batch_size]
+            part_path = os.path.join(work_dir, f'part-{len(parts):05d}.pdf')
+            page_counts = _merge_batch([path for _, path in batch], part_path)
+            for order, count in zip(batch, page_counts):
+                if not count:
+                    unreadable.append(order)
+                    continue
+                bookmarks.append((order[0], page))
+                page += count
+            parts.append(part_path)
+
+        if unreadable:
+            raise UnreadableDocuments(unreadable)
+
+        # Stage 2: join the summary and the intermediate files
+        temp_output = os.path.join(work_dir, 'bundle.pdf')
+        sources = []
+        try:
+            with pikepdf.new() as bundle:
+                for path in [summary_path] + parts:
+                    source = pikepdf.open(path)
+                    sources.append(source)
+                    bundle.pages.extend(source.pages)
+
+                with bundle.open_outline() as outline:
+                    outline.root.append(pikepdf.OutlineItem('Case summary', 0))
+                    for title, page_index in bookmarks:
+                        outline.root.append(pikepdf.OutlineItem(title, page_index))
+
+                bundle.save(temp_output)
+        finally:
+            for source in sources:
+                source.close()
+
+        os.replace(temp_output, output_path)
+        return output_path
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def stream_file(path: str, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Yields a file in chunks, for responses sent with chunked transfer encoding."""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            yield chunk
@@ -0,0 +1,241 @@
+from collections import OrderedDict
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Default cache settings
+DEFAULT_TTL = 6 * 60 * 60          # results younger than this are served as fresh
+DEFAULT_STALE_TTL = 24 * 60 * 60   # older results are served while a refresh runs
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def case_key(case_type: str, case_number: str, year: str) -> str:
+    """Builds the cache key for a case lookup."""
+    return f"{case_type.strip().upper()}|{case_number.strip()}|{str(year).strip()}"
+
+
+class MemoryBackend:
+    """In-process LRU store. Entries are (value, stored_at) pairs."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value, stored_at: float):
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """
+    On-disk LRU store that survives restarts. Values are stored as JSON, so they
+    must be JSON-serialisable.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' stored_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)')
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute('SELECT value, stored_at FROM cache WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value, stored_at: float):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), stored_at, time.time()),
+            )
+            # Drop the least recently used entries beyond the size bound
+            self._conn.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM cache')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+
+class ResultCache:
+    """
+    TTL cache with stale-while-revalidate in front of an expensive lookup.
+
+    Args:
+        backend: A MemoryBackend, SQLiteBackend or any object with get/set/delete/clear/__len__.
+        ttl (float): Seconds a stored result counts as fresh.
+        stale_ttl (float): Seconds after `ttl` during which a stale result is still
+            returned right away while a background refresh replaces it.
+        fallback_errors (tuple): Exception types from fetch() on which a stored result
+            is returned however old it is, e.g. while the site is down.
+    """
+
+    def __init__(self, backend, ttl: float = DEFAULT_TTL, stale_ttl: float = DEFAULT_STALE_TTL,
+                 fallback_errors: tuple = ()):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.fallback_errors = fallback_errors
+        self.hits = 0
+        self.stale_hits = 0
+        self.expired_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get_or_fetch(self, key: str, fetch):
+        """
+        Returns the cached value for key, calling fetch() to fill or refresh it.
+        Results of None are not cached. Exceptions from a synchronous fetch propagate,
+        unless they are fallback_errors and an expired result is stored for key.
+        """
+        entry = self.backend.get(key)
+        now = time.time()
+
+        if entry is not None:
+            value, stored_at = entry
+            age = now - stored_at
+            if age < self.ttl:
+                with self._lock:
+                    self.hits += 1
+                return value
+            if age < self.ttl + self.stale_ttl:
+                with self._lock:
+                    self.stale_hits += 1
+                self._refresh_in_background(key, fetch)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        try:
+            value = fetch()
+        except self.fallback_errors as e:
+            if entry is None:
+                raise
+            logger.warning("Serving an expired result for %s: %s", key, e)
+            with self._lock:
+                self.expired_hits += 1
+            return entry[0]
+        if value is not None:
+            self.backend.set(key, value, time.time())
+        return value
+
+    def _refresh_in_background(self, key: str, fetch):
+        with self._lock:
+            # One refresh per key at a time
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = fetch()
+                if value is not None:
+                    self.backend.set(key, value, time.time())
+                with self._lock:
+                    self.refreshes += 1
+            except Exception as e:
+                logger.warning("Background refresh of %s failed: %s", key, e)
+                with self._lock:
+                    self.refresh_errors += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"cache-refresh-{key}", daemon=True).start()
+
+    def get(self, key: str):
+        """Returns the cached value for key if it is fresh, otherwise None, without fetching anything."""
+        entry = self.backend.get(key)
+        fresh = entry is not None and time.time() - entry[1] < self.ttl
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry[0] if fresh else None
+
+    def put(self, key: str, value):
+        """Stores a value fetched outside get_or_fetch, e.g. by a forced refresh."""
+        if value is not None:
+            self.backend.set(key, value, time.time())
+
+    def invalidate(self, key: str):
+        self.backend.delete(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'backend': type(self.backend).__name__,
+                'size': len(self.backend),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'expired_hits': self.expired_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+                'refreshing': len(self._refreshing),
+            }
@@ -0,0 +1,218 @@
+import re
+import sqlite3
+import threading
+import time
+
+from cache import case_key
+from export import parse_date
+from report_store import report_key
+
+# Default number of cases returned by a query
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+PARTY_ROLES = ('petitioner', 'respondent')
+
+CASE_COLUMNS = (
+    'case_type', 'case_number', 'case_year', 'petitioner', 'respondent', 'last_date',
+    'hearing_date', 'court_no', 'filing_date', 'orders_count', 'updated_at',
+)
+
+
+def normalize_court(value) -> str | None:
+    """Reduces a court number like 'COURT NO. 12' or '012' to '12', so lookups match however it was written."""
+    if value is None:
+        return None
+    match = re.search(r'\d+', str(value))
+    return str(int(match.group())) if match else str(value).strip().upper() or None
+
+
+def party_query(text: str, role: str | None = None) -> str | None:
+    """
+    Turns free text into an FTS5 query that matches every word as a prefix.
+
+    Args:
+        text (str): Words of a party name, e.g. 'union of ind'.
+        role (str | None): 'petitioner' or 'respondent' to search only that party.
+
+    Returns:
+        str | None: The FTS5 query, or None if text has no searchable words.
+    """
+    words = [word for word in text.split() if any(c.isalnum() for c in word)]
+    if not words:
+        return None
+    query = ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+    if role:
+        if role not in PARTY_ROLES:
+            raise ValueError(f"Unknown party role '{role}'")
+        query = f'{role} : ({query})'
+    return query
+
+
+class CaseDatabase:
+    """
+    Persistent SQLite store of every case and order list the scrapers return.
+
+    Cases are indexed by court number and hearing date (the parsed next_date; None when
+    the site lists no next hearing), and party names by an FTS5 full-text index, so the
+    stored cases can be queried without any scraping.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS cases (
+                case_key TEXT PRIMARY KEY, case_type TEXT NOT NULL, case_number TEXT NOT NULL,
+                case_year TEXT NOT NULL, petitioner TEXT, respondent TEXT, last_date TEXT,
+                hearing_date TEXT, court_no TEXT, court TEXT, filing_date TEXT,
+                orders_count INTEGER NOT NULL, digest TEXT NOT NULL, updated_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS cases_court_hearing ON cases (court, hearing_date);
+            CREATE INDEX IF NOT EXISTS cases_hearing ON cases (hearing_date);
+            CREATE INDEX IF NOT EXISTS cases_petitioner ON cases (petitioner COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS cases_respondent ON cases (respondent COLLATE NOCASE);
+
+            CREATE TABLE IF NOT EXISTS case_orders (
+                case_key TEXT NOT NULL, position INTEGER NOT NULL, date TEXT, order_date TEXT,
+                link TEXT NOT NULL, PRIMARY KEY (case_key, position));
+            CREATE INDEX IF NOT EXISTS case_orders_date ON case_orders (order_date);
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+                petitioner, respondent, content='cases', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2');
+            CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+                INSERT INTO cases_fts (rowid, petitioner, respondent)
+                VALUES (new.rowid, new.petitioner, new.respondent);
+            END;
+            CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+                INSERT INTO cases_fts (cases_fts, rowid, petitioner, respondent)
+                VALUES ('delete', old.rowid, old.petitioner, old.respondent);
+            END;
+            CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE OF petitioner, respondent ON cases BEGIN
+                INSERT INTO cases_fts (cases_fts, rowid, petitioner, respondent)
+                VALUES ('delete', old.rowid, old.petitioner, old.respondent);
+                INSERT INTO cases_fts (rowid, petitioner, respondent)
+                VALUES (new.rowid, new.petitioner, new.respondent);
+            END;
+        ''')
+        self._conn.commit()
+
+    def upsert(self, case_data: dict) -> bool:
+        """
+        Stores a case and its orders, replacing what was stored for it before.
+
+        Args:
+            case_data (dict): Case data as built by export.build_case_data().
+
+        Returns:
+            bool: False if the stored case was already identical and nothing was written.
+        """
+        key = case_key(case_data['case_type'], case_data['case_number'], case_data['case_year'])
+        digest = report_key(case_data)
+        orders = case_data.get('orders') or {}
+        links = orders.get('link', [])
+        dates = orders.get('order_dates', [])
+
+        with self._lock:
+            row = self._conn.execute('SELECT digest FROM cases WHERE case_key = ?', (key,)).fetchone()
+            if row and row[0] == digest:
+                return False
+            self._conn.execute(
+                'INSERT INTO cases (case_key, case_type, case_number, case_year, petitioner, respondent,'
+                ' last_date, hearing_date, court_no, court, filing_date, orders_count, digest, updated_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+                ' ON CONFLICT (case_key) DO UPDATE SET petitioner = excluded.petitioner,'
+                ' respondent = excluded.respondent, last_date = excluded.last_date,'
+                ' hearing_date = excluded.hearing_date, court_no = excluded.court_no, court = excluded.court,'
+                ' filing_date = COALESCE(excluded.filing_date, cases.filing_date),'
+                ' orders_count = excluded.orders_count, digest = excluded.digest, updated_at = excluded.updated_at',
+                (key, case_data['case_type'], case_data['case_number'], case_data['case_year'],
+                 case_data.get('petitioner'), case_data.get('respondent'), case_data.get('last_date'),
+                 parse_date(case_data.get('next_date')), case_data.get('court_no'),
+                 normalize_court(case_data.get('court_no')), case_data.get('filing_date'),
+                 len(links), digest, time.time()),
+            )
+            self._conn.execute('DELETE FROM case_orders WHERE case_key = ?', (key,))
+            self._conn.executemany(
+                'INSERT INTO case_orders (case_key, position, date, order_date, link) VALUES (?, ?, ?, ?, ?)',
+                [(key, position, date, parse_date(date), link)
+                 for position, (date, link) in enumerate(zip(dates, links), 1)],
+            )
+            self._conn.commit()
+        return True
+
+    def find(self, court=None, date_from: str | None = None, date_to: str | None = None,
+             party: str | None = None, role: str | None = None,
+             limit: int = DEFAULT_LIMIT, offset: int = 0) -> list:
+        """
+        Returns the stored cases matching every given filter.
+
+        Args:
+            court: Court number, in any form normalize_court() understands.
+            date_from (str | None): Earliest hearing date, as YYYY-MM-DD.
+            date_to (str | None): Latest hearing date, as YYYY-MM-DD.
+            party (str | None): Words of a party name, matched as prefixes.
+            role (str | None): Restricts party to 'petitioner' or 'respondent'.
+            limit (int): Maximum number of cases, at most MAX_LIMIT.
+            offset (int): Number of matching cases to skip.
+
+        Returns:
+            list: Case dictionaries, best party match first when party is given and
+                  by hearing date otherwise.
+        """
+        joins = ''
+        where = []
+        params = []
+        order = 'cases.hearing_date, cases.case_key'
+        if party:
+            query = party_query(party, role)
+            if query is None:
+                return []
+            joins = 'JOIN cases_fts ON cases_fts.rowid = cases.rowid'
+            where.append('cases_fts MATCH ?')
+            params.append(query)
+            order = 'cases_fts.rank'
+        if court is not None:
+            where.append('cases.court = ?')
+            params.append(normalize_court(court))
+        if date_from:
+            where.append('cases.hearing_date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('cases.hearing_date <= ?')
+            params.append(date_to)
+
+        sql = (f"SELECT {', '.join('cases.' + column for column in CASE_COLUMNS)} FROM cases {joins}"
+               f"{' WHERE ' + ' AND '.join(where) if where else ''} ORDER BY {order} LIMIT ? OFFSET ?")
+        params += [max(1, min(limit, MAX_LIMIT)), max(0, offset)]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(zip(CASE_COLUMNS, row)) for row in rows]
+
+    def get(self, case_type: str, case_number: str, year: str) -> dict | None:
+        """Returns a stored case with its orders, or None if it was never stored."""
+        key = case_key(case_type, case_number, year)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(CASE_COLUMNS)} FROM cases WHERE case_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            orders = self._conn.execute(
+                'SELECT date, link FROM case_orders WHERE case_key = ? ORDER BY position', (key,)
+            ).fetchall()
+        case = dict(zip(CASE_COLUMNS, row))
+        case['orders'] = [{'date': date, 'link': link} for date, link in orders]
+        return case
+
+    def stats(self) -> dict:
+        with self._lock:
+            cases, = self._conn.execute('SELECT COUNT(*) FROM cases').fetchone()
+            orders, = self._conn.execute('SELECT COUNT(*) FROM case_orders').fetchone()
+        return {'cases': cases, 'orders': orders}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
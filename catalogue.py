@@ -0,0 +1,270 @@
+from datetime import date
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+from bs4 import BeautifulSoup
+
+from http_client import fetch_html
+from ratelimit import CASE_STATUS_HOST, FILING_DATE_HOST, SiteUnavailable, get_site_limiter
+from sessions import CASE_STATUS_FORM, FILING_DATE_FORM
+from sites import site_url
+
+logger = logging.getLogger(__name__)
+
+# Case types known before the first refresh, as listed on the case-status form
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalogue_seed.json')
+
+# Default catalogue settings
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), 'case_search_catalogue.json')
+DEFAULT_MAX_AGE = 24 * 60 * 60     # the forms are scraped again once the catalogue is this old
+DEFAULT_CHECK_INTERVAL = 15 * 60   # how often the refresher checks, and retries after a failure
+
+# Years accepted while the catalogue has none from the forms
+DEFAULT_FIRST_YEAR = 1950
+
+# Case numbers are plain numbers on both forms
+MAX_CASE_NUMBER_DIGITS = 10
+
+# Options that are placeholders rather than choices, e.g. "Select Case Type"
+PLACEHOLDER_PATTERN = re.compile(r'^(--)?\s*select\b', re.I)
+
+
+def normalize_case_type(label: str) -> str:
+    """Reduces a case type label to upper-case letters and digits, so 'W.P. (C)' matches 'W.P.(C)'."""
+    return re.sub(r'[^0-9A-Z]', '', label.upper())
+
+
+def parse_select_options(html: str, select_id: str) -> list:
+    """
+    Returns the (label, value) pairs of a <select> element's options, leaving out
+    placeholders and options without a value.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    select = soup.find('select', id=select_id)
+    if select is None:
+        return []
+    options = []
+    for option in select.find_all('option'):
+        label = option.get_text(strip=True)
+        value = (option.get('value') or '').strip()
+        if label and value and not PLACEHOLDER_PATTERN.match(label):
+            options.append((label, value))
+    return options
+
+
+class Catalogue:
+    """
+    The case types and years the court's search forms accept, kept in a JSON file.
+
+    Searches are checked against it before anything is scraped, it backs the case type
+    autocomplete, and it maps case-status labels onto the codes of the dhcmisc.nic.in
+    case-wise form. refresh() re-reads the options of both forms with one plain HTTP
+    request each. Until the first refresh the case types come from catalogue_seed.json.
+
+    Args:
+        path (str): JSON file the catalogue is kept in.
+        max_age (float): Seconds after which the refresher scrapes the forms again.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._set(self._load())
+
+    def _load(self) -> dict:
+        for path in (self.path, SEED_PATH):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning("Could not read the catalogue in %s: %s", path, e)
+        return {}
+
+    def _set(self, data: dict):
+        case_types = list(data.get('case_types') or [])
+        filing_codes = dict(data.get('filing_codes') or {})
+        with self._lock:
+            self.case_types = case_types
+            self.filing_codes = filing_codes
+            self.years = [str(year) for year in data.get('years') or []]
+            self.filing_years = [str(year) for year in data.get('filing_years') or []]
+            self.fetched_at = data.get('fetched_at')
+            self._by_normalized = {normalize_case_type(label): label for label in case_types}
+            self._filing_by_normalized = {normalize_case_type(label): code for label, code in filing_codes.items()}
+            self._year_set = frozenset(self.years)
+
+    def case_type_label(self, case_type: str) -> str | None:
+        """Returns the case type as the case-status form spells it, or None if it is unknown."""
+        return self._by_normalized.get(normalize_case_type(case_type))
+
+    def filing_code(self, case_type: str) -> str | None:
+        """Returns the dhcmisc.nic.in form's code for a case type, or None if it is not known."""
+        return self.filing_codes.get(case_type) or self._filing_by_normalized.get(normalize_case_type(case_type))
+
+    def validate(self, case_type: str, case_number: str, year: str) -> str | None:
+        """
+        Checks a search against the catalogue.
+
+        Returns:
+            str | None: What is wrong with the search, or None if it is valid.
+        """
+        if self._by_normalized and self.case_type_label(case_type) is None:
+            return f"Unknown case type '{case_type}'"
+        case_number = str(case_number).strip()
+        if not case_number.isdigit() or len(case_number) > MAX_CASE_NUMBER_DIGITS:
+            return f"Invalid case number '{case_number}', expected a number"
+        year = str(year).strip()
+        if self._year_set:
+            if year not in self._year_set:
+                return f"Invalid year '{year}'"
+        elif not (year.isdigit() and DEFAULT_FIRST_YEAR <= int(year) <= date.today().year):
+            return f"Invalid year '{year}'"
+        return None
+
+    def suggest(self, query: str, limit: int = 20) -> list:
+        """
+        Returns up to limit case types matching query: those starting with it first,
+        then those containing it, ignoring case, spaces and punctuation.
+        """
+        query = normalize_case_type(query)
+        case_types = self.case_types
+        if not query:
+            return case_types[:limit]
+        starts, contains = [], []
+        for label in case_types:
+            normalized = normalize_case_type(label)
+            if normalized.startswith(query):
+                starts.append(label)
+            elif query in normalized:
+                contains.append(label)
+        return (starts + contains)[:limit]
+
+    def year_options(self) -> list:
+        """Returns the years the case-status form accepts, newest first."""
+        years = self.years or [str(year) for year in range(DEFAULT_FIRST_YEAR, date.today().year + 1)]
+        return sorted(years, reverse=True)
+
+    def is_stale(self) -> bool:
+        return self.fetched_at is None or time.time() - self.fetched_at >= self.max_age
+
+    def refresh(self) -> bool:
+        """
+        Scrapes the options of both search forms and saves them. The catalogue is left
+        as it is if either form cannot be read.
+
+        Returns:
+            bool: True if the catalogue was updated.
+        """
+        try:
+            case_status_html = self._fetch(CASE_STATUS_HOST, CASE_STATUS_FORM.url)
+            filing_date_html = self._fetch(FILING_DATE_HOST, FILING_DATE_FORM.url)
+        except SiteUnavailable as e:
+            logger.warning("Not refreshing the catalogue: %s", e)
+            case_status_html = filing_date_html = None
+
+        case_types = parse_select_options(case_status_html, 'case_type') if case_status_html else []
+        filing_types = parse_select_options(filing_date_html, 'ctype') if filing_date_html else []
+        if not case_types or not filing_types:
+            with self._lock:
+                self.refresh_errors += 1
+            logger.warning("Could not read the case types from the search forms; keeping the catalogue")
+            return False
+
+        data = {
+            'case_types': [label for label, value in case_types],
+            'filing_codes': {label: value for label, value in filing_types},
+            'years': [label for label, value in parse_select_options(case_status_html, 'case_year')],
+            'filing_years': [label for label, value in parse_select_options(filing_date_html, 'regyr')],
+            'fetched_at': time.time(),
+        }
+        self._save(data)
+        self._set(data)
+        with self._lock:
+            self.refreshes += 1
+        logger.info("Catalogue refreshed: %d case types, %d years", len(data['case_types']), len(data['years']))
+        return True
+
+    @staticmethod
+    def _fetch(host: str, url: str) -> str | None:
+        with get_site_limiter().request(host) as outcome:
+            html = fetch_html(site_url(url))
+            if html is None:
+                outcome.failed()
+            return html
+
+    def _save(self, data: dict):
+        temp_path = f'{self.path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning("Could not save the catalogue to %s: %s", self.path, e)
+
+    def start(self, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        """Refreshes the catalogue on a background thread whenever it is older than max_age."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while True:
+                if self.is_stale():
+                    self.refresh()
+                if self._stop.wait(check_interval):
+                    return
+
+        self._thread = threading.Thread(target=run, name='catalogue-refresh', daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'case_types': len(self.case_types),
+                'filing_codes': len(self.filing_codes),
+                'years': len(self.years),
+                'age_seconds': round(time.time() - self.fetched_at) if self.fetched_at else None,
+                'refreshes': self.refreshes,
+                'refresh_errors': self.refresh_errors,
+            }
+
+
+# Shared catalogue used by the extractors and the app
+_catalogue = None
+_catalogue_lock = threading.Lock()
+
+
+def get_catalogue() -> Catalogue:
+    """Returns the shared catalogue, loading it with the defaults on first use."""
+    global _catalogue
+    with _catalogue_lock:
+        if _catalogue is None:
+            _catalogue = Catalogue()
+        return _catalogue
+
+
+def configure_catalogue(**kwargs) -> Catalogue:
+    """Replaces the shared catalogue with one built from the given settings."""
+    global _catalogue
+    with _catalogue_lock:
+        _catalogue = Catalogue(**kwargs)
+        return _catalogue
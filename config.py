@@ -0,0 +1,33 @@
+import os
+
+# Settings are read from environment variables named ENV_PREFIX + the setting's name in
+# upper case, e.g. CASE_SEARCH_BROWSER_POOL_SIZE for browser_pool_size.
+ENV_PREFIX = 'CASE_SEARCH_'
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def env(name: str, default):
+    """
+    Returns a setting from the environment, or default if it is not set.
+
+    The value is converted to the type of default (bool, int, float or str). A default
+    of None leaves the value as a string.
+
+    Raises:
+        ValueError: If the value cannot be converted.
+    """
+    key = ENV_PREFIX + name.upper()
+    value = os.environ.get(key)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        return value.strip().lower() in TRUE_VALUES
+    try:
+        if isinstance(default, int):
+            return int(value)
+        if isinstance(default, float):
+            return float(value)
+    except ValueError:
+        raise ValueError(f"{key} must be a number, got '{value}'")
+    return value
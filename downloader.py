@@ -0,0 +1,314 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from http_client import get_session
+from ratelimit import SiteUnavailable, get_site_limiter
+from sites import site_url
+
+logger = logging.getLogger(__name__)
+
+# Default downloader settings
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 2
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+DEFAULT_TIMEOUT = 60
+CHUNK_SIZE = 64 * 1024
+
+# Statuses worth retrying: rate limiting and server-side errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Order documents are PDFs. Anything else, such as an HTML error or login page
+# answered with a 200, is not stored.
+PDF_CONTENT_TYPE = 'application/pdf'
+PDF_MAGIC = b'%PDF-'
+
+
+class DownloadError(Exception):
+    """Raised when an order document could not be downloaded after all retries."""
+
+
+class _PermanentError(DownloadError):
+    """A failure that retrying will not fix, such as a 404."""
+
+
+def _check_pdf(path: str):
+    """Removes the partial file at path and raises DownloadError unless it starts like a PDF."""
+    with open(path, 'rb') as f:
+        magic = f.read(len(PDF_MAGIC))
+    if magic != PDF_MAGIC:
+        os.remove(path)
+        raise DownloadError(f"Not a PDF document (starts with {magic!r})")
+
+
+class OrderStore:
+    """
+    Content-addressed store of downloaded order documents.
+
+    Files live under objects/<first two hex digits>/<sha256>.pdf, so identical documents
+    are kept once. An SQLite index maps each order URL to its content hash, so a URL that
+    was downloaded for one case is never fetched again for another.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.partial_dir = os.path.join(directory, 'partial')
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, size INTEGER NOT NULL,'
+            ' content_type TEXT, fetched_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256)')
+        self._conn.commit()
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.directory, 'objects', sha256[:2], f'{sha256}.pdf')
+
+    def partial_path(self, url: str) -> str:
+        return os.path.join(self.partial_dir, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.part')
+
+    def lookup(self, url: str) -> str | None:
+        """Returns the content hash stored for url, if its file is still on disk and is a PDF."""
+        with self._lock:
+            row = self._conn.execute('SELECT sha256 FROM documents WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self.object_path(row[0]), 'rb') as f:
+                # Stores written before documents were checked may hold HTML pages
+                if f.read(len(PDF_MAGIC)) == PDF_MAGIC:
+                    return row[0]
+        except FileNotFoundError:
+            pass
+        return None
+
+    def add(self, url: str, partial_path: str, content_type: str | None) -> str:
+        """Moves a completed download into the store and indexes it. Returns its hash."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(partial_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        target = self.object_path(sha256)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            # Same document under another URL
+            os.remove(partial_path)
+        else:
+            os.replace(partial_path, target)
+
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO documents (url, sha256, size, content_type, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                (url, sha256, size, content_type, time.time()),
+            )
+            self._conn.commit()
+        return sha256
+
+    def forget(self, url: str):
+        """Drops url from the index, so it is downloaded again next time."""
+        with self._lock:
+            self._conn.execute('DELETE FROM documents WHERE url = ?', (url,))
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            urls, documents, size = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT sha256), COALESCE(SUM(size), 0) FROM documents'
+            ).fetchone()
+        return {'urls': urls, 'documents': documents, 'bytes': size}
+
+
+class Downloader:
+    """
+    Fetches order documents concurrently into an OrderStore.
+
+    Every fetch goes through the shared site limiter for its host, so downloads share
+    the court site's request budget and circuit with the extractors. While the circuit
+    is open, downloads fail at once instead of retrying. A response that is not a PDF,
+    going by its Content-Type or its first bytes, is retried and never stored.
+
+    Args:
+        store (OrderStore): Where the documents go.
+        workers (int): Total number of downloads running at once.
+        per_host (int): Downloads running at once against the same host.
+        retries (int): Attempts after the first one before giving up on a document.
+        backoff (float): Base delay in seconds; attempt n waits backoff * 2 ** (n - 1).
+        session (requests.Session): Session to use; the shared pooled one by default.
+    """
+
+    def __init__(self, store: OrderStore, workers: int = DEFAULT_WORKERS, per_host: int = DEFAULT_PER_HOST,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 timeout: float = DEFAULT_TIMEOUT, session: requests.Session | None = None):
+        self.store = store
+        self.workers = workers
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session
+        self.downloaded = 0
+        self.skipped = 0
+        self.resumed = 0
+        self.failed = 0
+        self._host_slots = {}
+        self._url_locks = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host)
+            return self._host_slots[host]
+
+    @contextmanager
+    def _url_lock(self, url: str):
+        """Holds the lock of url. A lock is dropped once nobody holds or waits for it."""
+        with self._lock:
+            entry = self._url_locks.get(url)
+            if entry is None:
+                entry = self._url_locks[url] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._url_locks[url]
+
+    def download(self, url: str) -> str:
+        """
+        Downloads one document unless the store already has it.
+
+        Returns:
+            str: The content hash of the document.
+
+        Raises:
+            DownloadError: If every attempt failed, or the host is unavailable.
+        """
+        # Two cases listing the same order must not fetch it twice at the same time
+        with self._url_lock(url):
+            sha256 = self.store.lookup(url)
+            if sha256:
+                with self._lock:
+                    self.skipped += 1
+                return sha256
+
+            last_error = None
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+                try:
+                    with self._host_slot(url):
+                        content_type = self._limited_fetch(url)
+                    sha256 = self.store.add(url, self.store.partial_path(url), content_type)
+                    with self._lock:
+                        self.downloaded += 1
+                    return sha256
+                except _PermanentError as e:
+                    last_error = e
+                    logger.warning("Download of %s failed: %s", url, e)
+                    break
+                except SiteUnavailable as e:
+                    last_error = e
+                    logger.warning("Not downloading %s: %s", url, e)
+                    break
+                except (requests.RequestException, DownloadError) as e:
+                    last_error = e
+                    logger.warning("Download of %s failed (attempt %d): %s", url, attempt + 1, e)
+
+            with self._lock:
+                self.failed += 1
+            raise DownloadError(f"Could not download {url}: {last_error}")
+
+    def _limited_fetch(self, url: str) -> str | None:
+        """Runs _fetch within the site limiter's budget for the url's host. A permanent error is not a site failure."""
+        permanent = None
+        with get_site_limiter().request(urlparse(url).netloc):
+            try:
+                return self._fetch(url)
+            except _PermanentError as e:
+                # The site answered; the document is just not there
+                permanent = e
+        raise permanent
+
+    def _fetch(self, url: str) -> str | None:
+        """Streams url into its partial file, resuming it with a Range request if one exists."""
+        session = self.session or get_session()
+        partial = self.store.partial_path(url)
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        with session.get(site_url(url), headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # The partial file already holds the whole document
+                _check_pdf(partial)
+                return response.headers.get('Content-Type')
+            if response.status_code in RETRY_STATUSES:
+                raise DownloadError(f"HTTP {response.status_code}")
+            if response.status_code not in (200, 206):
+                raise _PermanentError(f"HTTP {response.status_code}")
+            content_type = response.headers.get('Content-Type')
+            if (content_type or '').split(';')[0].strip().lower() != PDF_CONTENT_TYPE:
+                raise DownloadError(f"Not a PDF document (Content-Type {content_type})")
+
+            if response.status_code == 206 and offset:
+                mode = 'ab'
+                with self._lock:
+                    self.resumed += 1
+            else:
+                # The server ignored the Range header and sent the whole file
+                mode = 'wb'
+
+            with open(partial, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+        _check_pdf(partial)
+        return content_type
+
+    def download_all(self, urls: list) -> dict:
+        """
+        Downloads many documents concurrently.
+
+        Returns:
+            dict: url -> content hash, or url -> None for documents that failed.
+        """
+        unique_urls = list(dict.fromkeys(urls))
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='download') as executor:
+            futures = {url: executor.submit(self.download, url) for url in unique_urls}
+            for url, future in futures.items():
+                try:
+                    results[url] = future.result()
+                except DownloadError:
+                    results[url] = None
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'downloaded': self.downloaded,
+                'skipped': self.skipped,
+                'resumed': self.resumed,
+                'failed': self.failed,
+            }
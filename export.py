@@ -0,0 +1,309 @@
+"""
+Export of case and order data.
+
+Writes case data (as built by build_case_data) to JSON, NDJSON, CSV, Parquet or Arrow,
+or to an ICS calendar of the next hearing dates, without rendering any PDF. Every
+writer takes an iterable and streams it, so thousands of cases can be exported at once.
+
+The tabular formats have one row per order, with the case columns repeated on each
+row; cases without orders get a single row with empty order columns. Parquet and Arrow
+need pyarrow; without it those exports fall back to CSV.
+
+Usage:
+    python export.py results.ndjson --format parquet --output cases.parquet
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import re
+import sys
+import time
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # optional dependency, only needed for Parquet and Arrow
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('json', 'ndjson', 'csv', 'parquet', 'arrow', 'ics')
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.file',
+    'ics': 'text/calendar',
+}
+
+# Columns of the tabular exports, in order
+COLUMNS = (
+    'case_type', 'case_number', 'case_year', 'petitioner', 'respondent', 'next_date',
+    'last_date', 'court_no', 'filing_date', 'order_index', 'order_date', 'order_link',
+)
+
+# Rows per Parquet row group / Arrow record batch, and per chunk of streamed text
+ROW_GROUP_SIZE = 50_000
+TEXT_CHUNK_ROWS = 1000
+
+DATE_PATTERN = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+# The label the case-status page puts before the court number, e.g. 'COURT NO:12'
+COURT_LABEL_PATTERN = re.compile(r'^\s*COURT\s*NO\.?\s*:?\s*', re.I)
+ICS_PRODID = '-//H_COURT_DEL//Case Search//EN'
+ICS_UID_DOMAIN = 'delhihighcourt.nic.in'
+
+
+def build_case_data(case_type: str, case_number: str, year: str, result: dict) -> dict:
+    """Builds the case_data dictionary the PDF generator and the exports take from a search result."""
+    case_data = {
+        'case_type': case_type,
+        'case_number': case_number,
+        'case_year': year,
+        'petitioner': result['petitioner'],
+        'respondent': result['respondent'],
+        'next_date': result.get('next_date'),
+        'last_date': result['last_date'],
+        'court_no': result['court_no'],
+        'orders': {
+            'link': [order['link'] for order in result['orders']],
+            'order_dates': [order['date'] for order in result['orders']]
+        }
+    }
+    if result.get('filing_date'):
+        case_data['filing_date'] = result['filing_date']
+    return case_data
+
+
+def iter_case_data(records):
+    """Yields the case data of the successful records of a batch run (see batch.run_batch)."""
+    for record in records:
+        if record.get('status') == 'ok':
+            yield build_case_data(record['case_type'], record['case_number'], record['year'], record['result'])
+
+
+def parse_date(value) -> str | None:
+    """Returns the first DD/MM/YYYY date in value as YYYY-MM-DD, or None."""
+    match = DATE_PATTERN.search(value) if isinstance(value, str) else None
+    if match is None:
+        return None
+    day, month, year = match.groups()
+    return f'{year}-{month}-{day}'
+
+
+def iter_rows(cases):
+    """Yields one flat row (a tuple in COLUMNS order) per order of every case."""
+    for case_data in cases:
+        head = (
+            case_data.get('case_type'),
+            case_data.get('case_number'),
+            case_data.get('case_year'),
+            case_data.get('petitioner'),
+            case_data.get('respondent'),
+            case_data.get('next_date'),
+            case_data.get('last_date'),
+            case_data.get('court_no'),
+            case_data.get('filing_date'),
+        )
+        orders = case_data.get('orders') or {}
+        links = orders.get('link', [])
+        dates = orders.get('order_dates', [])
+        if not links:
+            yield head + (None, None, None)
+            continue
+        for index, (date, link) in enumerate(zip(dates, links), 1):
+            yield head + (index, date, link)
+
+
+def iter_json(cases):
+    """Yields a JSON array of the case data, one case per chunk."""
+    yield '['
+    for i, case_data in enumerate(cases):
+        yield (',\n' if i else '\n') + json.dumps(case_data, ensure_ascii=False)
+    yield '\n]\n'
+
+
+def iter_ndjson(cases):
+    """Yields the case data as NDJSON, one line per case."""
+    for case_data in cases:
+        yield json.dumps(case_data, ensure_ascii=False) + '\n'
+
+
+def iter_csv(cases):
+    """Yields the flat rows as CSV with a header, in chunks of TEXT_CHUNK_ROWS rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for count, row in enumerate(iter_rows(cases), 1):
+        writer.writerow(row)
+        if count % TEXT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ics_escape(text: str) -> str:
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _ics_line(line: str) -> str:
+    """Folds a content line at 75 octets, as RFC 5545 requires."""
+    parts = []
+    current = ''
+    size = 0
+    for char in line:
+        length = len(char.encode('utf-8'))
+        if size + length > 75:
+            parts.append(current)
+            current = ' '
+            size = 1
+        current += char
+        size += length
+    parts.append(current)
+    return '\r\n'.join(parts) + '\r\n'
+
+
+def iter_ics(cases):
+    """
+    Yields an iCalendar file with an all-day event on the next hearing date (next_date)
+    of each case. Cases without one, e.g. disposed cases, are left out.
+    """
+    stamp = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+    yield _ics_line('BEGIN:VCALENDAR') + _ics_line('VERSION:2.0') + _ics_line(f'PRODID:{ICS_PRODID}')
+    yield _ics_line('CALSCALE:GREGORIAN') + _ics_line('X-WR-CALNAME:Delhi High Court hearings')
+    for case_data in cases:
+        hearing = parse_date(case_data.get('next_date'))
+        if hearing is None:
+            continue
+        case_name = f"{case_data.get('case_type')} {case_data.get('case_number')}/{case_data.get('case_year')}"
+        parties = f"{case_data.get('petitioner', 'N/A')} vs {case_data.get('respondent', 'N/A')}"
+        uid = hashlib.sha1(f'{case_name}|{hearing}'.encode('utf-8')).hexdigest()
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:{uid}@{ICS_UID_DOMAIN}',
+            f'DTSTAMP:{stamp}',
+            f"DTSTART;VALUE=DATE:{hearing.replace('-', '')}",
+            f'SUMMARY:{_ics_escape(case_name + " hearing")}',
+            f'DESCRIPTION:{_ics_escape(parties)}',
+        ]
+        court_no = COURT_LABEL_PATTERN.sub('', case_data.get('court_no') or '').strip()
+        if court_no:
+            location = f"Delhi High Court, Court No. {court_no}"
+            lines.append(f'LOCATION:{_ics_escape(location)}')
+        lines.append('END:VEVENT')
+        yield ''.join(_ics_line(line) for line in lines)
+    yield _ics_line('END:VCALENDAR')
+
+
+TEXT_WRITERS = {'json': iter_json, 'ndjson': iter_ndjson, 'csv': iter_csv, 'ics': iter_ics}
+
+
+def _arrow_schema():
+    return pyarrow.schema([
+        (column, pyarrow.int32() if column == 'order_index' else pyarrow.string())
+        for column in COLUMNS
+    ])
+
+
+def _row_batches(cases, size: int = ROW_GROUP_SIZE):
+    """Yields the flat rows as column-oriented Arrow tables of at most `size` rows."""
+    schema = _arrow_schema()
+
+    def table(columns):
+        arrays = [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)]
+        return pyarrow.Table.from_arrays(arrays, schema=schema)
+
+    columns = [[] for _ in COLUMNS]
+    count = 0
+    for row in iter_rows(cases):
+        for values, value in zip(columns, row):
+            values.append(value if value is None or isinstance(value, int) else str(value))
+        count += 1
+        if count == size:
+            yield table(columns)
+            columns = [[] for _ in COLUMNS]
+            count = 0
+    if count:
+        yield table(columns)
+
+
+def write_columnar(cases, path: str, fmt: str = 'parquet'):
+    """Writes the flat rows to a Parquet or Arrow IPC file, one row group per ROW_GROUP_SIZE rows."""
+    schema = _arrow_schema()
+    if fmt == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pyarrow.ipc.new_file(path, schema)
+    try:
+        for table in _row_batches(cases):
+            writer.write_table(table)
+    finally:
+        writer.close()
+
+
+def resolve_format(fmt: str) -> str:
+    """Returns the format that will actually be written: Parquet and Arrow become CSV without pyarrow."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    if fmt in COLUMNAR_FORMATS and pyarrow is None:
+        logger.warning("pyarrow is not installed; exporting CSV instead of %s", fmt)
+        return 'csv'
+    return fmt
+
+
+def export_file(cases, path: str, fmt: str) -> str:
+    """
+    Writes cases to a file.
+
+    Args:
+        cases: An iterable of case data dictionaries.
+        path (str): The file to write.
+        fmt (str): One of FORMATS.
+
+    Returns:
+        str: The format written, which is 'csv' when a columnar format was asked for
+             but pyarrow is not installed.
+    """
+    fmt = resolve_format(fmt)
+    if fmt in COLUMNAR_FORMATS:
+        write_columnar(cases, path, fmt)
+    else:
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(TEXT_WRITERS[fmt](cases))
+    return fmt
+
+
+def _read_records(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export batch search results without generating PDFs.')
+    parser.add_argument('input', help="NDJSON output of batch.py ('-' for stdin)")
+    parser.add_argument('--format', '-f', choices=FORMATS, default='csv')
+    parser.add_argument('--output', '-o', required=True, help='File to write')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+
+    stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    try:
+        written = export_file(iter_case_data(_read_records(stream)), args.output, args.format)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"Exported {written} to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,67 @@
-from playwright.sync_api import sync_playwright, Page
+from playwright.sync_api import Page
+from browser_pool import get_pool
+from catalogue import get_catalogue
+from http_client import fetch_html, needs_javascript
+from order_parser import parse_orders
+from report import write_report
+from metrics import record_error, span
+from ratelimit import CASE_STATUS_HOST, FILING_DATE_HOST, SiteUnavailable, get_site_limiter
+from readiness import (NoRecordsFound, SessionRejected, clear_results, wait_for_case_results,
+                       wait_for_filing_date, wait_for_orders)
+from sessions import CASE_STATUS_FORM, FILING_DATE_FORM
+from sites import CASE_STATUS_SITE, site_url
 from bs4 import BeautifulSoup
-import time
-from fpdf import FPDF
-import os
-import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _run_page(host: str, fn, *args, form=None) -> str | None:
+    """
+    Runs fn(page, *args) on a pooled browser within the shared limiter's budget for
+    host, and tells the limiter how it went. A page function returning None or raising
+    counts as a failure; a search that finds no records does not. The browser is leased
+    and checked before the limiter starts timing, so waiting for a free browser or
+    relaunching one is not taken for the site being slow or failing.
+
+    With a form (sessions.Form), fn runs on the page the browser keeps on that form
+    and only fills it in and submits it.
+
+    Returns:
+        str | None: What fn returned, or None if it failed, no records were found or
+                    host is unavailable.
+    """
+    try:
+        pool = get_pool()
+        worker = pool.lease()
+    except Exception as e:
+        logger.error("No browser available for the search: %s", e)
+        return None
+    try:
+        worker.check().result()
+        with get_site_limiter().request(host) as outcome:
+            try:
+                future = worker.submit_form(form, fn, *args) if form else worker.submit(fn, *args)
+                page_html = future.result()
+            except NoRecordsFound as e:
+                logger.info("%s", e)
+                return None
+            except Exception as e:
+                logger.error("An error occurred during automation: %s", e)
+                outcome.failed()
+                return None
+            if page_html is None:
+                outcome.failed()
+            return page_html
+    except SiteUnavailable as e:
+        logger.warning("Not contacting the court site: %s", e)
+        return None
+    except Exception as e:
+        logger.error("Could not get the browser ready: %s", e)
+        return None
+    finally:
+        pool.release(worker)
+
 
 # Case URL for order search
 def submit_case_search(case_type: str, case_number: str, year: str) -> str | None:
@@ -18,81 +76,62 @@ def submit_case_search(case_type: str, case_number: str, year: str) -> str | Non
     Returns:
         str | None: The HTML content of the results page if successful, otherwise None.
     """
-    with sync_playwright() as p:
-        browser = None
-        try:
-            # Try to launch a Chromium browser first
-            browser = p.chromium.launch(headless=True)
-        except Exception as e:
-            print(f"Error launching Chromium: {e}")
-            try:
-                # Fallback to Firefox if Chromium fails
-                browser = p.firefox.launch(headless=True)
-            except Exception as e:
-                print(f"Error launching Firefox: {e}")
-                print("Could not initialize any browser.")
-                return None
+    with span('case_search'):
+        page_html = _run_page(CASE_STATUS_HOST, _case_search_page, case_type, case_number, year,
+                              form=CASE_STATUS_FORM)
+    if page_html is None:
+        record_error('case_search')
+    return page_html
 
-        if not browser:
-            return None
 
-        page: Page = browser.new_page()
-        court_url = "https://delhihighcourt.nic.in/app/get-case-type-status"
+def _case_search_page(page: Page, case_type: str, case_number: str, year: str) -> str:
+    # The page already shows the case-status form, loaded by the browser's form session
+    clear_results(page)
 
-        try:
-            print(f"Navigating to {court_url}...")
-            page.goto(court_url)
-            print("Page loaded successfully.")
-
-            # Locate elements using Playwright's locator API
-            case_type_element = page.locator('#case_type')
-            case_number_element = page.locator('#case_number')
-            case_year_element = page.locator('#case_year')
-            submit_button_element = page.locator('#search')
-
-            captcha_code_element = page.locator('#captcha-code')
-            captcha_input_element = page.locator('#captchaInput')
-
-            # Get the captcha text. Playwright's text_content() is robust.
-            captcha_text = captcha_code_element.text_content()
-            if not captcha_text:
-                print("Could not retrieve captcha text. Exiting.")
-                return None
+    # Locate elements using Playwright's locator API
+    case_type_element = page.locator('#case_type')
+    case_number_element = page.locator('#case_number')
+    case_year_element = page.locator('#case_year')
+    submit_button_element = page.locator('#search')
 
-            print(f"Filling form with Case Type: {case_type}, Number: {case_number}, Year: {year}, Captcha: {captcha_text}")
+    captcha_code_element = page.locator('#captcha-code')
+    captcha_input_element = page.locator('#captchaInput')
 
-            # Fill the input fields
-            case_type_element.select_option(label=case_type)
-            case_number_element.fill(case_number)
-            case_year_element.select_option(year)
-            captcha_input_element.fill(captcha_text)
+    with span('case_search.form'):
+        # Get the captcha text. Playwright's text_content() is robust.
+        captcha_text = captcha_code_element.text_content()
+        if not captcha_text:
+            raise SessionRejected("Could not retrieve captcha text.")
 
-            # Click the submit button
-            print("Clicking submit button...")
-            submit_button_element.click()
+        logger.debug("Filling form with Case Type: %s, Number: %s, Year: %s, Captcha: %s",
+                     case_type, case_number, year, captcha_text)
 
-            # Wait for navigation or specific element to appear after submission
-            # Using page.wait_for_load_state('networkidle') is often more reliable
-            # than a fixed sleep, as it waits until network activity is minimal.
-            print("Waiting for results to load (network idle)...")
-            page.wait_for_load_state('networkidle')
-            print("Results page loaded successfully.")
+        # Fill the input fields
+        case_type_element.select_option(label=case_type)
+        case_number_element.fill(case_number)
+        case_year_element.select_option(year)
+        captcha_input_element.fill(captcha_text)
 
-            # Get the page content
-            page_html = page.content()
-            return page_html
+        # Click the submit button
+        submit_button_element.click()
 
-        except Exception as e:
-            print(f"An error occurred during automation: {e}")
-            return None
-        finally:
-            if browser:
-                browser.close()
-                print("Browser closed.")
+    # Wait for the result row itself rather than for the network to go quiet,
+    # which the site's analytics scripts can put off for a long time.
+    with span('case_search.wait'):
+        wait_for_case_results(page)
+
+    # Get the page content
+    with span('case_search.content'):
+        return page.content()
 
 
 #Function to extract the Case deatils and URL file for orderds
 def extract_details(result:str):
+    with span('case_details'):
+        return _extract_details(result)
+
+
+def _extract_details(result:str):
     soup = BeautifulSoup(result, 'html.parser')
     #print(soup)
     # Find the specific row (<tr>) that contains the data
@@ -114,140 +153,103 @@ def extract_details(result:str):
     # Clean and assign the extracted values
     petitioner_name = petitioner_respondent_list[0]
     respondent_name = petitioner_respondent_list[2]
+    next_date = date_court_list[0].strip()
     last_date = date_court_list[1].strip()
     court_no = date_court_list[2].strip()
     # print(petitioner_name, respondent_name, last_date, court_no)
     
     # Print the extracted information
 
-    result_url=soup.find('a', href=lambda href: href and href.startswith("https://delhihighcourt.nic.in/app/case-type-status-details/"))
+    result_url=soup.find('a', href=lambda href: href and href.startswith(f"{CASE_STATUS_SITE}/app/case-type-status-details/"))
     if result_url:
-        return result_url.get('href'),petitioner_name, respondent_name, last_date, court_no
+        return result_url.get('href'),petitioner_name, respondent_name, next_date, last_date, court_no
     
 
 # Function to submit order search and extract URLs
 def submit_order_search(court_url: str):
-    
-    with sync_playwright() as p:
-        browser = None
+    # The orders page is usually server-rendered, so try a plain HTTP GET first
+    # and only use a browser when the page turns out to need JavaScript.
+    with span('orders_page'):
+        # Links on the case-status page point at the real site
+        court_url = site_url(court_url)
         try:
-            # Try to launch a Chromium browser first
-            browser = p.chromium.launch(headless=True)
-        except Exception as e:
-            print(f"Error launching Chromium: {e}")
-            try:
-                # Fallback to Firefox if Chromium fails
-                browser = p.firefox.launch(headless=True)
-            except Exception as e:
-                print(f"Error launching Firefox: {e}")
-                print("Could not initialize any browser.")
-                return None
-
-        if not browser:
+            with span('orders_page.http'), get_site_limiter().request(CASE_STATUS_HOST) as outcome:
+                page_html = fetch_html(court_url)
+                if page_html is None:
+                    outcome.failed()
+        except SiteUnavailable as e:
+            logger.warning("Not contacting the court site: %s", e)
+            record_error('orders_page')
             return None
+        if page_html and not needs_javascript(page_html):
+            return page_html
+        if page_html:
+            logger.debug("Order page needs JavaScript, falling back to the browser.")
 
-        page: Page = browser.new_page()
+        page_html = _run_page(CASE_STATUS_HOST, _order_search_page, court_url)
+    if page_html is None:
+        record_error('orders_page')
+    return page_html
 
-        try:
-            #print(f"Navigating to {court_url}...")
-            page.goto(court_url)
-            print("Page loaded successfully.")
 
+def _order_search_page(page: Page, court_url: str) -> str | None:
+    try:
+        logger.debug("Navigating to %s", court_url)
+        with span('orders_page.goto'):
+            page.goto(court_url, wait_until='domcontentloaded')
 
-            print("Waiting for results to load (network idle)...")
-            page.wait_for_load_state('networkidle')
-            print("Results page loaded successfully.")
+        with span('orders_page.wait'):
+            wait_for_orders(page)
 
-            # Get the page content
+        # Get the page content
+        with span('orders_page.content'):
             page_html = page.content()
-            return page_html
+        return page_html
 
-        except Exception as e:
-            print(f"An error occurred during automation: {e}")
-            return None
-        finally:
-            if browser:
-                browser.close()
-                print("Browser closed.")
+    except Exception as e:
+        logger.error("An error occurred during automation: %s", e)
+        return None
 
 
 #Function to extract the Case URL file for orderds
 def extract_url(result:str, data:dict):
-    soup = BeautifulSoup(result, 'html.parser')
-    all_text_content = soup.stripped_strings
-    dates=[]
-    # Iterate through all the text strings found by BeautifulSoup
-    for text_string in all_text_content:
-    # Split the string by spaces to get individual words or parts
-        words = text_string.split()
-        for word in words:
-            # Manually check if the word is a date without a separate function
-            # This is the combined logic from the old is_date function.
-            if (len(word) == 10 and 
-                word[2] == '/' and 
-                word[5] == '/' and 
-                word[:2].isdigit() and 
-                word[3:5].isdigit() and 
-                word[6:].isdigit()):
-                dates.append(word)
-
-    result_url=soup.find_all('a', href=lambda href: href and href.startswith("https://delhihighcourt.nic.in/app/showlogo/"))
+    orders_list = parse_orders(result)
     order = {}
-    urls = []
-    j=1
-    for _ in result_url:
-        urls.append(_.get('href'))
-    order['link']=urls
-    order['order_dates']=dates
-    data['orders']=order
-    if result_url:
+    order['link'] = [o['link'] for o in orders_list]
+    order['order_dates'] = [o['date'] for o in orders_list]
+    data['orders'] = order
+    if orders_list:
         return data
     
 
 #Get Filing Date
 def get_filing_date(case_type: str, case_number: str, year: str):
-    court_url = "https://dhcmisc.nic.in/pcase/guiCaseWise.php"
-
-    with sync_playwright() as p:
-        # Launch headless Chromium
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
-        try:
-            # Go to the court URL
-            page.goto(court_url, timeout=60000)
-
-            # Fill form fields
-            page.select_option('#ctype', case_type)
-            page.fill('#regno', case_number)
-            page.select_option('#regyr', year)
-
-            # Get captcha text directly from the element
-            captcha_text = page.inner_text('#cap').strip()
-            page.fill('input[name="captcha_code"]', captcha_text)
-
-            # Click submit button
-            page.click('input[name="Submit"]')
-
-            print("Waiting for results to load...")
-            time.sleep(5)  # can be replaced with proper wait
-
-            # Get page content for BeautifulSoup
-            page_html = page.content()
-
-        except Exception as e:
-            print(f"An error occurred: {e}")
-            browser.close()
-            return None
-
-        browser.close()
+    # The case-wise form lists case types by its own codes, known once the catalogue is
+    # refreshed. Until then the case-status label is sent, which the form also accepts.
+    filing_case_type = get_catalogue().filing_code(case_type) or case_type
+    with span('filing_date'):
+        page_html = _run_page(FILING_DATE_HOST, _filing_date_page, filing_case_type, case_number, year,
+                              form=FILING_DATE_FORM)
+        filing_date = parse_filing_date(page_html) if page_html else None
+    if filing_date is None:
+        record_error('filing_date')
+    return filing_date
+
+
+def parse_filing_date(page_html: str) -> str | None:
+    """
+    Parses the filing date out of the dhcmisc.nic.in case-wise results page.
 
+    Returns:
+        str | None: The filing date as DD/MM/YYYY, or None if it could not be found.
+    """
     # Parse filing date with BeautifulSoup
     try:
-        html = BeautifulSoup(page_html, 'html.parser')
-        target_elements = html.find(id="form3")
-        data = target_elements.find('table')
-        filing_date = data.find('tbody').find('tr').find_all('td')[-1].text.strip().split("-")
+        with span('filing_date.parse'):
+            html = BeautifulSoup(page_html, 'html.parser')
+            target_elements = html.find(id="form3")
+            data = target_elements.find('table')
+            filing_date = data.find('tbody').find('tr').find_all('td')[-1].text.strip().split("-")
 
         date_map = {
             'jan': '01',
@@ -267,15 +269,41 @@ def get_filing_date(case_type: str, case_number: str, year: str):
         try:
             filing_date[1] = date_map[filing_date[1].strip().lower()]
         except KeyError:
-            print("Invalid month in date")
+            logger.warning("Invalid month in filing date: %s", filing_date[1])
 
         return f"{filing_date[2]}/{filing_date[1]}/{filing_date[0]}"
 
     except Exception as e:
-        print(f"An error occurred while parsing the filing date: {e}")
+        logger.error("An error occurred while parsing the filing date: %s", e)
         return None
 
 
+def _filing_date_page(page: Page, case_type: str, case_number: str, year: str) -> str:
+    # The page already shows the case-wise form, loaded by the browser's form session
+    clear_results(page)
+
+    with span('filing_date.form'):
+        # Fill form fields
+        page.select_option('#ctype', case_type)
+        page.fill('#regno', case_number)
+        page.select_option('#regyr', year)
+
+        # Get captcha text directly from the element
+        captcha_text = page.inner_text('#cap').strip()
+        page.fill('input[name="captcha_code"]', captcha_text)
+
+        # Click submit button
+        page.click('input[name="Submit"]')
+
+    # The results are rendered in place, so wait for the results table
+    with span('filing_date.wait'):
+        wait_for_filing_date(page)
+
+    # Get page content for BeautifulSoup
+    with span('filing_date.content'):
+        return page.content()
+
+
 # Function to extract case details and generate PDF
 def order_extractor(user_case_type, user_case_number, user_case_year):
     data={
@@ -287,11 +315,11 @@ def order_extractor(user_case_type, user_case_number, user_case_year):
     
     result_html = extract_details(submit_case_search(user_case_type, user_case_number, user_case_year))
     if result_html:
-        print("Next step: Parse the returned HTML.")
         data['Petitioner']= result_html[1]
         data['Respondent']= result_html[2]
-        data['Last Date']= result_html[3]
-        data['Court No']= result_html[4]
+        data['Next Date']= result_html[3]
+        data['Last Date']= result_html[4]
+        data['Court No']= result_html[5]
         data_n={}
         order=(submit_order_search(result_html[0]))
         if order:
@@ -300,13 +328,6 @@ def order_extractor(user_case_type, user_case_number, user_case_year):
     data_n['Filing Date']=get_filing_date(user_case_type, user_case_number, user_case_year)
     return data 
 
-def get_pdf_filename(data):
-    """Helper function to create a filename based on case data."""
-    case_type = data.get('case_type', 'case')
-    case_number = data.get('case_number', '0000')
-    case_year = data.get('case_year', '0000')
-    return f"{case_type}_{case_number}_{case_year}_details.pdf"
-
 def pdf_generator(pdf_data, save_to_disk=True):
     """
     Generates a PDF document from case data.
@@ -314,173 +335,34 @@ def pdf_generator(pdf_data, save_to_disk=True):
     Args:
         pdf_data (dict): A dictionary containing case information.
         save_to_disk (bool): If True, saves the PDF to a temporary file.
-                             If False, returns the PDF as a string.
+                             If False, returns the PDF content as bytes.
     
     Returns:
-        str: The file path if saved to disk, or the PDF content as a string.
+        str: The file path if saved to disk, or the PDF content as bytes.
     """
-    if not pdf_data:
-        print("No data available to generate PDF.")
-        return None
+    return write_report(pdf_data, save_to_disk)
 
-    # Strip prefix from last date string
-    last_date = pdf_data.get('Last Date', 'N/A')
-    if isinstance(last_date, str) and last_date.startswith('Last Date: '):
-        last_date = last_date.replace('Last Date', '')
-
-    # Initialize PDF object
-    pdf = FPDF()
-    pdf.add_page()
-
-    # ======= HEADER =======
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 12, 'DELHI HIGH COURT', ln=True, align='C')
-    pdf.ln(5)
-
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, f"{pdf_data['case_type']} {pdf_data['case_number']}/{pdf_data['case_year']}", ln=True, align='C')
-    pdf.ln(10)
-
-    # ======= CASE INFORMATION =======
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'CASE INFORMATION', ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    pdf.set_font('Arial', '', 10)
-    case_info = [
-        ("Case Type:", pdf_data.get('case_type', 'N/A')),
-        ("Case Number:", pdf_data.get('case_number', 'N/A')),
-        ("Year:", pdf_data.get('case_year', 'N/A')),
-        ("Filing Date:", pdf_data.get('Filing Date', 'N/A')),
-        ("Last Date:", last_date),
-        ("Court No:", pdf_data.get('Court No', 'N/A')),
-    ]
-
-    for label, value in case_info:
-        pdf.cell(50, 6, label)
-        pdf.cell(0, 6, str(value), ln=True)
-
-    pdf.ln(8)
-
-    # ======= PARTIES =======
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'PARTIES', ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    pdf.set_font('Arial', '', 10)
-    pdf.cell(50, 6, 'Petitioner:')
-    pdf.multi_cell(0, 6, pdf_data.get('Petitioner', 'N/A'))
-    pdf.ln(2)
-
-    pdf.cell(50, 6, 'Respondent:')
-    pdf.multi_cell(0, 6, pdf_data.get('Respondent', 'N/A'))
-    pdf.ln(8)
-
-    # ======= ORDERS & DOCUMENTS =======
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'ORDERS & DOCUMENTS', ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    pdf.set_font('Arial', '', 10)
-    
-    # Get the lists of links and dates from the nested dictionary
-    orders_data = pdf_data.get('orders', {})
-    links = orders_data.get('link', [])
-    dates = orders_data.get('order_dates', [])
-    
-    # Check if we have orders and that the lists have the same length
-    if links and dates and len(links) == len(dates):
-        for idx, (order_date, link) in enumerate(zip(dates, links), 1):
-            # Order number and date
-            pdf.cell(15, 6, f"{idx}.")
-            pdf.cell(30, 6, "Date:")
-            pdf.cell(40, 6, order_date)
-
-            # Clickable link
-            link_text = "Click to view document"
-            pdf.set_text_color(0, 0, 255)
-            pdf.set_font('Arial', 'U', 10)
-            pdf.cell(0, 6, link_text, ln=True, link=link)
-
-            # Reset styling
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font('Arial', '', 10)
-
-            # Show URL preview
-            pdf.set_font('Arial', '', 8)
-            pdf.set_text_color(100, 100, 100)
-            url_display = link[:80] + ('...' if len(link) > 80 else '')
-            pdf.cell(65, 4, "")
-            pdf.cell(0, 4, f"URL: {url_display}", ln=True)
-
-            # Reset
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.ln(3)
-    else:
-        pdf.cell(0, 6, 'No orders available', ln=True)
-
-    # ======= FOOTER =======
-    pdf.ln(10)
-    pdf.set_font('Arial', 'I', 8)
-    pdf.cell(0, 6, f'Generated on: {time.strftime("%Y-%m-%d %H:%M:%S")}', ln=True, align='C')
-
-    # ======= SAVE OR RETURN =======
-    if save_to_disk:
-        temp_dir = os.path.join(tempfile.gettempdir(), 'court_case_pdfs')
-        os.makedirs(temp_dir, exist_ok=True)
-        file_path = os.path.join(temp_dir, get_pdf_filename(pdf_data))
-        pdf.output(file_path)
-        print(f"PDF saved to: {file_path}")
-        return file_path
-    else:
-        return pdf.output(dest='S').encode('latin1')
-
-def extract_order_details_list(result:str):
+def extract_order_details_list(result:str, backend: str | None = None):
     """
     Parses the HTML content of the order details page and returns a list of dictionaries.
     Each dictionary contains the date and a link to the order PDF.
+
+    The orders table is read in a single pass, row by row, and each date is paired
+    with the order link in the same row.
     
     Args:
         result (str): The HTML content of the order details page.
+        backend (str | None): Parser backend ('selectolax', 'lxml' or 'html.parser').
+                              If None, the fastest installed one is used.
         
     Returns:
         list: A list of dictionaries with 'date' and 'link' keys.
     """
-    soup = BeautifulSoup(result, 'html.parser')
-    orders_list = []
-    
-    # Extract order dates from the HTML text
-    all_text_content = soup.stripped_strings
-    dates = []
-    for text_string in all_text_content:
-        words = text_string.split()
-        for word in words:
-            if (len(word) == 10 and 
-                word[2] == '/' and 
-                word[5] == '/' and 
-                word[:2].isdigit() and 
-                word[3:5].isdigit() and 
-                word[6:].isdigit()):
-                dates.append(word)
-
-    # Extract all order links
-    result_urls = soup.find_all('a', href=lambda href: href and href.startswith("https://delhihighcourt.nic.in/app/showlogo/"))
-    
-    # Combine dates and links into a list of dictionaries
-    if len(dates) == len(result_urls):
-        for i in range(len(dates)):
-            orders_list.append({
-                'date': dates[i],
-                'link': result_urls[i].get('href')
-            })
-
-    return orders_list
+    with span('orders_list'):
+        return parse_orders(result, backend)
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     case_type = "W.P.(C)"
     case_number = "4352"
     year = "2025"
@@ -488,9 +370,9 @@ if __name__ == "__main__":
     pdf_file = pdf_generator(pdf_data)
     
     if pdf_file:
-        print(f"PDF generated successfully: {pdf_file}")
+        logger.info("PDF generated successfully: %s", pdf_file)
 
-def pdf_generator_v2(pdf_data, save_to_disk=True, temp_dir=None):
+def pdf_generator_v2(pdf_data, save_to_disk=True, temp_dir=None, filename=None):
     """
     Generates a PDF document from case data, allowing the save directory to be specified.
     
@@ -499,126 +381,9 @@ def pdf_generator_v2(pdf_data, save_to_disk=True, temp_dir=None):
         save_to_disk (bool): If True, saves the PDF to a temporary file.
         temp_dir (str): The path to the directory where the PDF should be saved.
                         If None, a default directory is used.
+        filename (str): The file name to save under. If None, report.get_pdf_filename() is used.
     
     Returns:
-        str: The file path if saved to disk, or the PDF content as a string.
+        str: The file path if saved to disk, or the PDF content as bytes.
     """
-    if not pdf_data:
-        print("No data available to generate PDF.")
-        return None
-
-    # Strip prefix from last date string
-    last_date = pdf_data.get('Last Date', 'N/A')
-    if isinstance(last_date, str) and last_date.startswith('Last Date: '):
-        last_date = last_date.replace('Last Date', '')
-
-    # Initialize PDF object
-    pdf = FPDF()
-    pdf.add_page()
-
-    # ======= HEADER =======
-    pdf.set_font('Arial', 'B', 16)
-    pdf.cell(0, 12, 'DELHI HIGH COURT', ln=True, align='C')
-    pdf.ln(5)
-
-    pdf.set_font('Arial', 'B', 14)
-    pdf.cell(0, 10, f"{pdf_data['case_type']} {pdf_data['case_number']}/{pdf_data['case_year']}", ln=True, align='C')
-    pdf.ln(10)
-
-    # ======= CASE INFORMATION =======
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'CASE INFORMATION', ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    pdf.set_font('Arial', '', 10)
-    case_info = [
-        ("Case Type:", pdf_data.get('case_type', 'N/A')),
-        ("Case Number:", pdf_data.get('case_number', 'N/A')),
-        ("Year:", pdf_data.get('case_year', 'N/A')),
-        ("Filing Date:", pdf_data.get('Filing Date', 'N/A')),
-        ("Last Date:", last_date),
-        ("Court No:", pdf_data.get('Court No', 'N/A')),
-    ]
-
-    for label, value in case_info:
-        pdf.cell(50, 6, label)
-        pdf.cell(0, 6, str(value), ln=True)
-
-    pdf.ln(8)
-
-    # ======= PARTIES =======
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'PARTIES', ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    pdf.set_font('Arial', '', 10)
-    pdf.cell(50, 6, 'Petitioner:')
-    pdf.multi_cell(0, 6, pdf_data.get('Petitioner', 'N/A'))
-    pdf.ln(2)
-
-    pdf.cell(50, 6, 'Respondent:')
-    pdf.multi_cell(0, 6, pdf_data.get('Respondent', 'N/A'))
-    pdf.ln(8)
-
-    # ======= ORDERS & DOCUMENTS =======
-    pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 8, 'ORDERS & DOCUMENTS', ln=True)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    pdf.set_font('Arial', '', 10)
-    
-    # Get the lists of links and dates from the nested dictionary
-    orders_data = pdf_data.get('orders', {})
-    links = orders_data.get('link', [])
-    dates = orders_data.get('order_dates', [])
-    
-    # Check if we have orders and that the lists have the same length
-    if links and dates and len(links) == len(dates):
-        for idx, (order_date, link) in enumerate(zip(dates, links), 1):
-            # Order number and date
-            pdf.cell(15, 6, f"{idx}.")
-            pdf.cell(30, 6, "Date:")
-            pdf.cell(40, 6, order_date)
-
-            # Clickable link
-            link_text = "Click to view document"
-            pdf.set_text_color(0, 0, 255)
-            pdf.set_font('Arial', 'U', 10)
-            pdf.cell(0, 6, link_text, ln=True, link=link)
-
-            # Reset styling
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font('Arial', '', 10)
-
-            # Show URL preview
-            pdf.set_font('Arial', '', 8)
-            pdf.set_text_color(100, 100, 100)
-            url_display = link[:80] + ('...' if len(link) > 80 else '')
-            pdf.cell(65, 4, "")
-            pdf.cell(0, 4, f"URL: {url_display}", ln=True)
-
-            # Reset
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font('Arial', '', 10)
-            pdf.ln(3)
-    else:
-        pdf.cell(0, 6, 'No orders available', ln=True)
-
-    # ======= FOOTER =======
-    pdf.ln(10)
-    pdf.set_font('Arial', 'I', 8)
-    pdf.cell(0, 6, f'Generated on: {time.strftime("%Y-%m-%d %H:%M:%S")}', ln=True, align='C')
-
-    # ======= SAVE OR RETURN =======
-    if save_to_disk:
-        temp_dir_path = temp_dir if temp_dir else os.path.join(tempfile.gettempdir(), 'court_case_pdfs')
-        os.makedirs(temp_dir_path, exist_ok=True)
-        file_path = os.path.join(temp_dir_path, get_pdf_filename(pdf_data))
-        pdf.output(file_path)
-        print(f"PDF saved to: {file_path}")
-        return file_path
-    else:
-        return pdf.output(dest='S').encode('latin1')
+    return write_report(pdf_data, save_to_disk, temp_dir, filename)
@@ -0,0 +1,73 @@
+import requests
+from requests.adapters import HTTPAdapter
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Connection pool settings for the shared session
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+REQUEST_TIMEOUT = 15
+
+# Marker of an order link, present in the orders page when it is rendered server-side
+ORDER_LINK_MARKER = "/app/showlogo/"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/124.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Returns the shared keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(HEADERS)
+            _session = session
+    return _session
+
+
+def close_session():
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def fetch_html(url: str, timeout: float = REQUEST_TIMEOUT) -> str | None:
+    """
+    Fetches a page over the shared session.
+
+    Returns:
+        str | None: The HTML if the server answered 200, otherwise None.
+    """
+    try:
+        response = get_session().get(url, timeout=timeout)
+    except requests.RequestException as e:
+        logger.warning("HTTP request to %s failed: %s", url, e)
+        return None
+    if response.status_code != 200:
+        logger.warning("HTTP request to %s returned status %d", url, response.status_code)
+        return None
+    return response.text
+
+
+def needs_javascript(html: str) -> bool:
+    """
+    Tells whether an orders page came back without its order links, which means
+    the table is filled in by JavaScript and a browser is needed to render it.
+    """
+    return ORDER_LINK_MARKER not in html
+
@@ -0,0 +1,264 @@
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from admission import Overloaded
+
+logger = logging.getLogger(__name__)
+
+# Default job queue settings
+DEFAULT_WORKERS = 4
+DEFAULT_RETENTION = 60 * 60  # finished jobs are kept this many seconds
+DEFAULT_MAX_QUEUED = 32       # jobs allowed to wait for a worker
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def _new_job(key: str, params: dict) -> dict:
+    now = time.time()
+    return {
+        'id': uuid.uuid4().hex,
+        'key': key,
+        'params': params,
+        'status': 'queued',
+        'steps': [],
+        'result': None,
+        'error': None,
+        'created': now,
+        'updated': now,
+    }
+
+
+class MemoryJobStore:
+    """Keeps jobs in a dict. Jobs are lost when the process exits."""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict):
+        with self._lock:
+            self._jobs[job['id']] = copy.deepcopy(job)
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(copy.deepcopy(fields))
+            job['updated'] = time.time()
+
+    def find_active(self, key: str) -> dict | None:
+        with self._lock:
+            for job in self._jobs.values():
+                if job['key'] == key and job['status'] in ACTIVE_STATUSES:
+                    return copy.deepcopy(job)
+        return None
+
+    def purge(self, older_than: float):
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job['status'] not in ACTIVE_STATUSES and job['updated'] < older_than]:
+                del self._jobs[job_id]
+
+    def counts(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+            return counts
+
+
+class SQLiteJobStore:
+    """
+    Keeps jobs in an SQLite file so finished jobs survive a restart. Meant for one
+    process: opening the store marks jobs an earlier process left unfinished as failed.
+    """
+
+    _JSON_FIELDS = ('params', 'steps', 'result')
+    _COLUMNS = ('id', 'key', 'params', 'status', 'steps', 'result', 'error', 'created', 'updated')
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id TEXT PRIMARY KEY, key TEXT NOT NULL, params TEXT, status TEXT NOT NULL,'
+            ' steps TEXT, result TEXT, error TEXT, created REAL NOT NULL, updated REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_key_status ON jobs (key, status)')
+        # Jobs that were queued or running when the process stopped will never finish
+        self._conn.execute("UPDATE jobs SET status = 'failed', error = 'Interrupted by a restart', updated = ?"
+                           " WHERE status IN (?, ?)", (time.time(), *ACTIVE_STATUSES))
+        self._conn.commit()
+
+    def _row_to_job(self, row) -> dict | None:
+        if row is None:
+            return None
+        job = dict(zip(self._COLUMNS, row))
+        for field in self._JSON_FIELDS:
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        return job
+
+    def create(self, job: dict):
+        values = [json.dumps(job[c]) if c in self._JSON_FIELDS else job[c] for c in self._COLUMNS]
+        with self._lock:
+            self._conn.execute(f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({', '.join('?' * len(values))})",
+                               values)
+            self._conn.commit()
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def update(self, job_id: str, **fields):
+        fields['updated'] = time.time()
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        values = [json.dumps(v) if name in self._JSON_FIELDS else v for name, v in fields.items()]
+        with self._lock:
+            self._conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', values + [job_id])
+            self._conn.commit()
+
+    def find_active(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE key = ? AND status IN (?, ?) LIMIT 1",
+                (key, *ACTIVE_STATUSES),
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def purge(self, older_than: float):
+        with self._lock:
+            self._conn.execute('DELETE FROM jobs WHERE status NOT IN (?, ?) AND updated < ?',
+                               (*ACTIVE_STATUSES, older_than))
+            self._conn.commit()
+
+    def counts(self) -> dict:
+        with self._lock:
+            return dict(self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+
+class JobQueue:
+    """
+    Runs pipeline jobs on a local worker pool and records their progress in a store.
+
+    Args:
+        store: A MemoryJobStore or SQLiteJobStore.
+        pipeline: Called as pipeline(progress, **params) on a worker thread. It reports each
+            step by calling progress(step_name) and returns a JSON-serialisable result.
+        workers (int): Number of jobs run at the same time.
+        retention (float): Seconds finished jobs are kept before they are purged.
+        max_queued (int): Jobs allowed to wait for a worker; more are turned away with Overloaded.
+    """
+
+    def __init__(self, store, pipeline, workers: int = DEFAULT_WORKERS, retention: float = DEFAULT_RETENTION,
+                 max_queued: int = DEFAULT_MAX_QUEUED):
+        self.store = store
+        self.pipeline = pipeline
+        self.workers = workers
+        self.retention = retention
+        self.max_queued = max_queued
+        self.deduplicated = 0
+        self.rejected = 0
+        self.closed = False
+        self._futures = {}  # job id -> Future of the jobs queued or running
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._lock = threading.Condition()
+
+    def submit(self, key: str, params: dict) -> str:
+        """
+        Queues a job and returns its id. If a job with the same key is still queued or
+        running, its id is returned instead of starting another one.
+
+        Raises:
+            Overloaded: If max_queued jobs are already waiting, or the queue is draining.
+        """
+        with self._lock:
+            active = self.store.find_active(key)
+            if active:
+                self.deduplicated += 1
+                return active['id']
+            if self.closed or len(self._futures) >= self.workers + self.max_queued:
+                self.rejected += 1
+                raise Overloaded('Server is busy' if not self.closed else 'Server is shutting down')
+            self.store.purge(time.time() - self.retention)
+            job = _new_job(key, params)
+            self.store.create(job)
+            self._futures[job['id']] = self._executor.submit(self._run, job['id'], params)
+        return job['id']
+
+    def get(self, job_id: str) -> dict | None:
+        return self.store.get(job_id)
+
+    def _run(self, job_id: str, params: dict):
+        steps = []
+
+        def progress(step: str):
+            now = time.time()
+            if steps and steps[-1]['status'] == 'running':
+                steps[-1]['status'] = 'done'
+                steps[-1]['finished'] = now
+            steps.append({'name': step, 'status': 'running', 'started': now, 'finished': None})
+            self.store.update(job_id, steps=steps)
+
+        try:
+            self.store.update(job_id, status='running')
+            try:
+                result = self.pipeline(progress, **params)
+            except Exception as e:
+                logger.error("Job %s failed: %s", job_id, e)
+                if steps and steps[-1]['status'] == 'running':
+                    steps[-1]['status'] = 'failed'
+                    steps[-1]['finished'] = time.time()
+                self.store.update(job_id, status='failed', steps=steps, error=str(e))
+                return
+
+            if steps and steps[-1]['status'] == 'running':
+                steps[-1]['status'] = 'done'
+                steps[-1]['finished'] = time.time()
+            self.store.update(job_id, status='done', steps=steps, result=result)
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._lock.notify_all()
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Stops taking jobs, fails the ones still waiting for a worker, and waits up to
+        timeout seconds for the running ones to finish.
+
+        Returns:
+            bool: True if none were left running.
+        """
+        with self._lock:
+            self.closed = True
+            for job_id, future in list(self._futures.items()):
+                if future.cancel():
+                    del self._futures[job_id]
+                    self.store.update(job_id, status='failed', error='Interrupted by a shutdown')
+            return self._lock.wait_for(lambda: not self._futures, timeout)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._futures)
+        return {
+            'jobs': self.store.counts(),
+            'deduplicated': self.deduplicated,
+            'pending': pending,
+            'max_pending': self.workers + self.max_queued,
+            'rejected': self.rejected,
+        }
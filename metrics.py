@@ -0,0 +1,215 @@
+from contextlib import contextmanager
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Prefix of every metric name
+NAMESPACE = 'case_search'
+
+# Histogram buckets in seconds, from a fast parse to a slow page load
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: tuple, values: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = f'{NAMESPACE}_{name}'
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f'{self.name}{_labels(self.labelnames, key)} {_number(value)}')
+        return lines
+
+
+class Counter(_Metric):
+    """A value that only goes up, such as a number of errors."""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, such as the number of requests in flight."""
+
+    kind = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Counts observations, such as durations, into cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = entry[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted((key, ([*counts], total, count)) for key, (counts, total, count) in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_label = f'le="{_number(bound)}"'
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, key, bucket_label)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, key)} {count}')
+        return lines
+
+
+class Registry:
+    """
+    The metrics of the process, plus stats callbacks whose numeric values are exported
+    as gauges when the metrics are scraped.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._stats = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, name: str, stats):
+        """
+        Exports the numbers returned by stats() as gauges named <namespace>_<name>_<key>.
+        Nested dictionaries are flattened with underscores, booleans become 0 or 1, and
+        other values are skipped.
+        """
+        with self._lock:
+            self._stats.append((name, stats))
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+            stats = list(self._stats)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for name, fn in stats:
+            try:
+                values = fn()
+            except Exception as e:
+                logger.warning("Could not collect %s stats: %s", name, e)
+                continue
+            for key, value in _flatten(values, name):
+                metric_name = f'{NAMESPACE}_{key}'
+                lines.append(f'# TYPE {metric_name} gauge')
+                lines.append(f'{metric_name} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _flatten(values: dict, prefix: str):
+    for key, value in values.items():
+        name = f"{prefix}_{''.join(c if c.isalnum() else '_' for c in str(key))}"
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'stage_seconds', 'Time spent in each stage of a search.', ('stage',)))
+STAGE_IN_FLIGHT = REGISTRY.register(Gauge(
+    'stage_in_flight', 'Stages currently running.', ('stage',)))
+STAGE_ERRORS = REGISTRY.register(Counter(
+    'stage_errors_total', 'Stages that raised an exception.', ('stage',)))
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Times a stage of the search.
+
+    The duration goes into the stage_seconds histogram, the stage counts as in flight
+    while it runs, and an exception raised inside it is counted in stage_errors_total
+    before it propagates. Works in async functions too.
+    """
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s took %.3fs", stage, elapsed)
+
+
+def record_error(stage: str):
+    """Counts a stage failure that was handled without an exception, e.g. a step that returned None."""
+    STAGE_ERRORS.inc(stage=stage)
@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+
+
+class OrderIndex:
+    """
+    Per-case index of the orders seen so far, kept in SQLite.
+
+    Orders are identified by their showlogo link. Each refresh only inserts the orders
+    that were not in the index before, so the store grows by the delta alone.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS orders ('
+            ' case_key TEXT NOT NULL, link TEXT NOT NULL, date TEXT, first_seen REAL NOT NULL,'
+            ' PRIMARY KEY (case_key, link))'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS checks ('
+            ' case_key TEXT PRIMARY KEY, last_checked REAL NOT NULL, order_count INTEGER NOT NULL)'
+        )
+        self._conn.commit()
+
+    def known_links(self, case_key: str) -> set:
+        with self._lock:
+            rows = self._conn.execute('SELECT link FROM orders WHERE case_key = ?', (case_key,)).fetchall()
+        return {row[0] for row in rows}
+
+    def orders(self, case_key: str) -> list:
+        """Returns the indexed orders of a case in the order they were first seen."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date, link FROM orders WHERE case_key = ? ORDER BY first_seen, rowid', (case_key,)
+            ).fetchall()
+        return [{'date': date, 'link': link} for date, link in rows]
+
+    def last_checked(self, case_key: str) -> float | None:
+        with self._lock:
+            row = self._conn.execute('SELECT last_checked FROM checks WHERE case_key = ?', (case_key,)).fetchone()
+        return row[0] if row else None
+
+    def update(self, case_key: str, orders: list) -> list:
+        """
+        Diffs a freshly parsed order list against the index and stores the new orders.
+
+        Args:
+            case_key (str): The case, as built by cache.case_key().
+            orders (list): Dictionaries with 'date' and 'link', as returned by
+                           extract_order_details_list().
+
+        Returns:
+            list: The orders that were not in the index, in page order.
+        """
+        now = time.time()
+        with self._lock:
+            known = {row[0] for row in self._conn.execute('SELECT link FROM orders WHERE case_key = ?', (case_key,))}
+            new_orders = []
+            for order in orders:
+                if order['link'] not in known:
+                    known.add(order['link'])
+                    new_orders.append(order)
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO orders (case_key, link, date, first_seen) VALUES (?, ?, ?, ?)',
+                [(case_key, order['link'], order['date'], now) for order in new_orders],
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO checks (case_key, last_checked, order_count) VALUES (?, ?, ?)',
+                (case_key, now, len(known)),
+            )
+            self._conn.commit()
+        return new_orders
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
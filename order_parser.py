@@ -0,0 +1,134 @@
+from html.parser import HTMLParser
+import re
+
+ORDER_LINK_PREFIX = "https://delhihighcourt.nic.in/app/showlogo/"
+DATE_PATTERN = re.compile(r'\b(\d{2}/\d{2}/\d{4})\b')
+
+try:
+    from lxml import etree
+except ImportError:  # optional backend
+    etree = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # optional backend; selectolax < 0.3.13 only has the modest parser
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+
+def available_backends() -> list:
+    """Returns the parser backends that can be used in this environment, fastest first."""
+    backends = []
+    if SelectolaxParser is not None:
+        backends.append('selectolax')
+    if etree is not None:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def _order_from_row(texts, links) -> dict | None:
+    """Pairs the first date and the first order link found in one table row."""
+    if not links:
+        return None
+    for text in texts:
+        match = DATE_PATTERN.search(text)
+        if match:
+            return {'date': match.group(1), 'link': links[0]}
+    return None
+
+
+class _RowParser(HTMLParser):
+    """
+    Streams through the document once, buffering only the text and order links of
+    the table row currently open. Each row is turned into an order when it closes.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.orders = []
+        self._rows = []  # stack of (texts, links) for nested rows
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self._rows.append(([], []))
+        elif tag == 'a' and self._rows:
+            href = dict(attrs).get('href')
+            if href and href.startswith(ORDER_LINK_PREFIX):
+                self._rows[-1][1].append(href)
+
+    def handle_endtag(self, tag):
+        if tag == 'tr' and self._rows:
+            texts, links = self._rows.pop()
+            order = _order_from_row(texts, links)
+            if order:
+                self.orders.append(order)
+
+    def handle_data(self, data):
+        if self._rows and data.strip():
+            self._rows[-1][0].append(data)
+
+
+def _parse_html_parser(html: str) -> list:
+    parser = _RowParser()
+    parser.feed(html)
+    parser.close()
+    return parser.orders
+
+
+def _parse_lxml(html: str) -> list:
+    parser = etree.HTMLPullParser(events=('end',), tag='tr')
+    parser.feed(html)
+    parser.close()
+    orders = []
+    for _, row in parser.read_events():
+        links = [a.get('href') for a in row.iter('a')
+                 if a.get('href') and a.get('href').startswith(ORDER_LINK_PREFIX)]
+        order = _order_from_row(row.itertext(), links)
+        if order:
+            orders.append(order)
+        # Free the row once it has been read
+        row.clear()
+    return orders
+
+
+def _parse_selectolax(html: str) -> list:
+    orders = []
+    for row in SelectolaxParser(html).css('tr'):
+        # Nested rows are read on their own, like the other backends do.
+        # The row itself is part of its css() matches.
+        if len(row.css('tr')) > 1:
+            continue
+        links = [a.attributes.get('href') for a in row.css(f'a[href^="{ORDER_LINK_PREFIX}"]')]
+        order = _order_from_row([row.text(separator=' ')], links)
+        if order:
+            orders.append(order)
+    return orders
+
+
+_BACKENDS = {
+    'html.parser': _parse_html_parser,
+    'lxml': _parse_lxml,
+    'selectolax': _parse_selectolax,
+}
+
+
+def parse_orders(html: str, backend: str | None = None) -> list:
+    """
+    Parses the orders table row by row, pairing each order date with the link in the same row.
+
+    Args:
+        html (str): The HTML content of the order details page.
+        backend (str | None): 'selectolax', 'lxml' or 'html.parser'. If None, the fastest
+                              available backend is used.
+
+    Returns:
+        list: A list of dictionaries with 'date' and 'link' keys, in page order.
+    """
+    if backend is None:
+        backend = available_backends()[0]
+    if backend not in available_backends():
+        raise ValueError(f"Parser backend '{backend}' is not available")
+    return _BACKENDS[backend](html)
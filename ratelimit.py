@@ -0,0 +1,439 @@
+from contextlib import asynccontextmanager, contextmanager
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# The court sites the extractors scrape
+CASE_STATUS_HOST = 'delhihighcourt.nic.in'
+FILING_DATE_HOST = 'dhcmisc.nic.in'
+
+# Defaults of the adaptive limiter shared by the extractors: requests per minute per
+# court host, the range AIMD keeps the rate in, and requests allowed back to back.
+DEFAULT_SITE_REQUESTS_PER_MINUTE = 60
+MIN_SITE_REQUESTS_PER_MINUTE = 6
+MAX_SITE_REQUESTS_PER_MINUTE = 240
+DEFAULT_SITE_BURST = 10
+
+# AIMD: every fast success adds INCREASE_PER_SUCCESS requests per minute; a failure or a
+# request slower than SLOW_REQUEST_SECONDS multiplies the rate by DECREASE_FACTOR, at most
+# once per DECREASE_INTERVAL seconds so one burst of failures does not collapse it.
+INCREASE_PER_SUCCESS = 1.0
+DECREASE_FACTOR = 0.5
+DECREASE_INTERVAL = 5.0
+SLOW_REQUEST_SECONDS = 10.0
+
+# A request that would wait longer than this for a token fails at once instead
+MAX_WAIT = 30.0
+
+# Circuit breaker: this many failures in a row open it, and it stays open for
+# RESET_TIMEOUT seconds, doubling up to MAX_RESET_TIMEOUT while probes keep failing.
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+MAX_RESET_TIMEOUT = 5 * 60.0
+
+# Weight of the newest request in the latency average
+LATENCY_SMOOTHING = 0.2
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, holding at most `burst` tokens.
+    """
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """Returns how many seconds acquire(tokens) would wait right now."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Takes `tokens` tokens now, going into debt if there are not enough, and returns
+        the seconds the caller must wait before using them. Unlike acquire() it does
+        not sleep, so async code can wait with asyncio.sleep().
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1):
+        """Blocks until `tokens` tokens are available and takes them."""
+        if tokens > self.burst:
+            raise ValueError(f"Cannot take {tokens} tokens from a bucket of {self.burst}")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """
+    One token bucket per host, all with the same rate.
+
+    Args:
+        requests_per_minute (float): Sustained request rate allowed per host.
+        burst (float): Requests allowed back to back before the rate applies.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: float = 1):
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.requests_per_minute / 60.0, self.burst)
+            return self._buckets[host]
+
+    def acquire(self, host: str, tokens: float = 1):
+        self.bucket(host).acquire(tokens)
+
+
+class SiteUnavailable(Exception):
+    """
+    Raised instead of sending a request when a court site is failing (its circuit is
+    open) or its request budget is used up for longer than MAX_WAIT.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a failing site for a while.
+
+    Closed, every request goes through. After `failure_threshold` failures in a row it
+    opens and turns requests away for `reset_timeout` seconds. Then it is half-open:
+    one probe request goes through; if it succeeds the circuit closes, and if it fails
+    the circuit opens again for twice as long, up to `max_reset_timeout`.
+
+    allow() hands out a ticket that record() or release() takes back, so outcomes of
+    requests sent before the circuit last opened only count as failures and cannot
+    close it early.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT,
+                 max_reset_timeout: float = MAX_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._timeout = reset_timeout
+        self._open_until = 0.0
+        self._probing = False
+
+    def allow(self, now: float) -> tuple | None:
+        """
+        Tells whether a request may go out now. Not thread-safe: callers hold a lock.
+
+        Returns:
+            tuple | None: None if the request is turned away, else the ticket to pass to
+                          record() or release(): (times opened so far, whether it is the probe).
+        """
+        if self.state == self.OPEN and now >= self._open_until:
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.CLOSED:
+            return (self.opened, False)
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return (self.opened, True)
+        return None
+
+    def release(self, ticket: tuple):
+        """Gives back a ticket whose request was never sent."""
+        opened, probe = ticket
+        if probe and opened == self.opened and self.state == self.HALF_OPEN:
+            self._probing = False
+
+    def record(self, ok: bool, now: float, ticket: tuple | None = None):
+        """Feeds in the outcome of the request the ticket was handed out for."""
+        opened, probe = ticket if ticket is not None else (self.opened, self.state == self.HALF_OPEN)
+        if opened != self.opened or (self.state != self.CLOSED and not probe):
+            # Sent before the circuit last opened: it cannot tell how the site is doing now
+            if not ok:
+                self.failures += 1
+            return
+        if ok:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._timeout = self.reset_timeout
+            self._probing = False
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self._timeout = min(self.max_reset_timeout, self._timeout * 2)
+            self._open(now)
+        elif self.failures >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = self.OPEN
+        self.opened += 1
+        self._open_until = now + self._timeout
+        self._probing = False
+
+    def retry_after(self, now: float) -> float:
+        return max(0.0, self._open_until - now) if self.state == self.OPEN else 0.0
+
+
+class _HostState:
+    def __init__(self, rate_per_minute: float, burst: float, breaker: CircuitBreaker):
+        self.rate_per_minute = rate_per_minute
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self.breaker = breaker
+        self.latency = None
+        self.successes = 0
+        self.failures = 0
+        self.slow = 0
+        self.rejected = 0
+        self.last_decrease = 0.0
+
+
+class _Outcome:
+    """Handed to the body of AdaptiveRateLimiter.request(); call failed() if the response was unusable."""
+
+    def __init__(self):
+        self.ok = True
+
+    def failed(self):
+        self.ok = False
+
+
+class AdaptiveRateLimiter:
+    """
+    Per-host token buckets whose rates adapt to how the site is coping (AIMD), each
+    behind a circuit breaker.
+
+    Fast successful requests raise a host's rate step by step; failures and slow
+    requests halve it. Once a host keeps failing its circuit opens and requests to it
+    fail at once with SiteUnavailable instead of waiting for browser timeouts.
+
+    Args:
+        requests_per_minute (float): Starting rate per host.
+        min_requests_per_minute (float): Lowest rate AIMD goes down to.
+        max_requests_per_minute (float): Highest rate AIMD goes up to.
+        burst (float): Requests allowed back to back.
+        slow_seconds (float): Successful requests slower than this count as the site struggling.
+        max_wait (float): Longest a request waits for a token before SiteUnavailable is raised.
+        failure_threshold (int): Failures in a row that open a host's circuit.
+        reset_timeout (float): Seconds a circuit first stays open.
+    """
+
+    def __init__(self, requests_per_minute: float = DEFAULT_SITE_REQUESTS_PER_MINUTE,
+                 min_requests_per_minute: float = MIN_SITE_REQUESTS_PER_MINUTE,
+                 max_requests_per_minute: float = MAX_SITE_REQUESTS_PER_MINUTE,
+                 burst: float = DEFAULT_SITE_BURST, slow_seconds: float = SLOW_REQUEST_SECONDS,
+                 max_wait: float = MAX_WAIT, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT):
+        self.requests_per_minute = requests_per_minute
+        self.min_requests_per_minute = min_requests_per_minute
+        self.max_requests_per_minute = max_requests_per_minute
+        self.burst = burst
+        self.slow_seconds = slow_seconds
+        self.max_wait = max_wait
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            state = self._hosts[host] = _HostState(self.requests_per_minute, self.burst, breaker)
+        return state
+
+    def _reserve(self, host: str) -> tuple:
+        """
+        Takes a token and the circuit's ticket, returning the seconds to wait before
+        sending and the ticket.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host)
+            wait = state.bucket.wait_time()
+            if wait > self.max_wait:
+                state.rejected += 1
+                raise SiteUnavailable(f"{host} request budget is used up for {wait:.0f}s", wait)
+            ticket = state.breaker.allow(now)
+            if ticket is None:
+                state.rejected += 1
+                retry_after = state.breaker.retry_after(now)
+                raise SiteUnavailable(f"{host} is failing; not retrying for {retry_after:.0f}s", retry_after)
+            return state.bucket.reserve(), ticket
+
+    def release(self, host: str, ticket: tuple):
+        """Gives back the ticket of a request to host that was never sent."""
+        with self._lock:
+            self._host(host).breaker.release(ticket)
+
+    def acquire(self, host: str) -> tuple:
+        """
+        Blocks until a request to host may be sent.
+
+        Returns:
+            tuple: The circuit's ticket for the request, to pass to record() or release().
+
+        Raises:
+            SiteUnavailable: If the host's circuit is open or the wait would exceed max_wait.
+        """
+        wait, ticket = self._reserve(host)
+        if wait:
+            try:
+                time.sleep(wait)
+            except BaseException:
+                self.release(host, ticket)
+                raise
+        return ticket
+
+    async def acquire_async(self, host: str) -> tuple:
+        """Async version of acquire(); waits without blocking the event loop."""
+        wait, ticket = self._reserve(host)
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self.release(host, ticket)
+                raise
+        return ticket
+
+    def record(self, host: str, seconds: float, ok: bool, ticket: tuple | None = None):
+        """Feeds the outcome of a request to host, sent with the ticket acquire() returned, into its rate and its circuit."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._host(host)
+            state.latency = seconds if state.latency is None else (
+                LATENCY_SMOOTHING * seconds + (1 - LATENCY_SMOOTHING) * state.latency)
+            slow = ok and seconds > self.slow_seconds
+            if ok:
+                state.successes += 1
+                state.slow += slow
+            else:
+                state.failures += 1
+
+            was_open = state.breaker.state != CircuitBreaker.CLOSED
+            state.breaker.record(ok, now, ticket)
+            if state.breaker.state == CircuitBreaker.OPEN and not was_open:
+                logger.warning("Circuit for %s opened after %d failures", host, state.breaker.failures)
+            elif was_open and state.breaker.state == CircuitBreaker.CLOSED:
+                logger.info("Circuit for %s closed again", host)
+
+            if ok and not slow:
+                rate = min(self.max_requests_per_minute, state.rate_per_minute + INCREASE_PER_SUCCESS)
+            elif now - state.last_decrease >= DECREASE_INTERVAL:
+                rate = max(self.min_requests_per_minute, state.rate_per_minute * DECREASE_FACTOR)
+                state.last_decrease = now
+            else:
+                return
+            if rate != state.rate_per_minute:
+                state.rate_per_minute = rate
+                state.bucket.set_rate(rate / 60.0)
+
+    @contextmanager
+    def request(self, host: str):
+        """
+        Waits for host as acquire() does, then times the with block and records its
+        outcome. The block fails if it raises or calls failed() on the yielded object.
+        """
+        ticket = self.acquire(host)
+        outcome = _Outcome()
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.ok = False
+            raise
+        finally:
+            self.record(host, time.perf_counter() - start, outcome.ok, ticket)
+
+    @asynccontextmanager
+    async def request_async(self, host: str):
+        """Async version of request()."""
+        ticket = await self.acquire_async(host)
+        outcome = _Outcome()
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.ok = False
+            raise
+        finally:
+            self.record(host, time.perf_counter() - start, outcome.ok, ticket)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: {
+                    'circuit': state.breaker.state,
+                    'open': state.breaker.state == CircuitBreaker.OPEN,
+                    'retry_after': round(state.breaker.retry_after(now), 1),
+                    'circuit_opened': state.breaker.opened,
+                    'consecutive_failures': state.breaker.failures,
+                    'requests_per_minute': round(state.rate_per_minute, 2),
+                    'latency_seconds': None if state.latency is None else round(state.latency, 3),
+                    'successes': state.successes,
+                    'failures': state.failures,
+                    'slow': state.slow,
+                    'rejected': state.rejected,
+                }
+                for host, state in self._hosts.items()
+            }
+
+
+# Shared limiter used by the extractor functions
+_site_limiter = None
+_site_limiter_lock = threading.Lock()
+
+
+def get_site_limiter() -> AdaptiveRateLimiter:
+    """Returns the shared limiter for the court sites, creating it with the defaults on first use."""
+    global _site_limiter
+    with _site_limiter_lock:
+        if _site_limiter is None:
+            _site_limiter = AdaptiveRateLimiter()
+        return _site_limiter
+
+
+def configure_site_limiter(**kwargs) -> AdaptiveRateLimiter:
+    """Replaces the shared limiter with one built from the given settings."""
+    global _site_limiter
+    with _site_limiter_lock:
+        _site_limiter = AdaptiveRateLimiter(**kwargs)
+        return _site_limiter
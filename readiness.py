@@ -0,0 +1,182 @@
+from urllib.parse import urlparse
+import logging
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from http_client import ORDER_LINK_MARKER
+
+logger = logging.getLogger(__name__)
+
+# How long each page may take to show its results, in milliseconds
+CASE_SEARCH_TIMEOUT = 20000
+ORDERS_PAGE_TIMEOUT = 20000
+FILING_DATE_TIMEOUT = 30000
+
+# Elements that are only on a page once its results are there
+CASE_RESULT_SELECTOR = 'td.sorting_1'
+ORDER_LINK_SELECTOR = f'a[href*="{ORDER_LINK_MARKER}"]'
+FILING_DATE_SELECTOR = '#form3 table tbody td'
+
+# What the court sites show when a search finds nothing. DataTables shows "No data
+# available in table" before a search has run, so only the "records found" wording counts.
+NO_RECORDS_PATTERN = 'no (matching )?records? found'
+NO_RECORDS_SELECTOR = f':text-matches("{NO_RECORDS_PATTERN}", "i")'
+
+# What the court sites show when they turn a search away because the captcha or the
+# session behind the form is no longer valid
+SESSION_REJECTED_PATTERN = ('(invalid|wrong|incorrect) (security code|captcha)'
+                            '|captcha (is )?(invalid|wrong|incorrect|mismatch)|session (has )?expired')
+SESSION_REJECTED_SELECTOR = f':text-matches("{SESSION_REJECTED_PATTERN}", "i")'
+
+# Removes the results of the previous search from a form page that is used again, so
+# the wait for the next results cannot be satisfied by the old ones
+CLEAR_RESULTS_SCRIPT = '''() => {
+    document.querySelectorAll('td.sorting_1, td.dataTables_empty, #form3 table tbody tr')
+        .forEach(el => (el.closest('tr') || el).remove());
+    const messages = /%s|%s/i;
+    document.querySelectorAll('body *').forEach(el => {
+        if (el.children.length === 0 && messages.test(el.textContent)) el.remove();
+    });
+}''' % (NO_RECORDS_PATTERN, SESSION_REJECTED_PATTERN)
+
+# Requests the scrapers never need: they are aborted before they leave the browser
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'font', 'media'})
+BLOCKED_HOSTS = (
+    'google-analytics.com',
+    'analytics.google.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+)
+
+
+class NoRecordsFound(Exception):
+    """Raised when the court site answers a search with its "no records found" page."""
+
+
+class SessionRejected(Exception):
+    """Raised when the court site turns a search away because its captcha or session is no longer valid."""
+
+
+def should_block(resource_type: str, url: str) -> bool:
+    """Tells whether a request is for an image, font or media file, or goes to an analytics host."""
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlparse(url).hostname or ''
+    return any(host == blocked or host.endswith('.' + blocked) for blocked in BLOCKED_HOSTS)
+
+
+def _route(route):
+    if should_block(route.request.resource_type, route.request.url):
+        route.abort()
+    else:
+        route.continue_()
+
+
+async def _route_async(route):
+    if should_block(route.request.resource_type, route.request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def block_requests(context):
+    """Aborts the requests should_block() rejects for every page of a browser context."""
+    context.route('**/*', _route)
+
+
+async def block_requests_async(context):
+    """Async version of block_requests()."""
+    await context.route('**/*', _route_async)
+
+
+def clear_results(page):
+    """Removes the previous search's results and messages from a form page before it is used again."""
+    page.evaluate(CLEAR_RESULTS_SCRIPT)
+
+
+async def clear_results_async(page):
+    """Async version of clear_results()."""
+    await page.evaluate(CLEAR_RESULTS_SCRIPT)
+
+
+def wait_for_case_results(page, timeout: float = CASE_SEARCH_TIMEOUT):
+    """
+    Waits until the case-status search shows its result row.
+
+    Raises:
+        NoRecordsFound: If the site reports that no case matched.
+        SessionRejected: If the site turned the search away over its captcha or session.
+        playwright.sync_api.TimeoutError: If none of these shows up within timeout milliseconds.
+    """
+    page.wait_for_selector(f'{CASE_RESULT_SELECTOR}, {NO_RECORDS_SELECTOR}, {SESSION_REJECTED_SELECTOR}',
+                           state='attached', timeout=timeout)
+    if page.locator(CASE_RESULT_SELECTOR).count() == 0:
+        if page.locator(SESSION_REJECTED_SELECTOR).count():
+            raise SessionRejected('The case-status search was turned away.')
+        raise NoRecordsFound('No case matched the search.')
+
+
+def wait_for_filing_date(page, timeout: float = FILING_DATE_TIMEOUT):
+    """
+    Waits until the case-wise search on dhcmisc.nic.in shows its results table.
+
+    Raises:
+        NoRecordsFound: If the site reports that no case matched.
+        SessionRejected: If the site turned the search away over its captcha or session.
+        playwright.sync_api.TimeoutError: If none of these shows up within timeout milliseconds.
+    """
+    page.wait_for_selector(f'{FILING_DATE_SELECTOR}, {NO_RECORDS_SELECTOR}, {SESSION_REJECTED_SELECTOR}',
+                           state='attached', timeout=timeout)
+    if page.locator(FILING_DATE_SELECTOR).count() == 0:
+        if page.locator(SESSION_REJECTED_SELECTOR).count():
+            raise SessionRejected('The filing date search was turned away.')
+        raise NoRecordsFound('No case matched the filing date search.')
+
+
+def wait_for_orders(page, timeout: float = ORDERS_PAGE_TIMEOUT) -> bool:
+    """
+    Waits until the orders page shows an order link or says it has no records.
+
+    A case can have no orders at all, so the timeout only bounds the wait: the page is
+    used as it is afterwards.
+
+    Returns:
+        bool: False if the wait timed out.
+    """
+    try:
+        page.wait_for_selector(f'{ORDER_LINK_SELECTOR}, {NO_RECORDS_SELECTOR}', state='attached', timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug("No order links after %d ms, using the page as it is", timeout)
+        return False
+
+
+async def wait_for_case_results_async(page, timeout: float = CASE_SEARCH_TIMEOUT):
+    """Async version of wait_for_case_results()."""
+    await page.wait_for_selector(f'{CASE_RESULT_SELECTOR}, {NO_RECORDS_SELECTOR}, {SESSION_REJECTED_SELECTOR}',
+                                 state='attached', timeout=timeout)
+    if await page.locator(CASE_RESULT_SELECTOR).count() == 0:
+        if await page.locator(SESSION_REJECTED_SELECTOR).count():
+            raise SessionRejected('The case-status search was turned away.')
+        raise NoRecordsFound('No case matched the search.')
+
+
+async def wait_for_filing_date_async(page, timeout: float = FILING_DATE_TIMEOUT):
+    """Async version of wait_for_filing_date()."""
+    await page.wait_for_selector(f'{FILING_DATE_SELECTOR}, {NO_RECORDS_SELECTOR}, {SESSION_REJECTED_SELECTOR}',
+                                 state='attached', timeout=timeout)
+    if await page.locator(FILING_DATE_SELECTOR).count() == 0:
+        if await page.locator(SESSION_REJECTED_SELECTOR).count():
+            raise SessionRejected('The filing date search was turned away.')
+        raise NoRecordsFound('No case matched the filing date search.')
+
+
+async def wait_for_orders_async(page, timeout: float = ORDERS_PAGE_TIMEOUT) -> bool:
+    """Async version of wait_for_orders()."""
+    try:
+        await page.wait_for_selector(f'{ORDER_LINK_SELECTOR}, {NO_RECORDS_SELECTOR}', state='attached',
+                                     timeout=timeout)
+        return True
+    except PlaywrightTimeoutError:
+        logger.debug("No order links after %d ms, using the page as it is", timeout)
+        return False
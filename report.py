@@ -0,0 +1,354 @@
+from functools import lru_cache
+import logging
+import os
+import tempfile
+import time
+
+from fpdf import FPDF
+
+from metrics import span
+
+try:
+    from fpdf import set_global
+except ImportError:  # newer fpdf releases cache font metrics on their own
+    set_global = None
+
+logger = logging.getLogger(__name__)
+
+# Unicode TrueType font used when it is installed, so party names in any script
+# render. Without it the core Arial font is used and non-Latin-1 text is replaced.
+UNICODE_FONT_FAMILY = 'DejaVu'
+UNICODE_FONT_FILES = {
+    '': 'DejaVuSans.ttf',
+    'B': 'DejaVuSans-Bold.ttf',
+    'I': 'DejaVuSans-Oblique.ttf',
+}
+UNICODE_FONT_DIRS = [
+    '/usr/share/fonts/truetype/dejavu',
+    '/usr/share/fonts/dejavu',
+    '/usr/share/fonts/TTF',
+    '/Library/Fonts',
+    'C:\\Windows\\Fonts',
+]
+FALLBACK_FONT_FAMILY = 'Arial'
+
+# Parsed font metrics are cached here instead of next to the font files
+FONT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'case_report_fonts')
+
+# Default directory reports are written to
+DEFAULT_REPORT_DIR = os.path.join(tempfile.gettempdir(), 'court_case_pdfs')
+
+# Text styles used by the layout: (font style, size, RGB colour)
+STYLES = {
+    'title': ('B', 16, (0, 0, 0)),
+    'subtitle': ('B', 14, (0, 0, 0)),
+    'heading': ('B', 12, (0, 0, 0)),
+    'label': ('', 10, (0, 0, 0)),
+    'body': ('', 10, (0, 0, 0)),
+    'table_header': ('B', 10, (0, 0, 0)),
+    'link': ('U', 10, (0, 0, 255)),
+    'muted': ('', 8, (100, 100, 100)),
+    'footer': ('I', 8, (0, 0, 0)),
+}
+
+# Report layout. Each section is (kind, heading, fields); fields are
+# (label, keys to look the value up under, in order).
+LAYOUT = [
+    ('fields', 'CASE INFORMATION', [
+        ('Case Type:', ('case_type',)),
+        ('Case Number:', ('case_number',)),
+        ('Year:', ('case_year',)),
+        ('Filing Date:', ('filing_date', 'Filing Date')),
+        ('Last Date:', ('last_date', 'Last Date')),
+        ('Court No:', ('court_no', 'Court No')),
+    ]),
+    ('paragraphs', 'PARTIES', [
+        ('Petitioner:', ('petitioner', 'Petitioner')),
+        ('Respondent:', ('respondent', 'Respondent')),
+    ]),
+    ('orders', 'ORDERS & DOCUMENTS', None),
+]
+
+# Orders table: column widths in mm and the height of one order row
+ORDER_COLUMNS = [('No.', 15), ('Date', 30), ('Document', 0)]
+ORDER_ROW_HEIGHT = 13
+ORDER_LINK_TEXT = 'Click to view document'
+URL_PREVIEW_LENGTH = 80
+
+
+@lru_cache(maxsize=1)
+def unicode_font() -> dict | None:
+    """
+    Finds the Unicode font on disk, once per process.
+
+    Returns:
+        dict | None: Style -> TTF path for the styles that were found, or None if the
+                     regular style is not installed.
+    """
+    for directory in UNICODE_FONT_DIRS:
+        regular = os.path.join(directory, UNICODE_FONT_FILES[''])
+        if os.path.exists(regular):
+            if set_global is not None:
+                os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+                set_global('FPDF_CACHE_MODE', 2)
+                set_global('FPDF_CACHE_DIR', FONT_CACHE_DIR)
+            return {
+                style: os.path.join(directory, name)
+                for style, name in UNICODE_FONT_FILES.items()
+                if os.path.exists(os.path.join(directory, name))
+            }
+    return None
+
+
+class _GlyphSubset(list):
+    """
+    The list of characters FPDF embeds for a TTF font, without repeats.
+
+    FPDF appends every character it draws to this list and, when writing the file,
+    checks each code point of the font against it, which makes large reports quadratic.
+    """
+
+    def __init__(self, items=()):
+        super().__init__()
+        self._seen = set()
+        for item in items:
+            self.append(item)
+
+    def append(self, item):
+        if item not in self._seen:
+            self._seen.add(item)
+            super().append(item)
+
+    def __contains__(self, item):
+        return item in self._seen
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._seen = set(self)
+
+
+class ReportPDF(FPDF):
+    """
+    FPDF document that draws text through named styles.
+
+    The font and colour are only changed when the style differs from the current one,
+    and the orders table header is repeated at the top of every page it continues on.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._style = None
+        self._table_heading = None
+        fonts = unicode_font()
+        if fonts:
+            self.family = UNICODE_FONT_FAMILY
+            for style, path in fonts.items():
+                self.add_font(UNICODE_FONT_FAMILY, style, path, uni=True)
+            for font in self.fonts.values():
+                if isinstance(font.get('subset'), list):
+                    font['subset'] = _GlyphSubset(font['subset'])
+            self.font_styles = set(fonts)
+        else:
+            self.family = FALLBACK_FONT_FAMILY
+            self.font_styles = None
+
+    def text_for(self, value) -> str:
+        """Converts a value to text the current font can draw."""
+        text = str(value)
+        if self.font_styles is None:
+            return text.encode('latin-1', 'replace').decode('latin-1')
+        return text
+
+    def use_style(self, name: str):
+        if name == self._style:
+            return
+        style, size, color = STYLES[name]
+        font_style = style
+        if self.font_styles is not None:
+            # Styles the font was not found in fall back to regular, keeping the underline
+            font_style = ''.join(s for s in style if s == 'U' or s in self.font_styles)
+        self.set_font(self.family, font_style, size)
+        self.set_text_color(*color)
+        self._style = name
+
+    def add_page(self, *args, **kwargs):
+        super().add_page(*args, **kwargs)
+        # FPDF re-applies the previous font itself after the header, so the
+        # next use_style() call has to set it again to be sure
+        self._style = None
+
+    def header(self):
+        if self._table_heading:
+            self.section_heading(f'{self._table_heading} (continued)')
+            self.table_header()
+
+    def section_heading(self, title: str):
+        self.use_style('heading')
+        self.cell(0, 8, self.text_for(title), ln=True)
+        self.line(self.l_margin, self.get_y(), self.w - self.r_margin, self.get_y())
+        self.ln(5)
+
+    def table_header(self):
+        self.use_style('table_header')
+        for title, width in ORDER_COLUMNS:
+            self.cell(width, 6, title)
+        self.ln(7)
+
+    def orders_table(self, heading: str, rows: list):
+        """
+        Draws the orders table one page-sized batch at a time.
+
+        Each batch is drawn style by style (numbers and dates, then links, then URL
+        previews), so the font changes a few times per page instead of per row.
+        """
+        self.section_heading(heading)
+        if not rows:
+            self.use_style('body')
+            self.cell(0, 6, 'No orders available', ln=True)
+            return
+
+        self.table_header()
+        self._table_heading = heading
+        number_width, date_width = ORDER_COLUMNS[0][1], ORDER_COLUMNS[1][1]
+        document_x = self.l_margin + number_width + date_width
+        start = 0
+        while start < len(rows):
+            room = int((self.page_break_trigger - self.get_y()) // ORDER_ROW_HEIGHT)
+            if room < 1:
+                self.add_page()
+                continue
+            batch = rows[start:start + room]
+            top = self.get_y()
+
+            self.use_style('body')
+            for i, (number, date, _, _) in enumerate(batch):
+                self.set_xy(self.l_margin, top + i * ORDER_ROW_HEIGHT)
+                self.cell(number_width, 6, number)
+                self.cell(date_width, 6, date)
+
+            self.use_style('link')
+            for i, (_, _, link, _) in enumerate(batch):
+                self.set_xy(document_x, top + i * ORDER_ROW_HEIGHT)
+                self.cell(0, 6, ORDER_LINK_TEXT, link=link)
+
+            self.use_style('muted')
+            for i, (_, _, _, preview) in enumerate(batch):
+                self.set_xy(document_x, top + i * ORDER_ROW_HEIGHT + 6)
+                self.cell(0, 4, preview)
+
+            self.set_y(top + len(batch) * ORDER_ROW_HEIGHT)
+            start += len(batch)
+        self._table_heading = None
+
+
+def _lookup(case_data: dict, keys: tuple):
+    """Returns the first value present under keys, or 'N/A'."""
+    for key in keys:
+        value = case_data.get(key)
+        if value not in (None, ''):
+            return value
+    return 'N/A'
+
+
+def _order_rows(pdf: ReportPDF, case_data: dict) -> list:
+    """Builds the (number, date, link, URL preview) rows of the orders table."""
+    orders = case_data.get('orders') or {}
+    links = orders.get('link', [])
+    dates = orders.get('order_dates', [])
+    if not links or len(links) != len(dates):
+        return []
+    rows = []
+    for number, (date, link) in enumerate(zip(dates, links), 1):
+        preview = link[:URL_PREVIEW_LENGTH] + ('...' if len(link) > URL_PREVIEW_LENGTH else '')
+        rows.append((f'{number}.', pdf.text_for(date), link, pdf.text_for(f'URL: {preview}')))
+    return rows
+
+
+def render_report(case_data: dict, layout: list = LAYOUT) -> ReportPDF:
+    """
+    Lays out the case report.
+
+    Args:
+        case_data (dict): Case information. Both the lowercase keys built by the app
+                          ('petitioner', 'last_date', ...) and the titled keys built by
+                          order_extractor() ('Petitioner', 'Last Date', ...) are read.
+        layout (list): Sections to draw, in the format of LAYOUT.
+
+    Returns:
+        ReportPDF: The finished document.
+    """
+    pdf = ReportPDF()
+    pdf.add_page()
+
+    pdf.use_style('title')
+    pdf.cell(0, 12, 'DELHI HIGH COURT', ln=True, align='C')
+    pdf.ln(5)
+    pdf.use_style('subtitle')
+    title = f"{case_data.get('case_type', '')} {case_data.get('case_number', '')}/{case_data.get('case_year', '')}"
+    pdf.cell(0, 10, pdf.text_for(title), ln=True, align='C')
+    pdf.ln(10)
+
+    for kind, heading, fields in layout:
+        if kind == 'orders':
+            pdf.orders_table(heading, _order_rows(pdf, case_data))
+            continue
+
+        pdf.section_heading(heading)
+        pdf.use_style('body')
+        for label, keys in fields:
+            value = _lookup(case_data, keys)
+            if keys[0] == 'last_date' and isinstance(value, str) and value.startswith('Last Date:'):
+                value = value[len('Last Date:'):].strip()
+            pdf.cell(50, 6, label)
+            if kind == 'paragraphs':
+                pdf.multi_cell(0, 6, pdf.text_for(value))
+                pdf.ln(2)
+            else:
+                pdf.cell(0, 6, pdf.text_for(value), ln=True)
+        pdf.ln(6)
+
+    pdf.ln(10)
+    pdf.use_style('footer')
+    pdf.cell(0, 6, f'Generated on: {time.strftime("%Y-%m-%d %H:%M:%S")}', ln=True, align='C')
+    return pdf
+
+
+def get_pdf_filename(data):
+    """Helper function to create a filename based on case data."""
+    case_type = data.get('case_type', 'case')
+    case_number = data.get('case_number', '0000')
+    case_year = data.get('case_year', '0000')
+    return f"{case_type}_{case_number}_{case_year}_details.pdf"
+
+
+def write_report(case_data: dict, save_to_disk: bool = True, temp_dir: str | None = None,
+                 filename: str | None = None):
+    """
+    Renders the case report and saves or returns it.
+
+    Args:
+        case_data (dict): Case information, see render_report().
+        save_to_disk (bool): If True, saves the PDF to a file. If False, returns its bytes.
+        temp_dir (str): Directory to save in. If None, DEFAULT_REPORT_DIR is used.
+        filename (str): The file name to save under. If None, get_pdf_filename() is used.
+
+    Returns:
+        str | bytes: The file path if saved to disk, or the PDF content.
+    """
+    if not case_data:
+        logger.warning("No data available to generate PDF.")
+        return None
+
+    with span('report.render'):
+        pdf = render_report(case_data)
+        if save_to_disk:
+            directory = temp_dir or DEFAULT_REPORT_DIR
+            os.makedirs(directory, exist_ok=True)
+            file_path = os.path.join(directory, filename or get_pdf_filename(case_data))
+            pdf.output(file_path)
+            logger.debug("PDF saved to: %s", file_path)
+            return file_path
+
+        content = pdf.output(dest='S')
+    # fpdf 1.7 returns the document as a latin-1 str, newer releases as bytes
+    return content.encode('latin-1') if isinstance(content, str) else bytes(content)
@@ -0,0 +1,254 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+
+# Default eviction settings for the report directory
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+# Defaults for reports kept in memory instead of on disk
+DEFAULT_BUFFER_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TOKEN_TTL = 60 * 60
+
+# Temporary files left behind by an interrupted render are removed after this many seconds
+TEMP_FILE_MAX_AGE = 60 * 60
+
+
+def _normalize(value):
+    """Strips whitespace from strings so equal case data always hashes the same."""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    if value is None or isinstance(value, (int, float, bool)):
+        return value
+    return str(value)
+
+
+def report_key(case_data: dict) -> str:
+    """Returns the SHA-256 hex digest of the normalized case data."""
+    payload = json.dumps(_normalize(case_data), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def report_filename(case_data: dict, key: str) -> str:
+    """Readable prefix from the case plus the content hash, which alone identifies the report."""
+    case_type = ''.join(c if c.isalnum() else '-' for c in str(case_data.get('case_type', 'case')))
+    case_number = str(case_data.get('case_number', '0000')).strip()
+    case_year = str(case_data.get('case_year', '0000')).strip()
+    return f"{case_type}_{case_number}_{case_year}_{key[:16]}.pdf"
+
+
+class ReportStore:
+    """
+    Content-addressed store of generated PDF reports.
+
+    A report is rendered once per distinct case data and then served from disk.
+    The directory is kept within `max_bytes` and files unused for `max_age`
+    seconds are removed.
+
+    Args:
+        directory (str): Where the reports are written.
+        max_bytes (int): Size bound for all reports in the directory.
+        max_age (float): Seconds since last use after which a report is deleted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, max_age: float = DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.reused = 0
+        self.rendered = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_or_render(self, case_data: dict, render) -> str:
+        """
+        Returns the path of the report for case_data, rendering it only if no identical
+        report exists yet.
+
+        Args:
+            case_data (dict): The case data passed to the renderer.
+            render: Called as render(case_data, save_to_disk=True, temp_dir=..., filename=...)
+                    and must return the path it wrote.
+        """
+        key = report_key(case_data)
+        file_name = report_filename(case_data, key)
+        file_path = os.path.join(self.directory, file_name)
+
+        if os.path.exists(file_path):
+            # Mark it as recently used so age-based eviction keeps it
+            os.utime(file_path)
+            with self._lock:
+                self.reused += 1
+            return file_path
+
+        # Render under a unique temporary name and move it into place atomically,
+        # so concurrent requests never see a half-written file.
+        temp_name = f".{key}.{uuid.uuid4().hex}.tmp"
+        temp_path = render(case_data, save_to_disk=True, temp_dir=self.directory, filename=temp_name)
+        os.replace(temp_path, file_path)
+        with self._lock:
+            self.rendered += 1
+
+        self.evict()
+        return file_path
+
+    def evict(self):
+        """Deletes reports older than max_age, then the least recently used ones above max_bytes."""
+        now = time.time()
+        files = []
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            if entry.name.endswith('.tmp'):
+                if now - stat.st_mtime > TEMP_FILE_MAX_AGE:
+                    removed += self._remove(entry.path)
+            elif entry.name.endswith('.pdf'):
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = 0
+        kept = []
+        for mtime, size, path in files:
+            if now - mtime > self.max_age:
+                removed += self._remove(path)
+            else:
+                kept.append((mtime, size, path))
+                total += size
+
+        kept.sort()
+        for mtime, size, path in kept:
+            if total <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            total -= size
+
+        if removed:
+            with self._lock:
+                self.evicted += removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'reused': self.reused,
+                'rendered': self.rendered,
+                'evicted': self.evicted,
+            }
+
+
+class ReportBuffer:
+    """
+    Reports rendered straight into memory and handed out under per-request tokens.
+
+    Each render() returns a new random token, so concurrent requests never share a
+    download name. Tokens for identical case data point at the same rendered bytes,
+    and the content key doubles as the ETag of the download. The least recently used
+    reports are dropped beyond `max_bytes`, and tokens expire after `token_ttl` seconds.
+
+    Args:
+        max_bytes (int): Size bound for all reports held in memory.
+        token_ttl (float): Seconds a download token stays valid.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_BUFFER_MAX_BYTES, token_ttl: float = DEFAULT_TOKEN_TTL):
+        self.max_bytes = max_bytes
+        self.token_ttl = token_ttl
+        self.reused = 0
+        self.rendered = 0
+        self.evicted = 0
+        self._reports = OrderedDict()  # key -> (file name, content)
+        self._tokens = {}              # token -> (key, expires_at)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def render(self, case_data: dict, render) -> str:
+        """
+        Returns a new download token for the report of case_data, rendering it only if
+        no identical report is in memory.
+
+        Args:
+            case_data (dict): The case data passed to the renderer.
+            render: Called as render(case_data, save_to_disk=False) and must return the PDF bytes.
+        """
+        key = report_key(case_data)
+        with self._lock:
+            found = key in self._reports
+            if found:
+                self._reports.move_to_end(key)
+                self.reused += 1
+
+        if not found:
+            content = render(case_data, save_to_disk=False)
+            with self._lock:
+                if key not in self._reports:
+                    self._reports[key] = (report_filename(case_data, key), content)
+                    self._size += len(content)
+                self.rendered += 1
+
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._tokens[token] = (key, time.time() + self.token_ttl)
+            self._evict()
+        return token
+
+    def etag(self, token: str) -> str | None:
+        """Returns the ETag of the report behind token without touching its content."""
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None or entry[1] < time.time() or entry[0] not in self._reports:
+                return None
+            return entry[0]
+
+    def get(self, token: str):
+        """
+        Returns:
+            tuple | None: (ETag, file name, content) of the report behind token, or None
+                          if the token is unknown, expired or its report was evicted.
+        """
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None or entry[1] < time.time() or entry[0] not in self._reports:
+                return None
+            key = entry[0]
+            self._reports.move_to_end(key)
+            file_name, content = self._reports[key]
+        return key, file_name, content
+
+    def _evict(self):
+        now = time.time()
+        for token in [t for t, (_, expires_at) in self._tokens.items() if expires_at < now]:
+            del self._tokens[token]
+        while self._size > self.max_bytes and len(self._reports) > 1:
+            _, (_, content) = self._reports.popitem(last=False)
+            self._size -= len(content)
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'reports': len(self._reports),
+                'bytes': self._size,
+                'tokens': len(self._tokens),
+                'reused': self.reused,
+                'rendered': self.rendered,
+                'evicted': self.evicted,
+            }
@@ -0,0 +1,323 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+from cache import case_key
+from export import parse_date
+from ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Default scheduler settings
+DEFAULT_REQUESTS_PER_MINUTE = 20
+DEFAULT_WORKERS = 2
+
+# Court site requests made by one crawl: the case-status search and the orders page
+REQUESTS_PER_CRAWL = 2
+
+# How often a case is re-crawled, by days until its next hearing: (at most this many
+# days away, interval in seconds). Hearings further out or unknown use DEFAULT_INTERVAL.
+REFRESH_INTERVALS = [
+    (1, 2 * 60 * 60),
+    (7, 12 * 60 * 60),
+    (30, 24 * 60 * 60),
+]
+DEFAULT_INTERVAL = 3 * 24 * 60 * 60
+
+# A hearing date that has passed and was still the same on the last crawl means the case is
+# disposed of (the site lists no next date, so its last date is used) or not updated yet; each such crawl doubles its interval, up to DEFAULT_INTERVAL.
+
+# Intervals are spread by up to this fraction either way, so cases tracked together drift apart
+JITTER = 0.1
+
+# Per-case retry delays after failed crawls: BACKOFF_BASE * 2 ** (failures - 1), capped
+BACKOFF_BASE = 5 * 60
+MAX_BACKOFF = 6 * 60 * 60
+
+# Crawls slower than this count as the court site slowing down. Failed or slow crawls
+# pause all dispatching, starting at PAUSE_BASE and doubling up to MAX_PAUSE; fast
+# successful crawls halve the pause again.
+SLOW_CRAWL_SECONDS = 30
+PAUSE_BASE = 5
+MAX_PAUSE = 5 * 60
+
+# A claimed case whose crawl never reports back is retried after this many seconds
+CLAIM_TIMEOUT = 15 * 60
+
+# Longest the dispatcher sleeps when nothing is due, and the window throughput is measured over
+POLL_INTERVAL = 30
+THROUGHPUT_WINDOW = 10 * 60
+
+
+def refresh_interval(hearing_date: str | None, today: date | None = None, stale_crawls: int = 0) -> float:
+    """
+    Returns the re-crawl interval in seconds for a case with the given next hearing date
+    (YYYY-MM-DD), after stale_crawls crawls in a row found that date passed and unchanged.
+    """
+    if stale_crawls:
+        return min(DEFAULT_INTERVAL, REFRESH_INTERVALS[0][1] * 2 ** stale_crawls)
+    if hearing_date:
+        days = (date.fromisoformat(hearing_date) - (today or date.today())).days
+        for max_days, interval in REFRESH_INTERVALS:
+            if days <= max_days:
+                return interval
+    return DEFAULT_INTERVAL
+
+
+def _jittered(seconds: float) -> float:
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+class Scheduler:
+    """
+    Re-crawls tracked cases in the background.
+
+    Due cases are taken soonest hearing first (hearings that just passed come first,
+    since their next date is not known yet), under one requests-per-minute budget for
+    all crawls. Cases whose passed hearing date stays the same are crawled less and less
+    often and go behind the others. Failed cases back off exponentially, and when crawls fail or slow down
+    all dispatching pauses for a while.
+
+    Args:
+        path (str): SQLite file holding the tracked cases and their schedule.
+        crawl: Called as crawl(case_type, case_number, year) and returns the search
+               result (with 'next_date' and 'last_date'); raises if the crawl failed.
+        requests_per_minute (float): Court site requests allowed per minute, across all crawls.
+        workers (int): Crawls running at once.
+    """
+
+    def __init__(self, path: str, crawl, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 workers: int = DEFAULT_WORKERS):
+        self.path = path
+        self.crawl = crawl
+        self.requests_per_minute = requests_per_minute
+        self.workers = workers
+        self.completed = 0
+        self.failed = 0
+        self.pause = 0.0
+        self._started_at = None
+        self._bucket = TokenBucket(requests_per_minute / 60.0, REQUESTS_PER_CRAWL)
+        self._finished = deque()  # (finished_at, seconds) of recent crawls
+        self._running = set()
+        self._executor = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS tracked ('
+            ' case_key TEXT PRIMARY KEY, case_type TEXT NOT NULL, case_number TEXT NOT NULL,'
+            ' case_year TEXT NOT NULL, hearing_date TEXT, next_run REAL NOT NULL, last_run REAL,'
+            ' last_status TEXT, last_error TEXT, failures INTEGER NOT NULL DEFAULT 0,'
+            ' crawls INTEGER NOT NULL DEFAULT 0, added_at REAL NOT NULL,'
+            ' stale_crawls INTEGER NOT NULL DEFAULT 0)'
+        )
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(tracked)')}
+        if 'stale_crawls' not in columns:
+            # Schedules written before stale cases were backed off
+            self._conn.execute('ALTER TABLE tracked ADD COLUMN stale_crawls INTEGER NOT NULL DEFAULT 0')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS tracked_due ON tracked (next_run)')
+        self._conn.commit()
+
+    def track(self, case_type: str, case_number: str, year: str, hearing_date: str | None = None) -> bool:
+        """
+        Adds a case to the schedule, due right away. Returns False if it was already tracked.
+        hearing_date (YYYY-MM-DD) seeds its priority until the first crawl.
+        """
+        key = case_key(case_type, case_number, year)
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO tracked (case_key, case_type, case_number, case_year, hearing_date,'
+                ' next_run, added_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, case_type, case_number, str(year), hearing_date, time.time(), time.time()),
+            )
+            self._conn.commit()
+        self._wakeup.set()
+        return cursor.rowcount > 0
+
+    def untrack(self, case_type: str, case_number: str, year: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM tracked WHERE case_key = ?',
+                                        (case_key(case_type, case_number, year),))
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def tracked(self, limit: int = 100, offset: int = 0) -> list:
+        """Returns tracked cases in the order they are due."""
+        columns = ('case_type', 'case_number', 'case_year', 'hearing_date', 'next_run', 'last_run',
+                   'last_status', 'last_error', 'failures', 'crawls', 'stale_crawls')
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM tracked ORDER BY next_run LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def _claim(self, now: float):
+        """Takes the most urgent due case and holds it for CLAIM_TIMEOUT seconds."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT case_key, case_type, case_number, case_year FROM tracked WHERE next_run <= ?'
+                ' ORDER BY stale_crawls > 0, hearing_date IS NULL, hearing_date, next_run LIMIT 1',
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE tracked SET next_run = ? WHERE case_key = ?', (now + CLAIM_TIMEOUT, row[0]))
+            self._conn.commit()
+            self._running.add(row[0])
+        return row
+
+    def _next_due_in(self, now: float) -> float | None:
+        with self._lock:
+            row = self._conn.execute('SELECT MIN(next_run) FROM tracked').fetchone()
+        return None if row[0] is None else max(0.0, row[0] - now)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._started_at = time.time()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='recrawl')
+        self._thread = threading.Thread(target=self._dispatch, name='scheduler', daemon=True)
+        self._thread.start()
+        logger.info("Scheduler started: %s requests/minute, %d workers", self.requests_per_minute, self.workers)
+
+    def shutdown(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        self._thread = None
+        self._executor = None
+
+    def _dispatch(self):
+        slots = threading.Semaphore(self.workers)
+        while not self._stop.is_set():
+            if not slots.acquire(timeout=1):
+                continue
+            job = self._claim(time.time())
+            if job is None:
+                slots.release()
+                next_due = self._next_due_in(time.time())
+                self._wakeup.wait(POLL_INTERVAL if next_due is None else min(POLL_INTERVAL, next_due + 0.05))
+                self._wakeup.clear()
+                continue
+
+            # Back off from a struggling site, and stay within the request budget
+            with self._lock:
+                pause = self.pause
+            if pause:
+                self._stop.wait(_jittered(pause))
+            self._bucket.acquire(REQUESTS_PER_CRAWL)
+            if self._stop.is_set():
+                self._release(job[0], time.time())
+                slots.release()
+                break
+
+            future = self._executor.submit(self._crawl, job)
+            future.add_done_callback(lambda _: slots.release())
+
+    def _release(self, key: str, next_run: float):
+        """Puts a claimed case back without crawling it."""
+        with self._lock:
+            self._conn.execute('UPDATE tracked SET next_run = ? WHERE case_key = ?', (next_run, key))
+            self._conn.commit()
+            self._running.discard(key)
+
+    def _crawl(self, job):
+        key, case_type, case_number, case_year = job
+        start = time.time()
+        try:
+            result = self.crawl(case_type, case_number, case_year)
+        except Exception as e:
+            elapsed = time.time() - start
+            logger.warning("Re-crawl of %s %s of %s failed: %s", case_type, case_number, case_year, e)
+            self._finish(key, start, elapsed, error=str(e))
+        else:
+            # Disposed cases list no next date; their last date, which has passed, backs them off
+            hearing_date = parse_date(result.get('next_date')) or parse_date(result.get('last_date'))
+            self._finish(key, start, time.time() - start, hearing_date=hearing_date)
+
+    def _finish(self, key: str, start: float, elapsed: float, hearing_date: str | None = None,
+                error: str | None = None):
+        now = time.time()
+        with self._lock:
+            self._running.discard(key)
+            self._finished.append((now, elapsed))
+            while self._finished and self._finished[0][0] < now - THROUGHPUT_WINDOW:
+                self._finished.popleft()
+
+            if error is None and elapsed < SLOW_CRAWL_SECONDS:
+                self.pause = self.pause / 2 if self.pause > PAUSE_BASE else 0.0
+            else:
+                self.pause = min(MAX_PAUSE, max(PAUSE_BASE, self.pause * 2))
+
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+            row = self._conn.execute('SELECT failures, hearing_date, stale_crawls FROM tracked WHERE case_key = ?',
+                                     (key,)).fetchone()
+            if row is None:
+                # Untracked while it was crawling
+                return
+            if error is None:
+                hearing_date = hearing_date or row[1]
+                passed = hearing_date is not None and hearing_date < date.today().isoformat()
+                stale_crawls = row[2] + 1 if passed and hearing_date == row[1] else 0
+                interval = refresh_interval(hearing_date, stale_crawls=stale_crawls)
+                self._conn.execute(
+                    "UPDATE tracked SET hearing_date = ?, next_run = ?, last_run = ?, last_status = 'ok',"
+                    ' last_error = NULL, failures = 0, crawls = crawls + 1, stale_crawls = ? WHERE case_key = ?',
+                    (hearing_date, now + _jittered(interval), start, stale_crawls, key),
+                )
+            else:
+                failures = row[0] + 1
+                delay = min(MAX_BACKOFF, BACKOFF_BASE * 2 ** (failures - 1))
+                self._conn.execute(
+                    "UPDATE tracked SET next_run = ?, last_run = ?, last_status = 'error', last_error = ?,"
+                    ' failures = ?, crawls = crawls + 1 WHERE case_key = ?',
+                    (now + _jittered(delay), start, error, failures, key),
+                )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            tracked, due, failing = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(next_run <= ?), 0), COALESCE(SUM(failures > 0), 0) FROM tracked',
+                (now,),
+            ).fetchone()
+            window = min(THROUGHPUT_WINDOW, now - self._started_at) if self._started_at else THROUGHPUT_WINDOW
+            recent = [elapsed for finished_at, elapsed in self._finished if finished_at >= now - window]
+            stats = {
+                'running': self._thread is not None,
+                'tracked': tracked,
+                'queue_depth': due,
+                'in_flight': len(self._running),
+                'failing_cases': failing,
+                'completed': self.completed,
+                'failed': self.failed,
+                'crawls_per_minute': round(len(recent) / (window / 60), 2) if window > 0 else 0.0,
+                'average_crawl_seconds': round(sum(recent) / len(recent), 2) if recent else None,
+                'requests_per_minute_budget': self.requests_per_minute,
+                'pause_seconds': round(self.pause, 1),
+            }
+        next_due = self._next_due_in(now)
+        stats['next_due_in'] = None if next_due is None else round(next_due, 1)
+        return stats
+
+    def close(self):
+        self.shutdown()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,121 @@
+"""
+Production entry point for the case search server.
+
+Serves app.create_app() with gunicorn when it is installed (several worker processes,
+each with a pool of threads), otherwise with waitress (one process, a pool of threads),
+and otherwise with Werkzeug's threaded server. Unlike `python app.py` there is no
+debugger and no reloader.
+
+The server is configured from the environment, like the app settings in app.py:
+
+    CASE_SEARCH_HOST             address to listen on (default 0.0.0.0)
+    CASE_SEARCH_PORT             port to listen on (default 8080)
+    CASE_SEARCH_WORKERS          worker processes; more than one needs gunicorn (default 1)
+    CASE_SEARCH_THREADS          request threads per process (default 16)
+    CASE_SEARCH_BACKLOG          connections waiting to be accepted (default 64)
+    CASE_SEARCH_REQUEST_TIMEOUT  seconds before gunicorn restarts a stuck worker (default 300)
+    CASE_SEARCH_DRAIN_TIMEOUT    seconds in-flight scrapes get to finish on shutdown (default 60)
+
+On SIGTERM or SIGINT the server stops accepting requests and in-flight scrapes are
+drained before the browsers close.
+
+Usage:
+    CASE_SEARCH_WORKERS=2 CASE_SEARCH_THREADS=8 python serve.py
+"""
+import logging
+import signal
+import sys
+
+from config import env
+
+try:
+    import gunicorn.app.base
+except ImportError:  # optional server
+    gunicorn = None
+
+try:
+    import waitress
+except ImportError:  # optional server
+    waitress = None
+
+logger = logging.getLogger('serve')
+
+DEFAULT_HOST = '0.0.0.0'
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 1
+DEFAULT_THREADS = 16
+DEFAULT_BACKLOG = 64
+DEFAULT_REQUEST_TIMEOUT = 300
+DEFAULT_DRAIN_TIMEOUT = 60.0
+
+
+def _load_app():
+    from app import create_app
+    return create_app()
+
+
+if gunicorn is not None:
+    class _GunicornApplication(gunicorn.app.base.BaseApplication):
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return _load_app()
+
+
+def _exit_on_sigterm():
+    # Unwinds the server loop like Ctrl+C, so the atexit hooks drain and shut down
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+
+def main():
+    host = env('host', DEFAULT_HOST)
+    port = env('port', DEFAULT_PORT)
+    workers = env('workers', DEFAULT_WORKERS)
+    threads = env('threads', DEFAULT_THREADS)
+    backlog = env('backlog', DEFAULT_BACKLOG)
+
+    if gunicorn is not None:
+        _GunicornApplication({
+            'bind': f'{host}:{port}',
+            'workers': workers,
+            'threads': threads,
+            'worker_class': 'gthread',
+            'backlog': backlog,
+            'timeout': env('request_timeout', DEFAULT_REQUEST_TIMEOUT),
+            # gunicorn waits this long for in-flight requests after SIGTERM
+            'graceful_timeout': env('drain_timeout', DEFAULT_DRAIN_TIMEOUT),
+        }).run()
+        return 0
+
+    if workers > 1:
+        print("Several worker processes need gunicorn: pip install gunicorn", file=sys.stderr)
+        return 2
+
+    app = _load_app()
+    _exit_on_sigterm()
+    if waitress is not None:
+        logger.info("Serving on %s:%s with waitress, %d threads", host, port, threads)
+        waitress.serve(app, host=host, port=port, threads=threads, backlog=backlog)
+    else:
+        from werkzeug.serving import make_server
+        logger.warning("Neither gunicorn nor waitress is installed; using Werkzeug's threaded server")
+        server = make_server(host, port, app, threaded=True)
+        logger.info("Serving on %s:%s", host, port)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
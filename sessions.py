@@ -0,0 +1,184 @@
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+import logging
+import threading
+
+from metrics import span
+from readiness import NoRecordsFound, SessionRejected
+from sites import CASE_STATUS_SITE, FILING_DATE_SITE, site_url
+
+logger = logging.getLogger(__name__)
+
+# A warm form page is loaded afresh after serving this many searches
+MAX_SESSION_USES = 50
+
+
+class Form:
+    """
+    One of the court's search forms.
+
+    Args:
+        name (str): Name of the form, also the prefix of its timing spans.
+        url (str): Address of the form page.
+        goto_timeout (float | None): Milliseconds the form page may take to load;
+            None keeps Playwright's default.
+    """
+
+    def __init__(self, name: str, url: str, goto_timeout: float | None = None):
+        self.name = name
+        self.url = url
+        self.goto_timeout = goto_timeout
+
+    def goto_options(self) -> dict:
+        options = {'wait_until': 'domcontentloaded'}
+        if self.goto_timeout is not None:
+            options['timeout'] = self.goto_timeout
+        return options
+
+
+CASE_STATUS_FORM = Form('case_search', f'{CASE_STATUS_SITE}/app/get-case-type-status')
+FILING_DATE_FORM = Form('filing_date', f'{FILING_DATE_SITE}/pcase/guiCaseWise.php', goto_timeout=60000)
+
+
+class SessionStats:
+    """Counters of the form sessions of one browser pool or async engine."""
+
+    def __init__(self):
+        self.primes = 0
+        self.reuses = 0
+        self.rejections = 0
+        self._lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            searches = self.primes + self.reuses
+            return {
+                'primes': self.primes,
+                'reuses': self.reuses,
+                'rejections': self.rejections,
+                'reuse_ratio': self.reuses / searches if searches else 0.0,
+            }
+
+
+class FormSession:
+    """
+    A page a browser context keeps open on one of the court's search forms.
+
+    Consecutive searches in the context fill in and submit the form already on the
+    page, with the cookies and the captcha the site handed out when it was loaded,
+    instead of loading the form again every time. The form is loaded ("primed") on
+    first use, after `max_uses` searches, and when the site rejects the session.
+
+    A session is used by one search at a time; browser pools and engines keep one per
+    context and form, and drop them when the browser is recycled.
+
+    Args:
+        form (Form): The form this session keeps loaded.
+        stats (SessionStats): Counters shared by the sessions of a pool or engine.
+        max_uses (int): Searches served before the form is loaded afresh.
+    """
+
+    def __init__(self, form: Form, stats: SessionStats, max_uses: int = MAX_SESSION_USES):
+        self.form = form
+        self.stats = stats
+        self.max_uses = max_uses
+        self.page = None
+        self.uses = 0
+        self.valid = False
+
+    @property
+    def needs_priming(self) -> bool:
+        return not self.valid or self.page is None or self.page.is_closed() or self.uses >= self.max_uses
+
+    def _primed(self):
+        self.uses = 0
+        self.valid = True
+        self.stats.count('primes')
+
+
+def _prime(session: FormSession, context):
+    if session.page is None or session.page.is_closed():
+        session.page = context.new_page()
+    with span(f'{session.form.name}.goto'):
+        session.page.goto(site_url(session.form.url), **session.form.goto_options())
+    session._primed()
+
+
+async def _prime_async(session: FormSession, context):
+    if session.page is None or session.page.is_closed():
+        session.page = await context.new_page()
+    with span(f'{session.form.name}.goto'):
+        await session.page.goto(site_url(session.form.url), **session.form.goto_options())
+    session._primed()
+
+
+def _rejected(session: FormSession, reused: bool, error: Exception):
+    """Marks the session for priming. Returns True if the search should be retried on a fresh form."""
+    session.valid = False
+    if not reused:
+        return False
+    session.stats.count('rejections')
+    logger.info("The %s form was turned away (%s); loading it again", session.form.name, error)
+    return True
+
+
+def run_form_search(session: FormSession, context, search, *args):
+    """
+    Runs search(page, *args) on the session's form page and returns its result.
+
+    search fills in and submits the form on a page that already shows it. The form is
+    loaded first if the session needs priming. If the site rejects a reused session,
+    by showing a SessionRejected message or by not answering in time, the form is
+    loaded again and the search retried once.
+
+    Raises:
+        NoRecordsFound: If the site reports that no case matched.
+        SessionRejected: If the site rejects a freshly loaded form.
+    """
+    while True:
+        reused = not session.needs_priming
+        if reused:
+            session.stats.count('reuses')
+        else:
+            _prime(session, context)
+        try:
+            result = search(session.page, *args)
+        except NoRecordsFound:
+            session.uses += 1
+            raise
+        except (SessionRejected, PlaywrightTimeoutError) as e:
+            if _rejected(session, reused, e):
+                continue
+            raise
+        except Exception:
+            session.valid = False
+            raise
+        session.uses += 1
+        return result
+
+
+async def run_form_search_async(session: FormSession, context, search, *args):
+    """Async version of run_form_search(); search is a coroutine function."""
+    while True:
+        reused = not session.needs_priming
+        if reused:
+            session.stats.count('reuses')
+        else:
+            await _prime_async(session, context)
+        try:
+            result = await search(session.page, *args)
+        except NoRecordsFound:
+            session.uses += 1
+            raise
+        except (SessionRejected, PlaywrightTimeoutError) as e:
+            if _rejected(session, reused, e):
+                continue
+            raise
+        except Exception:
+            session.valid = False
+            raise
+        session.uses += 1
+        return result
@@ -0,0 +1,36 @@
+import threading
+
+# The court sites the scrapers talk to
+CASE_STATUS_SITE = 'https://delhihighcourt.nic.in'
+FILING_DATE_SITE = 'https://dhcmisc.nic.in'
+
+# Where each site's requests go instead, e.g. the local stand-in in benchmarks/court_site.py
+_targets = {}
+_targets_lock = threading.Lock()
+
+
+def configure_sites(case_status: str | None = None, filing_date: str | None = None):
+    """
+    Sends the requests for the case-status site and the case-wise (filing date) site to
+    other base URLs, such as http://127.0.0.1:8765. None keeps the real site.
+    """
+    targets = {}
+    for site, target in ((CASE_STATUS_SITE, case_status), (FILING_DATE_SITE, filing_date)):
+        if target and target.rstrip('/') != site:
+            targets[site] = target.rstrip('/')
+    with _targets_lock:
+        _targets.clear()
+        _targets.update(targets)
+
+
+def site_url(url: str) -> str:
+    """
+    Returns the address a court site URL is fetched from. Links on the pages keep
+    pointing at the real sites, so every URL is passed through this before it is fetched.
+    """
+    with _targets_lock:
+        targets = dict(_targets)
+    for site, target in targets.items():
+        if url == site or url.startswith(site + '/'):
+            return target + url[len(site):]
+    return url
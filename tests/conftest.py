@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+import pytest
+
+# app keeps its stores under the data directory from the moment it is imported, so
+# point it at a scratch directory before any test imports it.
+os.environ.setdefault('CASE_SEARCH_DATA_DIR', tempfile.mkdtemp(prefix='case_search_tests_'))
+os.environ.setdefault('CASE_SEARCH_CATALOGUE_REFRESH', 'false')
+os.environ.setdefault('CASE_SEARCH_SCHEDULER_ENABLED', 'false')
+
+import ratelimit  # noqa: E402
+from court_site import CourtSite  # noqa: E402
+from sites import configure_sites  # noqa: E402
+
+
+@pytest.fixture
+def court_site():
+    """The local stand-in for the court sites, with both sites' requests sent to it."""
+    site = CourtSite().start()
+    configure_sites(case_status=site.base_url, filing_date=site.base_url)
+    yield site
+    configure_sites()
+    site.stop()
+
+
+@pytest.fixture
+def site_limiter(monkeypatch):
+    """A fresh shared site limiter with a budget the tests never reach."""
+    limiter = ratelimit.AdaptiveRateLimiter(requests_per_minute=60000, max_requests_per_minute=60000, burst=100)
+    monkeypatch.setattr(ratelimit, '_site_limiter', limiter)
+    return limiter
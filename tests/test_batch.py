@@ -0,0 +1,25 @@
+import pytest
+
+import app
+from batch import parse_cases
+
+
+def test_jsonl_and_csv_cases():
+    assert parse_cases('{"caseType": "W.P.(C)", "caseNumber": 4352, "year": "2025"}\n') == [
+        {'case_type': 'W.P.(C)', 'case_number': '4352', 'year': '2025'}]
+    assert parse_cases('year,case_type,case_number\n2025,W.P.(C),4352\n') == [
+        {'case_type': 'W.P.(C)', 'case_number': '4352', 'year': '2025'}]
+
+
+@pytest.mark.parametrize('line', ['[1, 2]', '"x"', '7', 'null'])
+def test_jsonl_entry_that_is_not_an_object_is_rejected(line):
+    with pytest.raises(ValueError, match='not an object'):
+        parse_cases(line + '\n', 'jsonl')
+
+
+@pytest.mark.parametrize('route', ['/search/batch', '/export?format=json', '/schedule'])
+def test_routes_answer_400_for_a_jsonl_entry_that_is_not_an_object(route):
+    response = app.app.test_client().post(route, data='[1, 2]\n', content_type='application/jsonl')
+
+    assert response.status_code == 400
+    assert 'not an object' in response.get_json()['error']
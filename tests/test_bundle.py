@@ -0,0 +1,40 @@
+import os
+
+import pikepdf
+import pytest
+
+from bundle import UnreadableDocuments, build_bundle
+
+
+def _pdf(path, pages=1):
+    with pikepdf.new() as pdf:
+        for _ in range(pages):
+            pdf.add_blank_page()
+        pdf.save(path)
+    return str(path)
+
+
+def test_bundle_merges_every_order(tmp_path):
+    summary = _pdf(tmp_path / 'summary.pdf')
+    orders = [(f'Order {i}', _pdf(tmp_path / f'order{i}.pdf', pages=2)) for i in range(3)]
+
+    output = build_bundle(summary, orders, str(tmp_path / 'bundle.pdf'), batch_size=2)
+
+    with pikepdf.open(output) as bundle:
+        assert len(bundle.pages) == 7
+        with bundle.open_outline() as outline:
+            assert [item.title for item in outline.root] == ['Case summary', 'Order 0', 'Order 1', 'Order 2']
+
+
+def test_bundle_with_an_unreadable_order_is_not_written(tmp_path):
+    summary = _pdf(tmp_path / 'summary.pdf')
+    broken = tmp_path / 'broken.pdf'
+    broken.write_bytes(b'%PDF-1.4 not really a document')
+    orders = [('Order 1', _pdf(tmp_path / 'order1.pdf')), ('Order 2', str(broken))]
+    output = tmp_path / 'bundle.pdf'
+
+    with pytest.raises(UnreadableDocuments) as raised:
+        build_bundle(summary, orders, str(output))
+
+    assert raised.value.orders == [('Order 2', str(broken))]
+    assert not os.path.exists(output)
@@ -0,0 +1,25 @@
+from datetime import date, timedelta
+
+from case_db import CaseDatabase
+
+
+def case_data(case_number, next_date, last_date='Last Date: 12/03/2025'):
+    return {
+        'case_type': 'W.P.(C)', 'case_number': case_number, 'case_year': '2025',
+        'petitioner': 'A', 'respondent': 'B', 'next_date': next_date, 'last_date': last_date,
+        'court_no': 'COURT NO:12', 'orders': {'link': [], 'order_dates': []},
+    }
+
+
+def test_cases_are_found_by_their_next_hearing(tmp_path):
+    db = CaseDatabase(str(tmp_path / 'cases.sqlite3'))
+    soon = date.today() + timedelta(days=3)
+    db.upsert(case_data('1', f"NEXT DATE: {soon.strftime('%d/%m/%Y')}"))
+    db.upsert(case_data('2', 'NEXT DATE: NA'))
+
+    # As /cases?days=7 asks
+    cases = db.find(date_from=date.today().isoformat(), date_to=(date.today() + timedelta(days=7)).isoformat())
+
+    assert [(case['case_number'], case['hearing_date']) for case in cases] == [('1', soon.isoformat())]
+    assert db.get('W.P.(C)', '2', '2025')['hearing_date'] is None
+    db.close()
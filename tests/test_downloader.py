@@ -0,0 +1,77 @@
+import hashlib
+import time
+
+import pytest
+
+from court_site import CASE_STATUS_PATH, DOCUMENT_PATH, order_document
+from downloader import Downloader, DownloadError, OrderStore
+
+# As linked from the orders page, on the real site
+ORDER = '17415839312345/2025'
+ORDER_URL = f'https://delhihighcourt.nic.in/app/showlogo/{ORDER}'
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OrderStore(str(tmp_path / 'orders'))
+
+
+def test_document_is_stored_once(court_site, site_limiter, store):
+    downloader = Downloader(store)
+
+    sha256 = downloader.download(ORDER_URL)
+    assert downloader.download(ORDER_URL) == sha256
+
+    assert sha256 == hashlib.sha256(order_document(ORDER)).hexdigest()
+    with open(store.object_path(sha256), 'rb') as f:
+        assert f.read() == order_document(ORDER)
+    assert court_site.requests(DOCUMENT_PATH + ORDER) == 1
+    assert downloader.stats() == {'downloaded': 1, 'skipped': 1, 'resumed': 0, 'failed': 0}
+
+
+def test_dropped_download_resumes_with_a_range_request(court_site, site_limiter, store):
+    court_site.set_faults(cut_documents=1)
+    downloader = Downloader(store, backoff=0.01)
+
+    sha256 = downloader.download(ORDER_URL)
+
+    with open(store.object_path(sha256), 'rb') as f:
+        assert f.read() == order_document(ORDER)
+    assert court_site.requests(DOCUMENT_PATH + ORDER) == 2
+    assert downloader.stats()['resumed'] == 1
+
+
+def test_failed_attempts_are_retried_with_backoff(court_site, site_limiter, store):
+    court_site.set_faults(error_rate=1.0, error_status=503)
+    downloader = Downloader(store, retries=2, backoff=0.05)
+
+    start = time.monotonic()
+    with pytest.raises(DownloadError):
+        downloader.download(ORDER_URL)
+
+    # Waits of 0.05s and 0.1s between the three attempts
+    assert time.monotonic() - start >= 0.15
+    assert court_site.requests(DOCUMENT_PATH + ORDER) == 3
+    assert store.lookup(ORDER_URL) is None
+
+
+def test_missing_document_is_not_retried(court_site, site_limiter, store):
+    court_site.set_faults(error_rate=1.0, error_status=404)
+    downloader = Downloader(store, retries=2, backoff=0.01)
+
+    with pytest.raises(DownloadError):
+        downloader.download(ORDER_URL)
+
+    assert court_site.requests(DOCUMENT_PATH + ORDER) == 1
+
+
+def test_html_page_is_not_stored(court_site, site_limiter, store):
+    url = 'https://delhihighcourt.nic.in' + CASE_STATUS_PATH
+    downloader = Downloader(store, retries=1, backoff=0.01)
+
+    with pytest.raises(DownloadError, match='Not a PDF'):
+        downloader.download(url)
+
+    assert court_site.requests(CASE_STATUS_PATH) == 2
+    assert store.lookup(url) is None
+    assert store.stats()['urls'] == 0
@@ -0,0 +1,25 @@
+from export import COLUMNS, iter_csv, iter_ics
+
+
+def case_data(case_number, next_date):
+    return {
+        'case_type': 'W.P.(C)', 'case_number': case_number, 'case_year': '2025',
+        'petitioner': 'A', 'respondent': 'B', 'next_date': next_date, 'last_date': 'Last Date: 12/03/2025',
+        'court_no': 'COURT NO:12', 'orders': {'link': [], 'order_dates': []},
+    }
+
+
+def test_calendar_has_an_event_on_each_next_hearing():
+    ics = ''.join(iter_ics([case_data('4352', 'NEXT DATE: 28/11/2025'), case_data('12', 'NEXT DATE: NA')]))
+
+    assert ics.count('BEGIN:VEVENT') == 1
+    assert 'DTSTART;VALUE=DATE:20251128' in ics
+    assert '20250312' not in ics
+    assert 'LOCATION:Delhi High Court\\, Court No. 12\r\n' in ics
+
+
+def test_tabular_rows_carry_the_next_date():
+    header, row = ''.join(iter_csv([case_data('4352', 'NEXT DATE: 28/11/2025')])).splitlines()
+
+    assert header.split(',') == list(COLUMNS)
+    assert 'NEXT DATE: 28/11/2025' in row
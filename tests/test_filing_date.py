@@ -0,0 +1,32 @@
+from concurrent.futures import Future
+
+import app
+from cache import case_key
+from catalogue import Catalogue
+
+
+def test_seed_catalogue_has_no_filing_codes():
+    # So the lookup must still run on the case-status label until a refresh succeeds
+    assert Catalogue('/nonexistent/catalogue.json').filing_code('W.P.(C)') is None
+
+
+def test_lookup_runs_without_a_filing_code(monkeypatch):
+    calls = []
+
+    def start_filing_date(case_type, case_number, year):
+        calls.append((case_type, case_number, year))
+        future = Future()
+        future.set_result('04/03/2025')
+        return future
+
+    monkeypatch.setattr(app, 'start_filing_date', start_filing_date)
+    monkeypatch.setattr(app, 'filing_date_enabled', True)
+    key = case_key('W.P.(C)', '4352', '2025')
+    app.filing_date_cache.invalidate(key)
+    app.filing_date_misses.invalidate(key)
+
+    future = app._start_filing_date('W.P.(C)', '4352', '2025')
+
+    assert calls == [('W.P.(C)', '4352', '2025')]
+    assert future.result() == '04/03/2025'
+    assert app.filing_date_cache.get(key) == '04/03/2025'
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+import async_extractor
+import extractor
+from court_site import ORDERS_PATH
+from http_client import needs_javascript
+from ratelimit import CASE_STATUS_HOST
+
+# As linked from the case-status page, on the real site
+ORDERS_URL = 'https://delhihighcourt.nic.in/app/case-type-status-details/V1BDIDQzNTIgMjAyNQ=='
+# The stand-in renders no order rows for ?orders=0, like a page whose table is filled in by JavaScript
+SCRIPTED_ORDERS_URL = ORDERS_URL + '?orders=0'
+
+BROWSER_HTML = '<html>rendered by the browser</html>'
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    """Replaces the browser fallback of both extractors, recording what it was asked to render."""
+    calls = []
+
+    def run_page(host, fn, *args, form=None):
+        calls.append((host, fn.__name__, args))
+        return BROWSER_HTML
+
+    async def run_page_async(engine, host, fn, *args, form=None, optional=False):
+        calls.append((host, fn.__name__, args))
+        return BROWSER_HTML
+
+    monkeypatch.setattr(extractor, '_run_page', run_page)
+    monkeypatch.setattr(async_extractor, '_run_page', run_page_async)
+    return calls
+
+
+def test_server_rendered_orders_page_is_fetched_without_a_browser(court_site, site_limiter, browser):
+    html = extractor.submit_order_search(ORDERS_URL)
+
+    assert not needs_javascript(html)
+    assert len(extractor.extract_order_details_list(html)) == 3
+    assert browser == []
+    assert court_site.requests(ORDERS_PATH + 'V1BDIDQzNTIgMjAyNQ==') == 1
+
+
+def test_scripted_orders_page_falls_back_to_the_browser(court_site, site_limiter, browser):
+    html = extractor.submit_order_search(SCRIPTED_ORDERS_URL)
+
+    assert html == BROWSER_HTML
+    assert browser == [(CASE_STATUS_HOST, '_order_search_page', (court_site.site_url(SCRIPTED_ORDERS_URL),))]
+
+
+def test_async_fast_path(court_site, site_limiter, browser):
+    html = asyncio.run(async_extractor.submit_order_search_async(None, ORDERS_URL))
+
+    assert not needs_javascript(html)
+    assert browser == []
+
+
+def test_async_fallback(court_site, site_limiter, browser):
+    html = asyncio.run(async_extractor.submit_order_search_async(None, SCRIPTED_ORDERS_URL))
+
+    assert html == BROWSER_HTML
+    assert [name for _, name, _ in browser] == ['_order_search_page']
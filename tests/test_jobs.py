@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+import app
+from cache import case_key
+from jobs import JobQueue, MemoryJobStore
+
+
+CASE = ('W.P.(C)', '123', '2023')
+
+RESULT = {
+    'petitioner': 'A', 'respondent': 'B', 'last_date': '01/01/2024', 'court_no': '12',
+    'orders': [],
+}
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out')
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def stale_case(monkeypatch):
+    """Stores a stale result for CASE and makes every scrape report progress and wait for a go-ahead."""
+    key = case_key(*CASE)
+    app.case_cache.invalidate(key)
+    app.case_cache.backend.set(key, RESULT, time.time() - app.case_cache.ttl - 1)
+
+    refresh_started = threading.Event()
+    release = threading.Event()
+
+    def search_case(case_type, case_number, year, with_filing_date=True, progress=None):
+        progress = progress or (lambda step: None)
+        progress('case_search')
+        refresh_started.set()
+        release.wait(5)
+        progress('orders_search')
+        return RESULT
+
+    monkeypatch.setattr(app, 'search_case', search_case)
+    monkeypatch.setattr(app, 'filing_date_enabled', False)
+    monkeypatch.setattr(app, '_deliver_report', lambda case_data: '/download/report.pdf')
+    yield refresh_started, release
+    release.set()
+    app.case_cache.invalidate(key)
+
+
+def test_stale_refresh_leaves_finished_job_alone(stale_case):
+    refresh_started, release = stale_case
+    queue = JobQueue(MemoryJobStore(), app._search_job, workers=1)
+    try:
+        job_id = queue.submit('search', dict(zip(('case_type', 'case_number', 'year'), CASE)))
+        _wait_for(lambda: queue.get(job_id)['status'] == 'done')
+        steps = queue.get(job_id)['steps']
+
+        # The stale hit answered the job and started a refresh on another thread
+        assert refresh_started.wait(5)
+        release.set()
+        _wait_for(lambda: not app.case_cache._refreshing)
+
+        assert queue.get(job_id)['steps'] == steps
+        assert [step['name'] for step in steps] == ['report']
+    finally:
+        queue.shutdown()
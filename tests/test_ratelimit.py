@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import pytest
+
+import ratelimit
+from court_site import DOCUMENT_PATH
+from downloader import Downloader, DownloadError, OrderStore
+from ratelimit import CASE_STATUS_HOST, AdaptiveRateLimiter, CircuitBreaker
+
+
+def order_url(n: int) -> str:
+    return f'https://delhihighcourt.nic.in/app/showlogo/{n}/2025'
+
+
+def documents_requested(site, count: int = 10) -> int:
+    return sum(site.requests(f'{DOCUMENT_PATH}{n}/2025') for n in range(count))
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Makes the shared site limiter one built with the given settings."""
+    def configure(**kwargs):
+        kwargs.setdefault('burst', 100)
+        limiter = AdaptiveRateLimiter(**kwargs)
+        monkeypatch.setattr(ratelimit, '_site_limiter', limiter)
+        return limiter
+    return configure
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    # Each download is a single request to the site, so every outcome reaches the limiter
+    return Downloader(OrderStore(str(tmp_path / 'orders')), per_host=4, retries=0)
+
+
+def host_stats(limiter) -> dict:
+    return limiter.stats()[CASE_STATUS_HOST]
+
+
+@pytest.mark.parametrize('status', [429, 503])
+def test_rate_halves_when_the_site_pushes_back(court_site, limiter, downloader, status):
+    limiter = limiter(requests_per_minute=600, min_requests_per_minute=6, max_requests_per_minute=1200)
+    court_site.set_faults(error_rate=1.0, error_status=status)
+
+    with pytest.raises(DownloadError):
+        downloader.download(order_url(0))
+    assert host_stats(limiter)['requests_per_minute'] == 300
+
+    # One burst of failures halves the rate once, not once per failure
+    with pytest.raises(DownloadError):
+        downloader.download(order_url(1))
+    assert host_stats(limiter)['requests_per_minute'] == 300
+
+
+def test_rate_rises_while_the_site_answers_quickly(court_site, limiter, downloader):
+    limiter = limiter(requests_per_minute=600, max_requests_per_minute=1200)
+
+    for n in range(3):
+        downloader.download(order_url(n))
+
+    assert host_stats(limiter)['requests_per_minute'] == 603
+
+
+def test_circuit_opens_after_failures_in_a_row(court_site, limiter, downloader):
+    limiter = limiter(requests_per_minute=600, failure_threshold=3, reset_timeout=60)
+    court_site.set_faults(error_rate=1.0, error_status=503)
+
+    for n in range(3):
+        with pytest.raises(DownloadError):
+            downloader.download(order_url(n))
+    assert host_stats(limiter)['circuit'] == CircuitBreaker.OPEN
+
+    # Turned away without contacting the site
+    with pytest.raises(DownloadError, match='is failing'):
+        downloader.download(order_url(3))
+    assert documents_requested(court_site) == 3
+    assert host_stats(limiter)['rejected'] == 1
+
+
+def test_half_open_circuit_sends_a_single_probe(court_site, limiter, downloader):
+    limiter = limiter(requests_per_minute=600, failure_threshold=1, reset_timeout=0.2)
+    court_site.set_faults(error_rate=1.0, error_status=503)
+    with pytest.raises(DownloadError):
+        downloader.download(order_url(0))
+    assert host_stats(limiter)['circuit'] == CircuitBreaker.OPEN
+
+    time.sleep(0.3)
+    # The site has recovered but is slow, so the probe is still out when the others arrive
+    court_site.set_faults(delay=0.5)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [executor.submit(downloader.download, order_url(n)) for n in (1, 2, 3)]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except DownloadError:
+                outcomes.append(None)
+
+    assert len([sha256 for sha256 in outcomes if sha256]) == 1
+    assert documents_requested(court_site) == 2
+    assert host_stats(limiter)['rejected'] == 2
+    assert host_stats(limiter)['circuit'] == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_opens_the_circuit_for_longer(court_site, limiter, downloader):
+    limiter = limiter(requests_per_minute=600, failure_threshold=1, reset_timeout=0.2)
+    court_site.set_faults(error_rate=1.0, error_status=503)
+    with pytest.raises(DownloadError):
+        downloader.download(order_url(0))
+
+    time.sleep(0.3)
+    with pytest.raises(DownloadError):
+        downloader.download(order_url(1))
+
+    stats = host_stats(limiter)
+    assert stats['circuit'] == CircuitBreaker.OPEN
+    assert stats['circuit_opened'] == 2
+    assert 0.2 < stats['retry_after'] <= 0.4
@@ -0,0 +1,39 @@
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client():
+    client = app.app.test_client()
+    yield client
+    for case in app.scheduler.tracked(limit=1000):
+        app.scheduler.untrack(case['case_type'], case['case_number'], case['year'])
+
+
+def post_cases(client, body, method='post'):
+    return getattr(client, method)('/schedule', data=body, content_type='application/jsonl')
+
+
+def test_invalid_cases_are_rejected_and_nothing_is_tracked(client):
+    response = post_cases(client, '{"case_type": "W.P.(C)", "case_number": "4352", "year": "2025"}\n'
+                                  '{"case_type": "NOT A TYPE", "case_number": "1", "year": "2025"}\n'
+                                  '{"case_type": "W.P.(C)", "case_number": "12", "year": "1850"}\n')
+
+    assert response.status_code == 400
+    rejected = response.get_json()['rejected']
+    assert [(case['case_type'], case['year']) for case in rejected] == [('NOT A TYPE', '2025'), ('W.P.(C)', '1850')]
+    assert all(case['error'] for case in rejected)
+    assert app.scheduler.tracked() == []
+
+
+def test_case_type_is_tracked_as_the_form_spells_it(client):
+    first = post_cases(client, '{"case_type": "w.p. (c)", "case_number": "4352", "year": "2025"}\n')
+    second = post_cases(client, '{"case_type": "W.P.(C)", "case_number": "4352", "year": "2025"}\n')
+
+    assert first.get_json() == {'tracked': 1, 'already_tracked': 0}
+    assert second.get_json() == {'tracked': 0, 'already_tracked': 1}
+    assert [case['case_type'] for case in app.scheduler.tracked()] == ['W.P.(C)']
+
+    response = post_cases(client, '{"case_type": "w.p.(c)", "case_number": "4352", "year": "2025"}\n', 'delete')
+    assert response.get_json() == {'untracked': 1, 'not_tracked': 0}
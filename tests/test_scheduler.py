@@ -0,0 +1,52 @@
+import time
+
+from court_site import read_fixture
+from extractor import extract_details
+from scheduler import Scheduler
+
+
+def crawl_fixture(case_type, case_number, year):
+    """A crawl that reads the case from the recorded case-status page."""
+    order_url, petitioner, respondent, next_date, last_date, court_no = extract_details(read_fixture('case_status.html'))
+    return {'petitioner': petitioner, 'respondent': respondent, 'next_date': next_date,
+            'last_date': last_date, 'court_no': court_no, 'orders': []}
+
+
+def crawl_once(scheduler):
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while scheduler.completed + scheduler.failed == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        scheduler.shutdown()
+    return scheduler.tracked()[0]
+
+
+def test_details_include_the_next_hearing_date():
+    details = extract_details(read_fixture('case_status.html'))
+
+    assert details[3:] == ('NEXT DATE: 28/11/2025', 'Last Date: 12/03/2025', 'COURT NO:12')
+
+
+def test_case_is_scheduled_on_its_next_hearing_date(tmp_path):
+    scheduler = Scheduler(str(tmp_path / 'schedule.sqlite3'), crawl_fixture, requests_per_minute=6000)
+    scheduler.track('W.P.(C)', '4352', '2025')
+
+    case = crawl_once(scheduler)
+
+    assert case['last_status'] == 'ok'
+    assert case['hearing_date'] == '2025-11-28'
+
+
+def test_disposed_case_falls_back_to_its_last_date(tmp_path):
+    def crawl(case_type, case_number, year):
+        return dict(crawl_fixture(case_type, case_number, year), next_date='NEXT DATE: NA')
+
+    scheduler = Scheduler(str(tmp_path / 'schedule.sqlite3'), crawl, requests_per_minute=6000)
+    scheduler.track('W.P.(C)', '4352', '2025', hearing_date='2025-03-12')
+
+    case = crawl_once(scheduler)
+
+    assert case['hearing_date'] == '2025-03-12'
+    assert case['stale_crawls'] == 1